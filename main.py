@@ -1,5 +1,5 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 
 import schedule
 import time
@@ -7,8 +7,42 @@ import requests
 import threading
 import uvicorn
 import logging
+import os
+import json
+import pickle
+import random
+import uuid
+import hashlib
+import gzip
+import asyncio
+import contextlib
+import contextvars
+import concurrent.futures
+import multiprocessing
+import httpx
+import websockets
+import requests.adapters
+import numpy as np
 import pandas as pd
 
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlparse
+from collections import OrderedDict
+from enum import IntEnum
+
+# brotli 는 선택 (없으면 gzip 만 제공)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# orjson 은 선택 (없으면 json 사용)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 app = FastAPI()
 
@@ -17,6 +51,12 @@ logging.basicConfig(
     level=logging.INFO
 )
 
+logging.getLogger(
+    "httpx"
+).setLevel(
+    logging.WARNING
+)
+
 
 # =========================================================
 # 전역 데이터
@@ -25,2577 +65,9309 @@ logging.basicConfig(
 latest_okx_data = []
 latest_upbit_data = []
 
+# 거래소별 마지막 스냅샷 게시 시각 (None 이면 아직 없음)
+snapshot_published_at = {
+    "okx": None,
+    "upbit": None
+}
 
-# =========================================================
-# API 재시도
-# =========================================================
-
-def retry_request(func, *args, **kwargs):
-
-    for attempt in range(10):
+# 거래소별 마지막으로 새로 계산된 행의 시각 (None 이면 아직 없음)
+# 이전 행만 다시 게시한 경우 (지연 / 회로 차단 / 동기화 실패) 는 그대로
+# 준비 상태 / 지연 표시 / API 기준 시각에 사용
+snapshot_fresh_at = {
+    "okx": None,
+    "upbit": None
+}
 
-        try:
+# 스냅샷 버전 (게시할 때마다 +1) / 갱신 주기 번호
+snapshot_versions = {
+    "okx": 0,
+    "upbit": 0
+}
 
-            result = func(
-                *args,
-                **kwargs
-            )
+snapshot_cycles = {
+    "okx": 0,
+    "upbit": 0
+}
 
-            if hasattr(result, "status_code"):
+# 거래소별 수집 / 스케줄러 스레드
+collector_threads = {}
 
-                if result.status_code == 429:
+# 거래소별 마지막 갱신 오류 (시각, 내용)
+collector_errors = {
+    "okx": None,
+    "upbit": None
+}
 
-                    time.sleep(1)
+# 업비트 현재가 (거래대금 조회 시 함께 갱신)
+upbit_ticker_prices = {}
 
-                    continue
+# 업비트 수집에서 갱신하는 USDT/KRW 환율 / KRW 마켓 목록
+# OKX 작업은 업비트를 직접 조회하지 않고 마지막 값만 읽음
+upbit_reference = {
+    "usdt_krw": None,
+    "markets": None,
+    "updated_at": None
+}
 
-            return result
+# 전체 심볼 스크리너 결과
+latest_screener_data = {
+    "okx": [],
+    "upbit": []
+}
 
-        except Exception as e:
+screener_updated_at = {
+    "okx": None,
+    "upbit": None
+}
 
-            logging.error(
-                f"API 실패 {attempt + 1}/10 : {e}"
-            )
 
-            time.sleep(3)
+# =========================================================
+# 설정
+# =========================================================
 
-    return None
+# OKX 거래대금 비동기 수집 동시 요청 수
+OKX_FETCH_CONCURRENCY = 20
 
+# EMA 시드용 확정 캔들 수 (EMA120 수렴용, 저장소 보관 깊이)
+EMA_SEED_DEPTH = 600
 
-# =========================================================
-# OKX 캔들
-# 미완성 캔들 제외
-# =========================================================
+# EMA 결과 메모 최대 심볼 수 (초과 시 오래 안 쓴 심볼부터 제거)
+# 스크리너 사용 시 전체 심볼이 들어가도록 여유 있게
+EMA_MEMO_SIZE = 1024
 
-def get_okx_ohlcv(
-    inst_id,
-    bar="1H",
-    limit=200
-):
+# 지표 계산 프로세스 수 (0 이면 사용 안 함 → 수집 스레드에서 계산)
+INDICATOR_PROCESS_WORKERS = 0
 
-    url = (
-        "https://www.okx.com/api/v5/market/candles"
-        f"?instId={inst_id}"
-        f"&bar={bar}"
-        f"&limit={limit}"
-    )
+# 이 수 이상 시드할 때만 프로세스로 분산 / 작업 1개당 심볼 수
+INDICATOR_PROCESS_MIN_SYMBOLS = 64
+INDICATOR_PROCESS_CHUNK = 64
 
-    response = retry_request(
-        requests.get,
-        url
-    )
+# 캔들 동기화 동시 작업 수 (요청 속도는 레이트 리밋이 조절)
+CANDLE_SYNC_WORKERS = 8
 
-    if response is None:
-        return None
+# TOP30 갱신 : 동기화가 끝난 심볼을 이 개수씩 묶어 EMA 일괄 계산 후 게시
+EMA_PUBLISH_CHUNK = 10
 
-    try:
+# 전체 심볼 스크리너 (OKX 전체 SWAP, 업비트 전체 KRW 마켓)
+SCREENER_ENABLED = False
 
-        data = response.json()["data"]
+# 스크리너 전용 심볼 캔들 보관 수 (TOP30 은 EMA_SEED_DEPTH)
+SCREENER_CANDLE_DEPTH = 300
 
-        if not data:
-            return None
+# HTTP 연결 / 응답 대기 시간 (초)
+HTTP_CONNECT_TIMEOUT = 3
 
-        df = pd.DataFrame(
-            data,
-            columns=[
-                "ts",
-                "o",
-                "h",
-                "l",
-                "c",
-                "vol",
-                "volCcy",
-                "volCcyQuote",
-                "confirm"
-            ]
-        )
+HTTP_READ_TIMEOUT = 10
 
-        df["c"] = df["c"].astype(float)
+# 거래소 호스트별 keep-alive 연결 수
+HTTP_POOL_SIZE = 20
 
-        df["volCcyQuote"] = (
-            df["volCcyQuote"]
-            .astype(float)
-        )
+# API 재시도 횟수 / 지수 백오프 (초)
+RETRY_ATTEMPTS = 4
 
-        # =====================================================
-        # 미완성 캔들 제외
-        # =====================================================
+RETRY_BASE_DELAY = 0.5
 
-        df = df[
-            df["confirm"].astype(str) == "1"
-        ]
+RETRY_MAX_DELAY = 8
 
-        if df.empty:
-            return None
+# 회로 차단기
+# 최근 CIRCUIT_WINDOW 회 중 오류 비율이 CIRCUIT_ERROR_RATE 이상이면 차단
+# CIRCUIT_COOLDOWN 초 뒤 요청 1회로 복구 확인
+CIRCUIT_WINDOW = 20
 
-        df = df.iloc[::-1].reset_index(
-            drop=True
-        )
+CIRCUIT_MIN_REQUESTS = 5
 
-        return df
+CIRCUIT_ERROR_RATE = 0.5
 
-    except Exception as e:
+CIRCUIT_COOLDOWN = 30
 
-        logging.error(
-            f"OKX 오류 {inst_id}:{e}"
-        )
+# 실시간 수신 (웹소켓)
+# 켜면 TOP30 심볼의 캔들을 웹소켓으로 받아
+# 캔들 마감 즉시 해당 행을 다시 계산
+STREAM_ENABLED = False
 
-        return None
+OKX_WS_URL = "wss://ws.okx.com:8443/ws/v5/business"
 
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
 
-# =========================================================
-# 업비트 분봉
-# =========================================================
+# 구독 심볼 변경 확인 / ping 주기 (초)
+STREAM_CHECK_INTERVAL = 20
 
-def get_upbit_ohlcv(
-    market,
-    unit=60,
-    count=200
-):
+STREAM_RECONNECT_DELAY = 5
 
-    url = (
-        "https://api.upbit.com/v1/candles/minutes/"
-        f"{unit}"
-        f"?market={market}"
-        f"&count={count}"
-    )
+# 대시보드 새로고침 주기 (초), 첫 수집 전에는 짧게
+DASHBOARD_REFRESH = 300
 
-    response = retry_request(
-        requests.get,
-        url
-    )
+DASHBOARD_WARMUP_REFRESH = 15
 
-    if response is None:
-        return None
+# 이 시간(초)보다 오래된 스냅샷은 지연 표시
+SNAPSHOT_STALE_AFTER = 900
 
-    try:
+# 이 시간(초)보다 오래된 업비트 환율 / 마켓 목록은 OKX 에서 오래된 값으로 표시
+UPBIT_REFERENCE_STALE_AFTER = 900
 
-        data = response.json()
+# 대시보드 압축 수준 (렌더링할 때 1회만 압축)
+DASHBOARD_GZIP_LEVEL = 9
 
-        if not data:
-            return None
+DASHBOARD_BROTLI_QUALITY = 11
 
-        df = pd.DataFrame(data)
+# /api/okx, /api/upbit 스냅샷별로 보관할 fields 조합 수
+API_FIELDS_CACHE_SIZE = 32
 
-        df = df.iloc[::-1].reset_index(
-            drop=True
-        )
+# 갱신 1회 시간 예산 (초)
+# 넘으면 남은 요청은 바로 포기하고 남은 심볼은 이전 행 유지 (지연 표시)
+CYCLE_DEADLINE = 240
 
-        df["trade_price"] = (
-            df["trade_price"]
-            .astype(float)
-        )
+# 단계별 갱신 (거래소별로 따로 실행)
+# 거래대금 순위 : RANKING_REFRESH 분마다 (새로 들어온 심볼만 캔들 조회)
+# 1H 지표 / 변동률 : 매 UTC 정시 + CANDLE_SETTLE_DELAY 초
+# 4H 지표 : UTC 0/4/8/12/16/20시 + CANDLE_SETTLE_DELAY 초
+# (OKX confirm / 업비트 캔들 확정 대기)
+RANKING_REFRESH = {
+    "okx": 5,
+    "upbit": 5
+}
 
-        return df
+CANDLE_SETTLE_DELAY = 20
 
-    except Exception as e:
+# 재시작용 디스크 캐시 (캔들 버퍼 + 마지막 스냅샷)
+WARM_CACHE_PATH = "cache/warm_cache.bin"
 
-        logging.error(
-            f"업비트 캔들 오류 {market}:{e}"
-        )
+# OKX 거래대금 순위 방식
+# "candle" : 1H 캔들 24개 volCcyQuote 합산 (심볼당 요청 1회)
+# "ticker" : market/tickers 일괄 응답 (전체 요청 1회)
+OKX_VOLUME_MODE = "candle"
 
-        return None
+# 거래대금 방식 비교 결과 재사용 시간 (초)
+# 캔들 방식은 전체 심볼 조회라 요청마다 다시 수집하지 않음
+OKX_VOLUME_PARITY_TTL = RANKING_REFRESH["okx"] * 60
 
 
 # =========================================================
-# 업비트 4H 캔들
-# 현재 진행 중인 4H 제외
+# 요청 속도 제한
+#
+# 거래소 / 엔드포인트 그룹별 토큰 버킷
+# 요청 전에 미리 대기해 429 자체를 피함
+#
+# (요청 수, 초) 단위 한도
+# OKX  : 엔드포인트별 2초 한도
+# 업비트 : 그룹별 초당 한도, Remaining-Req 헤더로 보정
 # =========================================================
 
-def get_upbit_4h_ohlcv(
-    market,
-    count=200
-):
+RATE_LIMITS = {
+
+    "www.okx.com": {
+        "/api/v5/market/candles": (40, 2),
+        "/api/v5/market/history-candles": (20, 2),
+        "/api/v5/market/tickers": (20, 2),
+        "/api/v5/public/instruments": (20, 2),
+        "": (20, 2)
+    },
+
+    "api.upbit.com": {
+        "/v1/candles": (10, 1),
+        "/v1/ticker": (10, 1),
+        "/v1/market": (10, 1),
+        "": (10, 1)
+    }
 
-    url = (
-        "https://api.upbit.com/v1/candles/minutes/240"
-        f"?market={market}"
-        f"&count={count}"
-    )
+}
 
-    response = retry_request(
-        requests.get,
-        url
-    )
+DEFAULT_RATE_LIMIT = (10, 1)
 
-    if response is None:
-        return None
+# 한도 대비 사용 비율
+RATE_LIMIT_SAFETY = 0.9
 
-    try:
 
-        data = response.json()
+class TokenBucket:
 
-        if not data:
-            return None
+    def __init__(
+        self,
+        name,
+        limit,
+        window
+    ):
 
-        df = pd.DataFrame(data)
+        self.name = name
 
-        df = df.iloc[::-1].reset_index(
-            drop=True
+        # 버스트 + 윈도우 동안 충전량이 한도를 넘지 않도록 설정
+        self.capacity = max(
+            1,
+            limit * (1 - RATE_LIMIT_SAFETY)
         )
 
-        df["trade_price"] = (
-            df["trade_price"]
-            .astype(float)
+        self.rate = (
+            limit
+            *
+            RATE_LIMIT_SAFETY
+            /
+            window
         )
 
-        # =====================================================
-        # 현재 진행 중인 4시간봉 제외
-        # =====================================================
+        self.tokens = self.capacity
 
-        now = pd.Timestamp.now(
-            tz="Asia/Seoul"
-        )
+        self.updated = time.monotonic()
+
+        self.lock = threading.Lock()
+
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+        self.throttled = 0
 
-        current_hour = now.hour
+    def refill(self):
 
-        candle_start_hour = (
-            current_hour // 4
-        ) * 4
+        now = time.monotonic()
 
-        current_candle_start = (
-            now.normalize()
+        self.tokens = min(
+            self.capacity,
+            self.tokens
             +
-            pd.Timedelta(
-                hours=candle_start_hour
-            )
+            (now - self.updated)
+            *
+            self.rate
         )
 
-        df["candle_datetime"] = pd.to_datetime(
-            df["candle_date_time_kst"]
-        ).dt.tz_localize(
-            "Asia/Seoul"
-        )
+        self.updated = now
 
-        df = df[
-            df["candle_datetime"]
-            <
-            current_candle_start
-        ]
+    # 토큰 1개 예약 후 대기해야 할 시간 반환
+    def reserve(self):
 
-        df = df.reset_index(
-            drop=True
-        )
+        with self.lock:
 
-        if df.empty:
-            return None
+            self.refill()
 
-        return df
+            self.tokens -= 1
 
-    except Exception as e:
+            wait = 0.0
 
-        logging.error(
-            f"업비트 4H 오류 {market}:{e}"
-        )
+            if self.tokens < 0:
 
-        return None
+                wait = -self.tokens / self.rate
 
+            return wait
 
-# =========================================================
-# 업비트 일봉
-# =========================================================
+    # 통계는 예약이 확정된 요청만 기록 (취소된 예약은 제외)
+    def record_wait(
+        self,
+        wait
+    ):
 
-def get_upbit_day_ohlcv(
-    market,
-    count=200
-):
+        with self.lock:
 
-    url = (
-        "https://api.upbit.com/v1/candles/days"
-        f"?market={market}"
-        f"&count={count}"
-    )
+            self.requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.last_wait = wait
 
-    response = retry_request(
-        requests.get,
-        url
-    )
+            if wait > 0:
 
-    if response is None:
-        return None
+                self.waited += 1
 
-    try:
+    # max_wait 보다 오래 기다려야 하면 예약 취소 후 None
+    def acquire(
+        self,
+        max_wait=None
+    ):
 
-        data = response.json()
+        wait = self.reserve()
+
+        if max_wait is not None and wait > max_wait:
+
+            self.cancel()
 
-        if not data:
             return None
 
-        df = pd.DataFrame(data)
+        self.record_wait(wait)
 
-        df = df.iloc[::-1].reset_index(
-            drop=True
-        )
+        if wait > 0:
 
-        df["trade_price"] = (
-            df["trade_price"]
-            .astype(float)
-        )
+            time.sleep(wait)
 
-        return df
+        return wait
 
-    except Exception as e:
+    def cancel(self):
 
-        logging.error(
-            f"업비트 일봉 오류 {market}:{e}"
-        )
+        with self.lock:
 
-        return None
+            self.tokens += 1
 
+    async def acquire_async(
+        self,
+        max_wait=None
+    ):
 
-# =========================================================
-# OKX 목록
-# =========================================================
+        wait = self.reserve()
 
-def get_all_okx_swap_symbols():
+        if max_wait is not None and wait > max_wait:
 
-    url = (
-        "https://www.okx.com/api/v5/"
-        "public/instruments?instType=SWAP"
-    )
+            self.cancel()
 
-    response = retry_request(
-        requests.get,
-        url
-    )
+            return None
 
-    if response is None:
-        return []
+        self.record_wait(wait)
 
-    try:
+        if wait > 0:
 
-        return [
-            x["instId"]
-            for x in response.json()["data"]
-            if (
-                x["instId"].endswith("-USDT-SWAP")
-                and
-                x.get("state") == "live"
+            await asyncio.sleep(wait)
+
+        return wait
+
+    # 429 수신 시 버킷을 비워 모든 요청을 함께 늦춤
+    def penalize(
+        self,
+        seconds=1
+    ):
+
+        with self.lock:
+
+            self.refill()
+
+            self.tokens = min(
+                self.tokens,
+                -self.rate * seconds
             )
-        ]
 
-    except Exception as e:
+            self.throttled += 1
 
-        logging.error(
-            f"OKX 목록 오류:{e}"
+    # 업비트 Remaining-Req : group=candles; min=600; sec=9
+    def observe(
+        self,
+        response
+    ):
+
+        header = response.headers.get(
+            "Remaining-Req"
         )
 
-        return []
+        if not header:
 
+            return
 
-# =========================================================
-# 업비트 목록
-# =========================================================
+        try:
 
-def get_upbit_markets():
+            remaining = dict(
+                item.strip().split("=")
+                for item in header.split(";")
+            )
 
-    response = retry_request(
-        requests.get,
-        "https://api.upbit.com/v1/market/all"
-    )
+            sec = int(remaining["sec"])
 
-    if response is None:
-        return []
+        except Exception:
 
-    try:
+            return
 
-        return [
-            x["market"]
-            for x in response.json()
-            if x["market"].startswith("KRW-")
-        ]
+        with self.lock:
 
-    except Exception as e:
+            self.refill()
 
-        logging.error(
-            f"업비트 목록 오류:{e}"
-        )
+            self.tokens = min(
+                self.tokens,
+                sec
+            )
 
-        return []
+    def stats(self):
 
+        with self.lock:
 
-# =========================================================
-# USDT/KRW
-# =========================================================
+            return {
 
-def get_usdt_krw():
+                "requests":
+                    self.requests,
 
-    response = retry_request(
-        requests.get,
-        "https://api.upbit.com/v1/ticker?markets=KRW-USDT"
-    )
+                "waited":
+                    self.waited,
 
-    if response is None:
-        return 1400
+                "avg_wait":
+                    round(
+                        self.total_wait / self.requests,
+                        4
+                    ) if self.requests else 0,
 
-    try:
+                "max_wait":
+                    round(self.max_wait, 4),
 
-        return float(
-            response.json()[0]["trade_price"]
-        )
+                "last_wait":
+                    round(self.last_wait, 4),
 
-    except:
+                "throttled":
+                    self.throttled
 
-        return 1400
+            }
 
 
-# =========================================================
-# 거래대금 표시
-# =========================================================
+rate_limiters = {}
 
-def format_volume(volume):
+rate_limiters_lock = threading.Lock()
 
-    if volume >= 1_000_000_000_000:
 
-        return (
-            f"{volume / 1_000_000_000_000:.2f}조"
-        )
+def get_rate_limiter(
+    url
+):
 
-    elif volume >= 100_000_000:
+    parsed = urlparse(url)
 
-        return (
-            f"{volume / 100_000_000:,.0f}억"
-        )
+    host = parsed.netloc
 
-    else:
+    limits = RATE_LIMITS.get(
+        host,
+        {"": DEFAULT_RATE_LIMIT}
+    )
 
-        return (
-            f"{volume / 10_000:,.0f}만원"
-        )
+    group = max(
+        (
+            prefix
+            for prefix in limits
+            if parsed.path.startswith(prefix)
+        ),
+        key=len
+    )
 
+    key = f"{host}{group}"
 
-# =========================================================
-# EMA 10-20 방향
-# =========================================================
+    with rate_limiters_lock:
 
-def get_ema_10_20_direction(
-    df,
-    column
-):
+        limiter = rate_limiters.get(key)
 
-    if df is None or len(df) < 20:
+        if limiter is None:
 
-        return "none"
+            limiter = TokenBucket(
+                key,
+                *limits[group]
+            )
 
-    ema10 = (
-        df[column]
-        .ewm(
-            span=10,
-            adjust=False
-        )
-        .mean()
-    )
+            rate_limiters[key] = limiter
 
-    ema20 = (
-        df[column]
-        .ewm(
-            span=20,
-            adjust=False
-        )
-        .mean()
-    )
+        return limiter
+
+
+def get_rate_limit_stats():
+
+    with rate_limiters_lock:
 
-    if ema10.iloc[-1] > ema20.iloc[-1]:
+        limiters = list(
+            rate_limiters.values()
+        )
 
-        return "long"
+    return {
 
-    elif ema10.iloc[-1] < ema20.iloc[-1]:
+        limiter.name:
+        limiter.stats()
 
-        return "short"
+        for limiter in limiters
 
-    return "none"
+    }
 
 
 # =========================================================
-# EMA 20-60-120 방향
+# 회로 차단기
+#
+# 호스트 / 엔드포인트별 오류율 감시
+# closed    : 정상
+# open      : 즉시 실패 (대기 없음)
+# half_open : 쿨다운 후 요청 1회로 복구 확인
+#
+# allow() 는 확인 요청이면 "probe" 반환
+# 확인 요청이 성공 / 실패 기록 없이 끝나면 (429 등) release() 로 반납
 # =========================================================
 
-def get_ema_20_60_120_direction(
-    df,
-    column
-):
+class CircuitBreaker:
 
-    if df is None or len(df) < 120:
+    def __init__(
+        self,
+        name
+    ):
 
-        return "none"
+        self.name = name
 
-    ema20 = (
-        df[column]
-        .ewm(
-            span=20,
-            adjust=False
-        )
-        .mean()
-    )
+        self.state = "closed"
 
-    ema60 = (
-        df[column]
-        .ewm(
-            span=60,
-            adjust=False
-        )
-        .mean()
-    )
+        self.results = []
 
-    ema120 = (
-        df[column]
-        .ewm(
-            span=120,
-            adjust=False
-        )
-        .mean()
-    )
+        self.opened_at = 0.0
 
-    if (
-        ema20.iloc[-1]
-        >
-        ema60.iloc[-1]
-        >
-        ema120.iloc[-1]
-    ):
+        self.probing = False
 
-        return "long"
+        self.opened = 0
 
-    elif (
-        ema20.iloc[-1]
-        <
-        ema60.iloc[-1]
-        <
-        ema120.iloc[-1]
-    ):
+        self.rejected = 0
 
-        return "short"
+        self.lock = threading.Lock()
 
-    return "none"
+    def allow(self):
 
+        with self.lock:
 
-# =========================================================
-# EMA 10-20 상태
-# =========================================================
+            if self.state == "closed":
 
-def check_ema_10_20(
-    df,
-    column
-):
+                return True
 
-    if df is None or len(df) < 20:
+            if (
+                self.state == "open"
+                and
+                time.monotonic() - self.opened_at
+                >=
+                CIRCUIT_COOLDOWN
+            ):
 
-        return "⚪(0)"
+                self.state = "half_open"
 
-    df = df.copy()
+                self.probing = False
 
-    df["ema10"] = (
-        df[column]
-        .ewm(
-            span=10,
-            adjust=False
-        )
-        .mean()
-    )
+            if (
+                self.state == "half_open"
+                and
+                not self.probing
+            ):
 
-    df["ema20"] = (
-        df[column]
-        .ewm(
-            span=20,
-            adjust=False
-        )
-        .mean()
-    )
+                self.probing = True
 
-    states = []
+                return "probe"
 
-    for _, row in df.iterrows():
+            self.rejected += 1
 
-        if row["ema10"] > row["ema20"]:
+            return False
 
-            states.append("long")
+    # 기록 없이 끝난 확인 요청 반납 → 다음 요청이 다시 확인
+    def release(self):
 
-        elif row["ema10"] < row["ema20"]:
+        with self.lock:
 
-            states.append("short")
+            if self.state == "half_open":
 
-        else:
+                self.probing = False
 
-            states.append("none")
+    def is_open(self):
 
-    current_state = states[-1]
+        with self.lock:
 
-    if current_state == "none":
+            return (
+                self.state == "open"
+                and
+                time.monotonic() - self.opened_at
+                <
+                CIRCUIT_COOLDOWN
+            )
 
-        return "⚪(0)"
+    def record(
+        self,
+        success
+    ):
 
-    count = 0
+        with self.lock:
 
-    for state in reversed(states):
+            # 차단 중 뒤늦게 끝난 요청은 무시
+            if self.state == "open":
 
-        if state == current_state:
+                return
 
-            count += 1
+            if self.state == "half_open":
 
-        else:
+                if success:
 
-            break
+                    logging.info(
+                        f"회로 복구 {self.name}"
+                    )
 
-    if current_state == "long":
+                    self.state = "closed"
 
-        return f"🟢({count})"
+                    self.results = []
 
-    elif current_state == "short":
+                else:
 
-        return f"🔴({count})"
+                    self.trip()
 
-    return "⚪(0)"
+                return
 
+            self.results.append(success)
 
-# =========================================================
-# EMA 20-60-120 상태
-# =========================================================
+            self.results = self.results[
+                -CIRCUIT_WINDOW:
+            ]
 
-def check_ema(
-    df,
-    column
-):
+            errors = self.results.count(False)
 
-    if df is None or len(df) < 120:
+            if (
+                len(self.results) >= CIRCUIT_MIN_REQUESTS
+                and
+                errors / len(self.results)
+                >=
+                CIRCUIT_ERROR_RATE
+            ):
 
-        return "⚪(0)"
+                self.trip()
 
-    df = df.copy()
+    def trip(self):
 
-    df["ema20"] = (
-        df[column]
-        .ewm(
-            span=20,
-            adjust=False
+        logging.error(
+            f"회로 차단 {self.name} "
+            f"({CIRCUIT_COOLDOWN}초)"
         )
-        .mean()
-    )
 
-    df["ema60"] = (
-        df[column]
-        .ewm(
-            span=60,
-            adjust=False
-        )
-        .mean()
-    )
+        self.state = "open"
 
-    df["ema120"] = (
-        df[column]
-        .ewm(
-            span=120,
-            adjust=False
-        )
-        .mean()
-    )
+        self.opened_at = time.monotonic()
 
-    states = []
+        self.probing = False
 
-    for _, row in df.iterrows():
+        self.results = []
 
-        if (
-            row["ema20"]
-            >
-            row["ema60"]
-            >
-            row["ema120"]
-        ):
+        self.opened += 1
 
-            states.append("long")
+    def stats(self):
 
-        elif (
-            row["ema20"]
-            <
-            row["ema60"]
-            <
-            row["ema120"]
-        ):
+        with self.lock:
 
-            states.append("short")
+            return {
 
-        else:
+                "state":
+                    self.state,
 
-            states.append("none")
+                "opened":
+                    self.opened,
 
-    current_state = states[-1]
+                "rejected":
+                    self.rejected
 
-    if current_state == "none":
+            }
 
-        return "⚪(0)"
 
-    count = 0
+circuit_breakers = {}
 
-    for state in reversed(states):
+circuit_breakers_lock = threading.Lock()
 
-        if state == current_state:
 
-            count += 1
+def get_circuit_breaker(
+    url
+):
 
-        else:
+    parsed = urlparse(url)
 
-            break
+    key = f"{parsed.netloc}{parsed.path}"
 
-    if current_state == "long":
+    with circuit_breakers_lock:
 
-        return f"🟢({count})"
+        breaker = circuit_breakers.get(key)
 
-    elif current_state == "short":
+        if breaker is None:
 
-        return f"🔴({count})"
+            breaker = CircuitBreaker(key)
 
-    return "⚪(0)"
+            circuit_breakers[key] = breaker
 
+        return breaker
 
-# =========================================================
-# EMA 10-20 지속 캔들 수
-# =========================================================
 
-def get_ema_10_20_count(
-    df,
-    column
+def is_circuit_open(
+    url
 ):
 
-    if df is None or len(df) < 20:
+    return get_circuit_breaker(
+        url
+    ).is_open()
 
-        return 0, "none"
 
-    df = df.copy()
+def get_circuit_stats():
 
-    df["ema10"] = (
-        df[column]
-        .ewm(
-            span=10,
-            adjust=False
-        )
-        .mean()
-    )
+    with circuit_breakers_lock:
 
-    df["ema20"] = (
-        df[column]
-        .ewm(
-            span=20,
-            adjust=False
+        breakers = list(
+            circuit_breakers.values()
         )
-        .mean()
-    )
 
-    states = []
+    return {
 
-    for _, row in df.iterrows():
+        breaker.name:
+        breaker.stats()
 
-        if row["ema10"] > row["ema20"]:
+        for breaker in breakers
 
-            states.append("long")
+    }
 
-        elif row["ema10"] < row["ema20"]:
 
-            states.append("short")
+# =========================================================
+# 재시도 대기
+# 지수 백오프 + full jitter
+# =========================================================
 
-        else:
+def get_retry_delay(
+    attempt
+):
 
-            states.append("none")
+    return random.uniform(
+        0,
+        min(
+            RETRY_MAX_DELAY,
+            RETRY_BASE_DELAY * 2 ** attempt
+        )
+    )
 
-    current_state = states[-1]
 
-    if current_state == "none":
+# =========================================================
+# 시간 예산 (deadline)
+#
+# 갱신 작업마다 끝나야 할 시각을 컨텍스트 변수로 전달
+# (스레드 풀 / 비동기 작업에도 그대로 전달)
+# API 재시도 대기, 속도 제한 대기, 요청 타임아웃을 남은 시간으로 제한
+# =========================================================
 
-        return 0, "none"
+cycle_deadline = contextvars.ContextVar(
+    "cycle_deadline",
+    default=None
+)
 
-    count = 0
 
-    for state in reversed(states):
+# 남은 시간 (초), 예산 없으면 None
+def get_deadline_remaining():
 
-        if state == current_state:
+    deadline = cycle_deadline.get()
 
-            count += 1
+    if deadline is None:
 
-        else:
+        return None
 
-            break
+    return deadline - time.time()
 
-    return count, current_state
 
+def is_deadline_expired():
 
-# =========================================================
-# 1H 눌림 조건
-#
-# LONG
-# 1H 10-20 역배열
-# 1H 20-60-120 정배열
-# 4H 10-20 정배열
-# 4H 20-60-120 정배열
-# 4H 10-20 정배열 지속 10봉 이하
-#
-# SHORT
-# 반대
-# =========================================================
+    remaining = get_deadline_remaining()
 
-def check_1h_warning(
-    df1h,
-    df4h,
-    column
-):
+    return remaining is not None and remaining <= 0
 
-    if (
-        df1h is None
-        or df4h is None
-        or len(df1h) < 120
-        or len(df4h) < 120
-    ):
 
-        return "none"
+@contextlib.contextmanager
+def deadline_budget(
+    seconds
+):
 
+    token = cycle_deadline.set(
+        time.time() + seconds
+    )
 
-    # =====================================================
-    # 1H
-    # =====================================================
+    try:
 
-    ema1h_10_20 = (
-        get_ema_10_20_direction(
-            df1h,
-            column
-        )
-    )
+        yield
 
-    ema1h_20_60_120 = (
-        get_ema_20_60_120_direction(
-            df1h,
-            column
-        )
-    )
+    finally:
 
+        cycle_deadline.reset(token)
 
-    # =====================================================
-    # 4H
-    # =====================================================
 
-    ema4h_10_20 = (
-        get_ema_10_20_direction(
-            df4h,
-            column
-        )
-    )
+# (연결, 응답) 타임아웃을 남은 시간 이내로
+def cap_timeout(
+    timeout,
+    remaining
+):
 
-    ema4h_20_60_120 = (
-        get_ema_20_60_120_direction(
-            df4h,
-            column
-        )
+    remaining = max(
+        remaining,
+        0.001
     )
 
+    if isinstance(timeout, tuple):
 
-    # =====================================================
-    # 4H 10-20 지속 봉 수
-    # =====================================================
-
-    count4h, direction4h = (
-        get_ema_10_20_count(
-            df4h,
-            column
+        return tuple(
+            min(x, remaining)
+            for x in timeout
         )
-    )
 
+    return min(timeout, remaining)
 
-    # =====================================================
-    # LONG 눌림
-    # =====================================================
 
-    if (
-        ema1h_10_20 == "short"
-        and
-        ema1h_20_60_120 == "long"
-        and
-        ema4h_10_20 == "long"
-        and
-        ema4h_20_60_120 == "long"
-        and
-        direction4h == "long"
-        and
-        count4h >= 1
-        and
-        count4h <= 10
-    ):
+# =========================================================
+# API 재시도
+#
+# limiter 가 있으면 요청 전 토큰 버킷 대기
+# 응답에 대기 시간(rate_limit_wait) 기록
+# breaker 가 열려 있으면 대기 없이 None
+# 5xx / 예외는 회로 차단기에 실패로 기록
+# 429 는 기록하지 않음 (확인 요청이었으면 반납)
+# =========================================================
 
-        return f"long_warning_{count4h}"
+def retry_request(func, *args, limiter=None, breaker=None, **kwargs):
 
+    for attempt in range(RETRY_ATTEMPTS):
 
-    # =====================================================
-    # SHORT 눌림
-    # =====================================================
+        # 시간 예산이 없으면 확인 요청 자리도 차지하지 않음
+        remaining = get_deadline_remaining()
 
-    if (
-        ema1h_10_20 == "long"
-        and
-        ema1h_20_60_120 == "short"
-        and
-        ema4h_10_20 == "short"
-        and
-        ema4h_20_60_120 == "short"
-        and
-        direction4h == "short"
-        and
-        count4h >= 1
-        and
-        count4h <= 10
-    ):
+        if remaining is not None and remaining <= 0:
 
-        return f"short_warning_{count4h}"
+            return None
 
+        allowed = (
+            breaker.allow()
+            if breaker is not None
+            else True
+        )
 
-    return "none"
+        if not allowed:
 
+            return None
 
-# =========================================================
-# 1H 돌파 조건
-#
-# LONG
-# 1H 10-20 정배열
-# 1H 20-60-120 정배열
-# 4H 10-20 정배열
-# 4H 20-60-120 정배열
-# 4H 10-20 지속 10봉 이하
-#
-# SHORT
-# 반대
-#
-# ★ 돌파도 눌림과 동일하게
-#   4H 10-20 지속 캔들 수 표시
-# =========================================================
+        try:
 
-def check_1h_breakout_warning(
-    df1h,
-    df4h,
-    column
-):
+            wait = 0.0
 
-    if (
-        df1h is None
-        or df4h is None
-        or len(df1h) < 120
-        or len(df4h) < 120
-    ):
+            if limiter is not None:
 
-        return "none"
+                wait = limiter.acquire(
+                    max_wait=remaining
+                )
 
+                if wait is None:
 
-    # =====================================================
-    # 1H 10-20 방향
-    # =====================================================
+                    return None
 
-    ema1h_10_20 = (
-        get_ema_10_20_direction(
-            df1h,
-            column
-        )
-    )
+            call_kwargs = kwargs
 
+            if remaining is not None and "timeout" in kwargs:
 
-    # =====================================================
-    # 1H 20-60-120 방향
-    # =====================================================
+                call_kwargs = dict(
+                    kwargs,
+                    timeout=cap_timeout(
+                        kwargs["timeout"],
+                        get_deadline_remaining()
+                    )
+                )
 
-    ema1h_20_60_120 = (
-        get_ema_20_60_120_direction(
-            df1h,
-            column
-        )
-    )
+            result = func(
+                *args,
+                **call_kwargs
+            )
 
+            if hasattr(result, "status_code"):
 
-    # =====================================================
-    # 4H 10-20 방향
-    # =====================================================
+                if limiter is not None:
 
-    ema4h_10_20 = (
-        get_ema_10_20_direction(
-            df4h,
-            column
-        )
-    )
+                    limiter.observe(result)
 
+                if result.status_code == 429:
 
-    # =====================================================
-    # 4H 20-60-120 방향
-    # =====================================================
+                    if limiter is not None:
 
-    ema4h_20_60_120 = (
-        get_ema_20_60_120_direction(
-            df4h,
-            column
-        )
-    )
+                        limiter.penalize()
 
+                    else:
 
-    # =====================================================
-    # ★ 돌파도 4H 10-20 지속 캔들 수 사용
-    # =====================================================
+                        time.sleep(1)
 
-    count4h, direction4h = (
-        get_ema_10_20_count(
-            df4h,
-            column
-        )
-    )
+                    continue
 
+                if result.status_code >= 500:
 
-    # =====================================================
-    # LONG 돌파
-    # =====================================================
+                    raise Exception(
+                        f"HTTP {result.status_code}"
+                    )
 
-    if (
-        ema1h_10_20 == "long"
-        and
-        ema1h_20_60_120 == "long"
-        and
-        ema4h_10_20 == "long"
-        and
-        ema4h_20_60_120 == "long"
-        and
-        direction4h == "long"
-        and
-        count4h >= 1
-        and
-        count4h <= 10
-    ):
+                result.rate_limit_wait = wait
 
-        return f"long_breakout_{count4h}"
+            if breaker is not None:
 
+                breaker.record(True)
 
-    # =====================================================
-    # SHORT 돌파
-    # =====================================================
+            return result
 
-    if (
-        ema1h_10_20 == "short"
-        and
-        ema1h_20_60_120 == "short"
-        and
-        ema4h_10_20 == "short"
-        and
-        ema4h_20_60_120 == "short"
-        and
-        direction4h == "short"
-        and
-        count4h >= 1
-        and
-        count4h <= 10
-    ):
+        except Exception as e:
 
-        return f"short_breakout_{count4h}"
+            if breaker is not None:
 
+                breaker.record(False)
 
-    return "none"
+            logging.error(
+                f"API 실패 {attempt + 1}/{RETRY_ATTEMPTS} : {e}"
+            )
 
+            if attempt + 1 < RETRY_ATTEMPTS:
 
-# =========================================================
-# 최종 LONG / SHORT 신호
-#
-# 경고가 발생한 경우에만 LONG / SHORT 표시
-# =========================================================
+                delay = get_retry_delay(attempt)
 
-def get_trade_signal(
-    warning,
-    breakout
-):
+                remaining = get_deadline_remaining()
 
-    # =====================================================
-    # 돌파 우선
-    # =====================================================
+                if remaining is not None and delay >= remaining:
 
-    if breakout.startswith(
-        "long_breakout_"
-    ):
+                    return None
 
-        return "LONG"
+                time.sleep(delay)
 
+        finally:
 
-    if breakout.startswith(
-        "short_breakout_"
-    ):
+            # 429 / 시간 예산 초과로 끝난 확인 요청 반납
+            if allowed == "probe":
 
-        return "SHORT"
+                breaker.release()
 
+    return None
 
-    # =====================================================
-    # 눌림
-    # =====================================================
 
-    if warning.startswith(
-        "long_warning_"
-    ):
+# =========================================================
+# API 재시도 (비동기)
+# =========================================================
 
-        return "LONG"
+async def retry_request_async(func, *args, limiter=None, breaker=None, **kwargs):
 
+    for attempt in range(RETRY_ATTEMPTS):
 
-    if warning.startswith(
-        "short_warning_"
-    ):
+        # 시간 예산이 없으면 확인 요청 자리도 차지하지 않음
+        remaining = get_deadline_remaining()
 
-        return "SHORT"
+        if remaining is not None and remaining <= 0:
 
+            return None
 
-    return ""
+        allowed = (
+            breaker.allow()
+            if breaker is not None
+            else True
+        )
 
+        if not allowed:
 
-# =========================================================
-# OKX 1H + 4H EMA
-# =========================================================
+            return None
 
-def get_okx_ema(
-    inst_id
-):
+        try:
 
-    df1h = get_okx_ohlcv(
-        inst_id,
-        "1H",
-        200
-    )
+            wait = 0.0
 
-    df4h = get_okx_ohlcv(
-        inst_id,
-        "4H",
-        200
-    )
+            if limiter is not None:
 
+                wait = await limiter.acquire_async(
+                    max_wait=remaining
+                )
 
-    warning = check_1h_warning(
-        df1h,
-        df4h,
-        "c"
-    )
+                if wait is None:
 
+                    return None
 
-    breakout = check_1h_breakout_warning(
-        df1h,
-        df4h,
-        "c"
-    )
+            remaining = get_deadline_remaining()
 
+            if remaining is None:
 
-    signal = get_trade_signal(
-        warning,
-        breakout
-    )
+                result = await func(
+                    *args,
+                    **kwargs
+                )
 
+            else:
 
-    return {
+                result = await asyncio.wait_for(
+                    func(
+                        *args,
+                        **kwargs
+                    ),
+                    max(remaining, 0.001)
+                )
 
-        "1h_10_20":
-            check_ema_10_20(
-                df1h,
-                "c"
-            ),
+            if hasattr(result, "status_code"):
 
-        "1h_20_60_120":
-            check_ema(
-                df1h,
-                "c"
-            ),
+                if limiter is not None:
 
-        "4h_10_20":
-            check_ema_10_20(
-                df4h,
-                "c"
-            ),
+                    limiter.observe(result)
 
-        "4h_20_60_120":
-            check_ema(
-                df4h,
-                "c"
-            ),
+                if result.status_code == 429:
 
-        "warning":
-            warning,
+                    if limiter is not None:
 
-        "breakout":
-            breakout,
+                        limiter.penalize()
 
-        "signal":
-            signal
+                    else:
 
-    }
+                        await asyncio.sleep(1)
 
+                    continue
 
-# =========================================================
-# 업비트 1H + 4H EMA
-# =========================================================
+                if result.status_code >= 500:
 
-def get_upbit_ema(
-    market
-):
+                    raise Exception(
+                        f"HTTP {result.status_code}"
+                    )
 
-    df1h = get_upbit_ohlcv(
-        market,
-        60,
-        200
-    )
+                result.rate_limit_wait = wait
 
-    df4h = get_upbit_4h_ohlcv(
-        market,
-        200
-    )
+            if breaker is not None:
 
+                breaker.record(True)
 
-    warning = check_1h_warning(
-        df1h,
-        df4h,
-        "trade_price"
-    )
+            return result
 
+        except Exception as e:
 
-    breakout = check_1h_breakout_warning(
-        df1h,
-        df4h,
-        "trade_price"
-    )
+            if breaker is not None:
 
+                breaker.record(False)
 
-    signal = get_trade_signal(
-        warning,
-        breakout
-    )
+            logging.error(
+                f"API 실패 {attempt + 1}/{RETRY_ATTEMPTS} : {e}"
+            )
 
+            if attempt + 1 < RETRY_ATTEMPTS:
 
-    return {
+                delay = get_retry_delay(attempt)
 
-        "1h_10_20":
-            check_ema_10_20(
-                df1h,
-                "trade_price"
-            ),
+                remaining = get_deadline_remaining()
 
-        "1h_20_60_120":
-            check_ema(
-                df1h,
-                "trade_price"
-            ),
+                if remaining is not None and delay >= remaining:
 
-        "4h_10_20":
-            check_ema_10_20(
-                df4h,
-                "trade_price"
-            ),
+                    return None
 
-        "4h_20_60_120":
-            check_ema(
-                df4h,
-                "trade_price"
-            ),
+                await asyncio.sleep(delay)
 
-        "warning":
-            warning,
+        finally:
 
-        "breakout":
-            breakout,
+            # 429 / 시간 예산 초과로 끝난 확인 요청 반납
+            if allowed == "probe":
 
-        "signal":
-            signal
+                breaker.release()
 
-    }
+    return None
 
 
 # =========================================================
-# OKX 24시간 거래대금
+# 비동기 실행
+#
+# 프로세스 수명 동안 유지되는 수집 전용 이벤트 루프 (스레드 1개)
+# 루프마다 비동기 클라이언트 1개를 계속 써서 주기마다 연결 재사용
+# 호출 스레드의 컨텍스트 (시간 예산) 는 작업으로 전달
 # =========================================================
 
-def get_okx_volume(
-    inst_id
-):
-
-    df = get_okx_ohlcv(
-        inst_id,
-        "1H",
-        24
-    )
+async_loop = None
 
-    if df is None:
+async_loop_lock = threading.Lock()
 
-        return 0
 
-    return df[
-        "volCcyQuote"
-    ].sum()
+def get_async_loop():
 
+    global async_loop
 
-# =========================================================
-# 업비트 24시간 거래대금
-# =========================================================
+    with async_loop_lock:
 
-def get_upbit_volume_map():
+        if async_loop is None or async_loop.is_closed():
 
-    markets = get_upbit_markets()
+            async_loop = asyncio.new_event_loop()
 
-    if not markets:
+            threading.Thread(
+                target=async_loop.run_forever,
+                daemon=True
+            ).start()
 
-        return {}
+        return async_loop
 
-    response = retry_request(
-        requests.get,
-        "https://api.upbit.com/v1/ticker?markets="
-        +
-        ",".join(markets)
-    )
 
-    if response is None:
+def run_async(coro):
 
-        return {}
+    return asyncio.run_coroutine_threadsafe(
+        coro,
+        get_async_loop()
+    ).result()
 
-    try:
 
-        return {
-
-            x["market"]:
-            x["acc_trade_price_24h"]
-
-            for x in response.json()
-
-        }
+# =========================================================
+# HTTP 전송
+#
+# 거래소 호스트마다 keep-alive 세션 1개
+# 연결 재사용으로 요청마다 TCP + TLS 핸드셰이크 제거
+# =========================================================
 
-    except Exception as e:
+HTTP_HEADERS = {
 
-        logging.error(
-            f"업비트 거래대금 오류:{e}"
-        )
+    "Accept":
+        "application/json",
 
-        return {}
+    "Accept-Encoding":
+        "gzip, deflate"
 
+}
 
-# =========================================================
-# OKX 변동률
-# =========================================================
+http_sessions = {}
 
-def get_okx_change(
-    inst_id
-):
+http_sessions_lock = threading.Lock()
 
-    df = get_okx_ohlcv(
-        inst_id,
-        "1H",
-        120
-    )
+# 비동기 클라이언트 호스트별 요청 / 신규 연결 수
+async_transport_stats = {}
 
-    if df is None or len(df) < 50:
+# 이벤트 루프별 비동기 클라이언트 (루프 수명 동안 유지)
+async_clients = {}
 
-        return None
 
-    df = df.copy()
+def get_http_session(
+    host
+):
 
-    df["datetime"] = (
-        pd.to_datetime(
-            df["ts"],
-            unit="ms"
-        )
-        +
-        pd.Timedelta(hours=9)
-    )
+    with http_sessions_lock:
 
-    df.set_index(
-        "datetime",
-        inplace=True
-    )
+        session = http_sessions.get(host)
 
-    daily = (
-        df["c"]
-        .resample(
-            "1D",
-            offset="9h"
-        )
-        .last()
-    )
+        if session is None:
 
-    if len(daily) < 5:
+            session = requests.Session()
 
-        return None
+            session.mount(
+                "https://",
+                requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=HTTP_POOL_SIZE
+                )
+            )
 
-    result = []
+            session.headers.update(
+                HTTP_HEADERS
+            )
 
-    for i in [-1, -2, -3]:
+            http_sessions[host] = session
 
-        if daily.iloc[i - 1] == 0:
+        return session
 
-            result.append(0)
 
-            continue
+def http_get(
+    url
+):
 
-        change = (
-            (
-                daily.iloc[i]
-                -
-                daily.iloc[i - 1]
-            )
-            /
-            daily.iloc[i - 1]
-            *
-            100
-        )
+    session = get_http_session(
+        urlparse(url).netloc
+    )
 
-        result.append(
-            round(change, 2)
+    return retry_request(
+        session.get,
+        url,
+        limiter=get_rate_limiter(url),
+        breaker=get_circuit_breaker(url),
+        timeout=(
+            HTTP_CONNECT_TIMEOUT,
+            HTTP_READ_TIMEOUT
         )
-
-    return result
+    )
 
 
 # =========================================================
-# 업비트 변동률
+# HTTP 전송 (비동기)
+#
+# 신규 연결은 httpcore trace 이벤트로 집계
 # =========================================================
 
-def get_upbit_change(
-    market
+def count_async_transport(
+    host,
+    key
 ):
 
-    df = get_upbit_ohlcv(
-        market,
-        60,
-        120
+    stats = async_transport_stats.setdefault(
+        host,
+        {
+            "requests": 0,
+            "connections": 0
+        }
     )
 
-    if df is None or len(df) < 50:
+    stats[key] += 1
 
-        return None
 
-    df = df.copy()
+async def trace_async_request(
+    request
+):
 
-    df["datetime"] = pd.to_datetime(
-        df["candle_date_time_kst"]
-    )
+    host = request.url.netloc.decode()
 
-    df.set_index(
-        "datetime",
-        inplace=True
+    count_async_transport(
+        host,
+        "requests"
     )
 
-    daily = (
-        df["trade_price"]
-        .resample(
-            "1D",
-            offset="9h"
-        )
-        .last()
+    async def trace(
+        event_name,
+        info
+    ):
+
+        if event_name == "connection.connect_tcp.complete":
+
+            count_async_transport(
+                host,
+                "connections"
+            )
+
+    request.extensions["trace"] = trace
+
+
+def create_async_client(
+    concurrency
+):
+
+    return httpx.AsyncClient(
+        headers=HTTP_HEADERS,
+        timeout=httpx.Timeout(
+            HTTP_READ_TIMEOUT,
+            connect=HTTP_CONNECT_TIMEOUT
+        ),
+        limits=httpx.Limits(
+            max_connections=concurrency,
+            max_keepalive_connections=concurrency
+        ),
+        event_hooks={
+            "request": [
+                trace_async_request
+            ]
+        }
     )
 
-    if len(daily) < 5:
 
-        return None
+# 클라이언트 연결은 만든 루프에서만 쓸 수 있어 루프별로 보관
+# 닫힌 루프의 클라이언트는 다음 호출 때 정리
+def get_async_client():
 
-    result = []
+    loop = asyncio.get_running_loop()
 
-    for i in [-1, -2, -3]:
+    for other in list(async_clients):
 
-        if daily.iloc[i - 1] == 0:
+        if other.is_closed():
 
-            result.append(0)
+            del async_clients[other]
 
-            continue
+    client = async_clients.get(loop)
 
-        change = (
-            (
-                daily.iloc[i]
-                -
-                daily.iloc[i - 1]
-            )
-            /
-            daily.iloc[i - 1]
-            *
-            100
-        )
+    if client is None or client.is_closed:
 
-        result.append(
-            round(change, 2)
+        client = create_async_client(
+            OKX_FETCH_CONCURRENCY
         )
 
-    return result
+        async_clients[loop] = client
+
+    return client
 
 
 # =========================================================
-# 변동률 표시
+# 연결 재사용 통계
 # =========================================================
 
-def format_change(
-    changes
-):
-
-    if changes is None or len(changes) == 0:
+def get_transport_stats():
 
-        return "N/A"
+    stats = {}
 
-    x = changes[0]
+    with http_sessions_lock:
 
-    if x > 0:
+        sessions = list(
+            http_sessions.items()
+        )
 
-        color = "🟩"
-        sign = "+"
+    for host, session in sessions:
 
-    elif x < 0:
+        pools = (
+            session
+            .get_adapter("https://")
+            .poolmanager
+            .pools
+        )
 
-        color = "🟥"
-        sign = ""
+        requests_count = 0
+        connections = 0
 
-    else:
+        for key in pools.keys():
 
-        color = "⬜️"
-        sign = ""
+            pool = pools[key]
 
-    return f"""
-    <span class="change-item">
+            requests_count += pool.num_requests
+            connections += pool.num_connections
 
-        <span class="change-icon">
-            {color}
-        </span>
+        stats[host] = {
+            "requests": requests_count,
+            "connections": connections
+        }
 
-        <span class="change-value">
-            {sign}{x:.2f}%
-        </span>
+    for host, async_stats in list(
+        async_transport_stats.items()
+    ):
 
-    </span>
-    """
+        host_stats = stats.setdefault(
+            host,
+            {
+                "requests": 0,
+                "connections": 0
+            }
+        )
 
+        host_stats["requests"] += async_stats["requests"]
+        host_stats["connections"] += async_stats["connections"]
 
-# =========================================================
-# 눌림 경고 HTML
-# =========================================================
+    for host_stats in stats.values():
 
-def warning_html(
-    warning
-):
+        if host_stats["requests"] == 0:
 
-    if warning.startswith(
-        "long_warning_"
-    ):
+            host_stats["reuse_ratio"] = 0
 
-        try:
+            continue
 
-            count = int(
-                warning.split("_")[-1]
-            )
+        host_stats["reuse_ratio"] = round(
+            1
+            -
+            host_stats["connections"]
+            /
+            host_stats["requests"],
+            4
+        )
 
-        except:
+    return stats
 
-            count = 0
 
-        return f"🚀({count})"
+# =========================================================
+# 캔들 캐시
+#
+# 주기 안에서 (거래소, 심볼, 시간봉) 당 1회만 조회
+# 가장 큰 요청 개수로 한 번 받아 앞부분을 잘라서 제공
+# 같은 키 동시 요청은 진행 중인 조회 1개를 공유
+#
+# 원본 응답(최신순 리스트)을 보관하므로
+# 잘라낸 결과는 limit 만큼 직접 요청한 것과 동일
+# =========================================================
 
+# 주기 안에서 요청되는 최대 캔들 수 (EMA 시드 + 진행 중 캔들)
+CANDLE_FETCH_LIMITS = {
+    ("okx", "1H"): EMA_SEED_DEPTH + 1,
+    ("okx", "4H"): EMA_SEED_DEPTH + 1,
+    ("upbit", 60): EMA_SEED_DEPTH + 1,
+    ("upbit", 240): EMA_SEED_DEPTH + 1
+}
 
-    elif warning.startswith(
-        "short_warning_"
-    ):
 
-        try:
+class CandleCache:
 
-            count = int(
-                warning.split("_")[-1]
-            )
+    def __init__(self):
 
-        except:
+        self.active = set()
 
-            count = 0
+        self.entries = {}
 
-        return f"🚨({count})"
+        self.inflight = {}
 
+        self.lock = threading.Lock()
 
-    return ""
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
 
+    @contextlib.contextmanager
+    def cycle(
+        self,
+        exchange
+    ):
 
-# =========================================================
-# 돌파 경고 HTML
-#
-# ★ 4H EMA 10-20 지속 캔들 수
-# =========================================================
+        with self.lock:
 
-def breakout_html(
-    breakout
-):
+            self.active.add(exchange)
 
-    if breakout.startswith(
-        "long_breakout_"
-    ):
+            self.clear(exchange)
 
         try:
 
-            count = int(
-                breakout.split("_")[-1]
-            )
+            yield
 
-        except:
+        finally:
 
-            count = 0
+            with self.lock:
 
-        return f"⚡({count})"
+                self.active.discard(exchange)
 
+                self.clear(exchange)
 
-    elif breakout.startswith(
-        "short_breakout_"
+    def clear(
+        self,
+        exchange
     ):
 
-        try:
+        for key in [
+            key
+            for key in self.entries
+            if key[0] == exchange
+        ]:
+
+            del self.entries[key]
+
+    def get(
+        self,
+        exchange,
+        symbol,
+        timeframe,
+        limit,
+        loader
+    ):
 
-            count = int(
-                breakout.split("_")[-1]
-            )
+        key = (
+            exchange,
+            symbol,
+            timeframe
+        )
 
-        except:
+        while True:
 
-            count = 0
+            with self.lock:
 
-        return f"💥({count})"
+                if exchange not in self.active:
 
+                    break
 
-    return ""
+                entry = self.entries.get(key)
 
+                if entry is not None and entry[0] >= limit:
 
-# =========================================================
-# LONG / SHORT HTML
-# 경고가 있을 때만 표시
-# =========================================================
+                    self.hits += 1
 
-def signal_html(
-    signal
-):
+                    data = entry[1]
 
-    if signal == "LONG":
+                    return data[:limit] if data else data
 
-        return """
-        <span class="signal long-signal">
-            LONG
-        </span>
-        """
+                event = self.inflight.get(key)
 
-    elif signal == "SHORT":
+                if event is None:
 
-        return """
-        <span class="signal short-signal">
-            SHORT
-        </span>
-        """
+                    event = threading.Event()
 
-    return ""
+                    self.inflight[key] = event
 
+                    self.misses += 1
 
-# =========================================================
-# EMA HTML
-# =========================================================
+                    break
 
-def ema_html(
-    ema
-):
+                self.coalesced += 1
 
-    warning = warning_html(
-        ema["warning"]
-    )
+            event.wait()
 
-    breakout = breakout_html(
-        ema["breakout"]
-    )
+        if exchange not in self.active:
 
-    signal = signal_html(
-        ema["signal"]
-    )
+            return loader(limit)
 
+        fetch_limit = max(
+            limit,
+            CANDLE_FETCH_LIMITS.get(
+                (exchange, timeframe),
+                limit
+            )
+        )
 
-    return f"""
+        data = None
 
-<div class="ema-display">
+        try:
 
+            data = loader(fetch_limit)
 
-    <!-- LONG / SHORT -->
+        finally:
 
-    <div class="signal-period">
+            with self.lock:
 
-        {signal}
+                if exchange in self.active:
 
-    </div>
+                    self.entries[key] = (
+                        fetch_limit,
+                        data
+                    )
 
+                del self.inflight[key]
 
-    <!-- 돌파 -->
+            event.set()
 
-    <div class="ema-period breakout-period">
+        return data[:limit] if data else data
 
-        <span class="ema-warning breakout-warning">
-            {breakout}
-        </span>
+    def stats(self):
 
-    </div>
+        with self.lock:
 
+            return {
 
-    <!-- 1H -->
+                "hits":
+                    self.hits,
 
-    <div class="ema-period">
+                "misses":
+                    self.misses,
 
-        <span class="ema-warning warning-size">
-            {warning}
-        </span>
+                "coalesced":
+                    self.coalesced
 
-        <span class="ema-time">
-            1H
-        </span>
+            }
 
-        <span class="ema-status">
-            {ema["1h_10_20"]}
-        </span>
 
-        <span class="ema-status">
-            {ema["1h_20_60_120"]}
-        </span>
+candle_cache = CandleCache()
 
-    </div>
 
+# =========================================================
+# 캔들 저장소
+#
+# (거래소, 심볼, 시간봉) 별 확정 캔들 버퍼
+# 첫 조회만 전체 수집, 이후 마지막 확정 캔들 이후분만 조회
+# OKX   : before (이후) / after (이전 페이지)
+# 업비트 : 최신 N개 조회 후 병합 / to (이전 페이지)
+#
+# 가져온 페이지가 가득 찼는데 마지막 확정 캔들과 이어지지 않으면
+# 누락 구간으로 보고 전체 재수집
+#
+# 원본 응답 행을 그대로 보관하므로
+# 읽기 결과는 같은 limit 로 직접 요청한 것과 같은 형태
+# (최신순, 진행 중 캔들 포함)
+# =========================================================
 
-    <!-- 4H -->
+CANDLE_STORE_DEPTH = EMA_SEED_DEPTH
 
-    <div class="ema-period last">
+CANDLE_INTERVALS = {
+    ("okx", "1H"): 3_600_000,
+    ("okx", "4H"): 14_400_000,
+    ("upbit", 60): 3_600_000,
+    ("upbit", 240): 14_400_000
+}
 
-        <span class="ema-time">
-            4H
-        </span>
+# 요청 1회 최대 캔들 수
+CANDLE_PAGE_SIZE = {
+    "okx": 300,
+    "upbit": 200
+}
 
-        <span class="ema-status">
-            {ema["4h_10_20"]}
-        </span>
 
-        <span class="ema-status">
-            {ema["4h_20_60_120"]}
-        </span>
+def get_candle_ts(
+    exchange,
+    row
+):
 
-    </div>
+    if exchange == "okx":
 
+        return int(row[0])
 
-</div>
+    return int(
+        datetime.fromisoformat(
+            row["candle_date_time_utc"]
+        ).replace(
+            tzinfo=timezone.utc
+        ).timestamp()
+        *
+        1000
+    )
 
-"""
 
+def confirm_candle(
+    exchange,
+    row
+):
 
-# =========================================================
-# OKX TOP30
-# =========================================================
+    if exchange == "okx":
 
-def update_okx():
+        return list(row[:8]) + ["1"] + list(row[9:])
 
-    global latest_okx_data
+    return row
 
-    logging.info(
-        "OKX TOP30 시작"
+
+def is_candle_confirmed(
+    exchange,
+    row,
+    interval
+):
+
+    if exchange == "okx":
+
+        return str(row[8]) == "1"
+
+    return (
+        get_candle_ts(exchange, row)
+        +
+        interval
+        <=
+        time.time() * 1000
     )
 
-    symbols = get_all_okx_swap_symbols()
 
-    usdt_krw = get_usdt_krw()
+def fetch_candle_page(
+    exchange,
+    symbol,
+    timeframe,
+    count,
+    older_than=None,
+    newer_than=None
+):
 
-    upbit_coin_set = {
+    if exchange == "okx":
 
-        market.replace(
-            "KRW-",
-            ""
+        return fetch_okx_candle_data(
+            symbol,
+            timeframe,
+            count,
+            after=older_than,
+            before=newer_than
         )
 
-        for market in get_upbit_markets()
+    to = None
 
-    }
+    if older_than is not None:
 
-    volume_map = {}
+        to = datetime.fromtimestamp(
+            older_than / 1000,
+            timezone.utc
+        ).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"
+        )
 
+    return fetch_upbit_candle_data(
+        symbol,
+        timeframe,
+        count,
+        to
+    )
 
-    for symbol in symbols:
 
-        volume_map[symbol] = (
-            get_okx_volume(symbol)
-            *
-            usdt_krw
-            /
-            10
+class CandleBuffer:
+
+    def __init__(
+        self,
+        exchange,
+        symbol,
+        timeframe
+    ):
+
+        self.exchange = exchange
+
+        self.symbol = symbol
+
+        self.timeframe = timeframe
+
+        self.interval = CANDLE_INTERVALS[
+            (exchange, timeframe)
+        ]
+
+        self.depth = CANDLE_STORE_DEPTH
+
+        # 확정 캔들 (오래된 순)
+        self.rows = []
+
+        # 진행 중 캔들
+        self.live = None
+
+        # 웹소켓으로 갱신 중이면 REST 조회 생략
+        self.streaming = False
+
+        # 확정 캔들을 통째로 바꾼 횟수 (전체 수집 / 복원)
+        # 증분 EMA 상태는 값이 바뀌면 다시 시드 (더 깊게 다시 수집한 경우 포함)
+        self.generation = 0
+
+        self.lock = threading.Lock()
+
+    def last_ts(self):
+
+        return get_candle_ts(
+            self.exchange,
+            self.rows[-1]
         )
 
+    # 최신순 응답 행 병합
+    def merge(
+        self,
+        data
+    ):
 
-    top30 = sorted(
-        volume_map,
-        key=volume_map.get,
-        reverse=True
-    )[:30]
+        last_ts = self.last_ts() if self.rows else -1
 
+        self.live = None
 
-    rows = []
+        for row in reversed(data):
 
-    rank = 1
+            ts = get_candle_ts(
+                self.exchange,
+                row
+            )
 
+            if ts <= last_ts:
 
-    for symbol in top30:
+                continue
 
-        coin = symbol.replace(
-            "-USDT-SWAP",
-            ""
+            if is_candle_confirmed(
+                self.exchange,
+                row,
+                self.interval
+            ):
+
+                self.rows.append(row)
+
+                last_ts = ts
+
+            else:
+
+                self.live = row
+
+        self.rows = self.rows[
+            -self.depth:
+        ]
+
+    def newest(
+        self,
+        limit
+    ):
+
+        rows = self.rows[::-1]
+
+        if self.live is not None:
+
+            rows = [self.live] + rows
+
+        return rows[:limit]
+
+
+class CandleStore:
+
+    def __init__(self):
+
+        self.buffers = {}
+
+        self.lock = threading.Lock()
+
+        self.refills = 0
+        self.deltas = 0
+        self.gaps = 0
+
+    def get_buffer(
+        self,
+        exchange,
+        symbol,
+        timeframe
+    ):
+
+        key = (
+            exchange,
+            symbol,
+            timeframe
         )
 
+        with self.lock:
 
-        if coin in upbit_coin_set:
+            buffer = self.buffers.get(key)
 
-            coin = f"{coin}(업비트)"
+            if buffer is None:
 
+                buffer = CandleBuffer(
+                    exchange,
+                    symbol,
+                    timeframe
+                )
 
-        changes = get_okx_change(
-            symbol
+                self.buffers[key] = buffer
+
+            return buffer
+
+    # 최신순 limit 개 반환, 실패 시 None
+    def sync(
+        self,
+        exchange,
+        symbol,
+        timeframe,
+        limit
+    ):
+
+        buffer = self.get_buffer(
+            exchange,
+            symbol,
+            timeframe
         )
 
+        with buffer.lock:
 
-        ema = get_okx_ema(
-            symbol
+            # 첫 수집은 요청 깊이만큼, 더 깊이 요청하면 다시 수집
+            # 다시 수집이 실패하면 기존 캔들 / 깊이 유지 (다음 요청 때 재시도)
+            if limit > buffer.depth or not buffer.rows:
+
+                depth = buffer.depth
+
+                buffer.depth = limit
+
+                ok = self.refill(buffer)
+
+                if not ok and buffer.rows:
+
+                    buffer.depth = depth
+
+            elif buffer.streaming:
+
+                return buffer.newest(limit)
+
+            else:
+
+                ok = self.update(buffer)
+
+            if not ok:
+
+                return None
+
+            return buffer.newest(limit)
+
+    # 전체 수집 (페이지 단위로 과거까지)
+    def refill(
+        self,
+        buffer
+    ):
+
+        page_size = CANDLE_PAGE_SIZE[
+            buffer.exchange
+        ]
+
+        data = []
+
+        while len(data) < buffer.depth:
+
+            count = min(
+                page_size,
+                buffer.depth - len(data)
+            )
+
+            page = fetch_candle_page(
+                buffer.exchange,
+                buffer.symbol,
+                buffer.timeframe,
+                count,
+                older_than=(
+                    get_candle_ts(
+                        buffer.exchange,
+                        data[-1]
+                    )
+                    if data else None
+                )
+            )
+
+            if page is None:
+
+                return False
+
+            data.extend(page)
+
+            if len(page) < count:
+
+                break
+
+        with self.lock:
+
+            self.refills += 1
+
+        buffer.rows = []
+
+        buffer.merge(data)
+
+        buffer.generation += 1
+
+        return True
+
+    # 마지막 확정 캔들 이후분만 조회
+    def update(
+        self,
+        buffer
+    ):
+
+        last_ts = buffer.last_ts()
+
+        missing = int(
+            (time.time() * 1000 - last_ts)
+            //
+            buffer.interval
+        )
+
+        count = min(
+            CANDLE_PAGE_SIZE[buffer.exchange],
+            max(missing, 1) + 1
+        )
+
+        page = fetch_candle_page(
+            buffer.exchange,
+            buffer.symbol,
+            buffer.timeframe,
+            count,
+            newer_than=last_ts
         )
 
+        if page is None:
 
-        rows.append({
+            return False
 
-            "rank":
-                rank,
+        if (
+            len(page) >= count
+            and
+            min(
+                get_candle_ts(buffer.exchange, row)
+                for row in page
+            )
+            >
+            last_ts + buffer.interval
+        ):
 
-            "name":
-                coin,
+            logging.info(
+                f"캔들 누락 {buffer.exchange} "
+                f"{buffer.symbol} {buffer.timeframe} → 전체 재수집"
+            )
 
-            "change":
-                format_change(
-                    changes
-                ),
+            with self.lock:
 
-            "volume":
-                format_volume(
-                    volume_map[symbol]
-                ),
+                self.gaps += 1
 
-            "ema":
-                ema
+            return self.refill(buffer)
 
-        })
+        with self.lock:
 
+            self.deltas += 1
 
-        rank += 1
+        buffer.merge(page)
 
+        return True
 
-    latest_okx_data = rows
+    # 웹소켓 캔들 반영, 캔들이 마감되면 True
+    def apply_stream(
+        self,
+        exchange,
+        symbol,
+        timeframe,
+        row
+    ):
 
+        buffer = self.get_buffer(
+            exchange,
+            symbol,
+            timeframe
+        )
 
-    logging.info(
-        "OKX 완료"
-    )
+        with buffer.lock:
+
+            # REST 전체 수집 전에는 반영하지 않음
+            if not buffer.rows:
+
+                return False
+
+            last_ts = buffer.last_ts()
+
+            previous_live = buffer.live
+
+            # 다음 캔들이 시작되면 이전 캔들 마감
+            # OKX confirm=1 메시지를 놓친 경우도 확정으로 표시해 빈 구간 방지
+            if (
+                previous_live is not None
+                and
+                get_candle_ts(exchange, previous_live) > last_ts
+                and
+                get_candle_ts(exchange, row)
+                >
+                get_candle_ts(exchange, previous_live)
+            ):
+
+                buffer.rows.append(
+                    confirm_candle(
+                        exchange,
+                        previous_live
+                    )
+                )
+
+            buffer.merge([row])
+
+            # 지난 캔들이 들어와도 진행 중 캔들 유지
+            if (
+                buffer.live is None
+                and
+                previous_live is not None
+                and
+                get_candle_ts(exchange, previous_live)
+                >
+                buffer.last_ts()
+            ):
+
+                buffer.live = previous_live
+
+            return buffer.last_ts() > last_ts
+
+    def get_generation(
+        self,
+        exchange,
+        symbol,
+        timeframe
+    ):
+
+        buffer = self.get_buffer(
+            exchange,
+            symbol,
+            timeframe
+        )
+
+        with buffer.lock:
+
+            return buffer.generation
+
+    # after_ts 이후 확정 캔들 (오래된 순), 이어짐 여부, 진행 중 캔들
+    # after_ts 가 버퍼 범위 밖이면 전체 확정 캔들과 False 반환
+    def read_since(
+        self,
+        exchange,
+        symbol,
+        timeframe,
+        after_ts
+    ):
+
+        buffer = self.get_buffer(
+            exchange,
+            symbol,
+            timeframe
+        )
+
+        with buffer.lock:
+
+            rows = buffer.rows
+
+            if not rows:
+
+                return [], True, buffer.live
+
+            i = len(rows)
+
+            while (
+                i > 0
+                and
+                (
+                    after_ts is None
+                    or
+                    get_candle_ts(exchange, rows[i - 1]) > after_ts
+                )
+            ):
+
+                i -= 1
+
+            return rows[i:], i > 0, buffer.live
+
+    # 디스크 캐시에서 확정 캔들 복원
+    # depth / generation : 저장할 때의 값 (없으면 캔들 수 기준 / +1)
+    # 같은 프로세스에서 다시 복원해도 generation 은 항상 증가
+    def restore(
+        self,
+        exchange,
+        symbol,
+        timeframe,
+        rows,
+        depth=None,
+        generation=None
+    ):
+
+        buffer = self.get_buffer(
+            exchange,
+            symbol,
+            timeframe
+        )
+
+        with buffer.lock:
+
+            buffer.depth = (
+                depth
+                if depth is not None
+                else max(buffer.depth, len(rows))
+            )
+
+            buffer.rows = rows
+
+            buffer.live = None
+
+            buffer.generation = max(
+                buffer.generation + 1,
+                generation or 0
+            )
+
+    def export(self):
+
+        with self.lock:
+
+            buffers = list(
+                self.buffers.values()
+            )
+
+        result = []
+
+        for buffer in buffers:
+
+            with buffer.lock:
+
+                if buffer.rows:
+
+                    result.append((
+                        buffer.exchange,
+                        buffer.symbol,
+                        buffer.timeframe,
+                        list(buffer.rows),
+                        buffer.depth,
+                        buffer.generation
+                    ))
+
+        return result
+
+    def set_streaming(
+        self,
+        exchange,
+        symbols,
+        streaming
+    ):
+
+        with self.lock:
+
+            buffers = [
+                buffer
+                for key, buffer in self.buffers.items()
+                if key[0] == exchange and key[1] in symbols
+            ]
+
+        for buffer in buffers:
+
+            buffer.streaming = streaming
+
+    def stats(self):
+
+        with self.lock:
+
+            return {
+
+                "buffers":
+                    len(self.buffers),
+
+                "refills":
+                    self.refills,
+
+                "deltas":
+                    self.deltas,
+
+                "gaps":
+                    self.gaps
+
+            }
+
+
+candle_store = CandleStore()
 
 
 # =========================================================
-# 업비트 TOP30
+# OKX 캔들
+# 미완성 캔들 제외
 # =========================================================
 
-def update_upbit():
-
-    global latest_upbit_data
+def get_okx_candles_url(
+    inst_id,
+    bar,
+    limit,
+    after=None,
+    before=None
+):
 
-    logging.info(
-        "업비트 TOP30 시작"
+    url = (
+        "https://www.okx.com/api/v5/market/candles"
+        f"?instId={inst_id}"
+        f"&bar={bar}"
+        f"&limit={limit}"
     )
 
-    volume_map = get_upbit_volume_map()
+    # after : 이전 캔들 페이지 / before : 이후 캔들만
+    if after is not None:
 
-    if not volume_map:
+        url += f"&after={after}"
 
-        return
+    if before is not None:
 
+        url += f"&before={before}"
 
-    top30 = sorted(
-        volume_map,
-        key=volume_map.get,
-        reverse=True
-    )[:30]
+    return url
+
+
+def get_okx_ohlcv(
+    inst_id,
+    bar="1H",
+    limit=200
+):
+
+    data = candle_cache.get(
+        "okx",
+        inst_id,
+        bar,
+        limit,
+        lambda count: candle_store.sync(
+            "okx",
+            inst_id,
+            bar,
+            count
+        )
+    )
+
+    return parse_okx_ohlcv(
+        inst_id,
+        data
+    )
+
+
+def fetch_okx_candle_data(
+    inst_id,
+    bar,
+    limit,
+    after=None,
+    before=None
+):
+
+    response = http_get(
+        get_okx_candles_url(
+            inst_id,
+            bar,
+            limit,
+            after,
+            before
+        )
+    )
+
+    return read_okx_candle_data(
+        inst_id,
+        response
+    )
+
+
+def read_okx_candle_data(
+    inst_id,
+    response
+):
+
+    if response is None:
+        return None
+
+    try:
+
+        return response.json()["data"]
+
+    except Exception as e:
+
+        logging.error(
+            f"OKX 오류 {inst_id}:{e}"
+        )
+
+        return None
+
+
+def parse_okx_ohlcv(
+    inst_id,
+    data
+):
+
+    if not data:
+        return None
+
+    try:
+
+        df = pd.DataFrame(
+            data,
+            columns=[
+                "ts",
+                "o",
+                "h",
+                "l",
+                "c",
+                "vol",
+                "volCcy",
+                "volCcyQuote",
+                "confirm"
+            ]
+        )
+
+        df["c"] = df["c"].astype(float)
+
+        df["volCcyQuote"] = (
+            df["volCcyQuote"]
+            .astype(float)
+        )
+
+        # =====================================================
+        # 미완성 캔들 제외
+        # =====================================================
+
+        df = df[
+            df["confirm"].astype(str) == "1"
+        ]
+
+        if df.empty:
+            return None
+
+        df = df.iloc[::-1].reset_index(
+            drop=True
+        )
+
+        return df
+
+    except Exception as e:
+
+        logging.error(
+            f"OKX 오류 {inst_id}:{e}"
+        )
+
+        return None
+
+
+# =========================================================
+# OKX 캔들 (비동기)
+# =========================================================
+
+async def get_okx_ohlcv_async(
+    client,
+    semaphore,
+    inst_id,
+    bar="1H",
+    limit=200
+):
+
+    url = get_okx_candles_url(
+        inst_id,
+        bar,
+        limit
+    )
+
+    async with semaphore:
+
+        response = await retry_request_async(
+            client.get,
+            url,
+            limiter=get_rate_limiter(url),
+            breaker=get_circuit_breaker(url)
+        )
+
+    return parse_okx_ohlcv(
+        inst_id,
+        read_okx_candle_data(
+            inst_id,
+            response
+        )
+    )
+
+
+# =========================================================
+# 업비트 분봉
+# =========================================================
+
+def fetch_upbit_candle_data(
+    market,
+    unit,
+    count,
+    to=None
+):
+
+    url = (
+        "https://api.upbit.com/v1/candles/minutes/"
+        f"{unit}"
+        f"?market={market}"
+        f"&count={count}"
+    )
+
+    # to : 해당 시각(UTC) 이전 캔들 페이지
+    if to is not None:
+
+        url += f"&to={to}"
+
+    response = http_get(
+        url
+    )
+
+    if response is None:
+        return None
+
+    try:
+
+        return response.json()
+
+    except Exception as e:
+
+        logging.error(
+            f"업비트 캔들 오류 {market}:{e}"
+        )
+
+        return None
+
+
+def get_upbit_candle_data(
+    market,
+    unit,
+    count
+):
+
+    return candle_cache.get(
+        "upbit",
+        market,
+        unit,
+        count,
+        lambda limit: candle_store.sync(
+            "upbit",
+            market,
+            unit,
+            limit
+        )
+    )
+
+
+def get_upbit_ohlcv(
+    market,
+    unit=60,
+    count=200
+):
+
+    data = get_upbit_candle_data(
+        market,
+        unit,
+        count
+    )
+
+    if not data:
+        return None
+
+    try:
+
+        df = pd.DataFrame(data)
+
+        df = df.iloc[::-1].reset_index(
+            drop=True
+        )
+
+        df["trade_price"] = (
+            df["trade_price"]
+            .astype(float)
+        )
+
+        return df
+
+    except Exception as e:
+
+        logging.error(
+            f"업비트 캔들 오류 {market}:{e}"
+        )
+
+        return None
+
+
+# =========================================================
+# 업비트 일봉
+# =========================================================
+
+def get_upbit_day_ohlcv(
+    market,
+    count=200
+):
+
+    url = (
+        "https://api.upbit.com/v1/candles/days"
+        f"?market={market}"
+        f"&count={count}"
+    )
+
+    response = http_get(
+        url
+    )
+
+    if response is None:
+        return None
+
+    try:
+
+        data = response.json()
+
+        if not data:
+            return None
+
+        df = pd.DataFrame(data)
+
+        df = df.iloc[::-1].reset_index(
+            drop=True
+        )
+
+        df["trade_price"] = (
+            df["trade_price"]
+            .astype(float)
+        )
+
+        return df
+
+    except Exception as e:
+
+        logging.error(
+            f"업비트 일봉 오류 {market}:{e}"
+        )
+
+        return None
+
+
+# =========================================================
+# OKX 목록
+# =========================================================
+
+def get_all_okx_swap_symbols():
+
+    url = (
+        "https://www.okx.com/api/v5/"
+        "public/instruments?instType=SWAP"
+    )
+
+    response = http_get(
+        url
+    )
+
+    if response is None:
+        return []
+
+    try:
+
+        return [
+            x["instId"]
+            for x in response.json()["data"]
+            if (
+                x["instId"].endswith("-USDT-SWAP")
+                and
+                x.get("state") == "live"
+            )
+        ]
+
+    except Exception as e:
+
+        logging.error(
+            f"OKX 목록 오류:{e}"
+        )
+
+        return []
+
+
+# =========================================================
+# 업비트 목록
+# =========================================================
+
+def get_upbit_markets():
+
+    response = http_get(
+        "https://api.upbit.com/v1/market/all"
+    )
+
+    if response is None:
+        return []
+
+    try:
+
+        return [
+            x["market"]
+            for x in response.json()
+            if x["market"].startswith("KRW-")
+        ]
+
+    except Exception as e:
+
+        logging.error(
+            f"업비트 목록 오류:{e}"
+        )
+
+        return []
+
+
+# =========================================================
+# USDT/KRW
+# =========================================================
+
+def get_usdt_krw():
+
+    response = http_get(
+        "https://api.upbit.com/v1/ticker?markets=KRW-USDT"
+    )
+
+    if response is None:
+        return 1400
+
+    try:
+
+        return float(
+            response.json()[0]["trade_price"]
+        )
+
+    except:
+
+        return 1400
+
+
+# =========================================================
+# 업비트 기준값 (OKX 작업용)
+#
+# 업비트 수집이 거래대금 조회 결과로 환율 / 마켓 목록을 갱신
+# OKX 작업은 마지막 값을 읽고 오래되면 stale 로 표시
+# 업비트 수집 전 (또는 KRW-USDT 시세가 없으면) 한 번만 직접 조회
+# =========================================================
+
+def update_upbit_reference(
+    markets,
+    usdt_krw
+):
+
+    if not markets:
+
+        return
+
+    upbit_reference.update({
+
+        "usdt_krw":
+            usdt_krw
+            if usdt_krw is not None
+            else upbit_reference["usdt_krw"],
+
+        "markets":
+            frozenset(markets),
+
+        "updated_at":
+            time.time()
+
+    })
+
+
+def is_upbit_reference_stale():
+
+    updated_at = upbit_reference["updated_at"]
+
+    return (
+        updated_at is None
+        or
+        time.time() - updated_at > UPBIT_REFERENCE_STALE_AFTER
+    )
+
+
+# (환율, 업비트 상장 코인 집합, 오래된 값 여부)
+def get_upbit_reference():
+
+    if upbit_reference["usdt_krw"] is None:
+
+        markets = (
+            upbit_reference["markets"]
+            or
+            get_upbit_markets()
+        )
+
+        if markets:
+
+            update_upbit_reference(
+                markets,
+                get_usdt_krw()
+            )
+
+    usdt_krw = upbit_reference["usdt_krw"] or 1400
+
+    coins = {
+
+        market.replace(
+            "KRW-",
+            ""
+        )
+
+        for market in upbit_reference["markets"] or ()
+
+    }
+
+    stale = is_upbit_reference_stale()
+
+    if stale:
+
+        logging.warning(
+            "업비트 환율 / 마켓 목록 오래됨 → 마지막 값 사용"
+        )
+
+    return usdt_krw, coins, stale
+
+
+# =========================================================
+# 거래대금 표시
+# =========================================================
+
+def format_volume(volume):
+
+    if volume >= 1_000_000_000_000:
+
+        return (
+            f"{volume / 1_000_000_000_000:.2f}조"
+        )
+
+    elif volume >= 100_000_000:
+
+        return (
+            f"{volume / 100_000_000:,.0f}억"
+        )
+
+    else:
+
+        return (
+            f"{volume / 10_000:,.0f}만원"
+        )
+
+
+# =========================================================
+# EMA 상태 / 연속 캔들 수 (벡터 연산)
+#
+# 상태 :  1 = long / -1 = short / 0 = none
+# 마지막 상태가 끝에서부터 몇 캔들 이어졌는지 계산
+# DataFrame 복사나 행 단위 반복 없이 EMA 배열로 처리
+# =========================================================
+
+EMA_STATE_NAMES = {
+    1: "long",
+    -1: "short",
+    0: "none"
+}
+
+
+class Trend(IntEnum):
+
+    SHORT = -1
+
+    NONE = 0
+
+    LONG = 1
+
+
+# 눌림 / 돌파 경고 없음 (방향, 지속 봉 수)
+NO_ALERT = (Trend.NONE, 0)
+
+
+def get_ema_values(
+    df,
+    column,
+    span
+):
+
+    return (
+        df[column]
+        .ewm(
+            span=span,
+            adjust=False
+        )
+        .mean()
+        .to_numpy()
+    )
+
+
+# EMA 10 > 20 : long / EMA 10 < 20 : short
+def get_ema_cross_states(
+    fast,
+    slow
+):
+
+    return np.where(
+        fast > slow,
+        1,
+        np.where(
+            fast < slow,
+            -1,
+            0
+        )
+    ).astype(np.int8)
+
+
+# EMA 20 > 60 > 120 : long / 20 < 60 < 120 : short
+def get_ema_align_states(
+    fast,
+    middle,
+    slow
+):
+
+    return np.where(
+        (fast > middle) & (middle > slow),
+        1,
+        np.where(
+            (fast < middle) & (middle < slow),
+            -1,
+            0
+        )
+    ).astype(np.int8)
+
+
+# (현재 상태, 연속 캔들 수)
+def get_state_run(
+    states
+):
+
+    state = int(states[-1])
+
+    if state == 0:
+
+        return 0, 0
+
+    changed = np.flatnonzero(
+        states != state
+    )
+
+    if len(changed) == 0:
+
+        return state, len(states)
+
+    return state, len(states) - 1 - int(changed[-1])
+
+
+def format_ema_status(
+    state,
+    count
+):
+
+    if state == 1:
+
+        return f"🟢({count})"
+
+    elif state == -1:
+
+        return f"🔴({count})"
+
+    return "⚪(0)"
+
+
+# =========================================================
+# 지표 프레임
+#
+# (심볼, 시간봉) 당 1회 생성
+# EMA 는 기간별로 한 번만 계산해 보관
+# 방향 / 상태 / 지속 캔들 수도 처음 요청 시 계산 후 재사용
+# 눌림 / 돌파 / 방향 / 상태 함수가 모두 같은 프레임을 읽음
+# =========================================================
+
+class IndicatorFrame:
+
+    def __init__(
+        self,
+        df,
+        column
+    ):
+
+        self.df = df
+
+        self.column = column
+
+        self.length = 0 if df is None else len(df)
+
+        self.emas = {}
+
+        self.states = {}
+
+        self.runs = {}
+
+    def ema(
+        self,
+        span
+    ):
+
+        if span not in self.emas:
+
+            self.emas[span] = get_ema_values(
+                self.df,
+                self.column,
+                span
+            )
+
+        return self.emas[span]
+
+    def cross_states(self):
+
+        if "10_20" not in self.states:
+
+            self.states["10_20"] = get_ema_cross_states(
+                self.ema(10),
+                self.ema(20)
+            )
+
+        return self.states["10_20"]
+
+    def align_states(self):
+
+        if "20_60_120" not in self.states:
+
+            self.states["20_60_120"] = get_ema_align_states(
+                self.ema(20),
+                self.ema(60),
+                self.ema(120)
+            )
+
+        return self.states["20_60_120"]
+
+    # (현재 상태, 연속 캔들 수)
+    def state_run(
+        self,
+        name
+    ):
+
+        if name not in self.runs:
+
+            if name == "10_20":
+
+                states = self.cross_states()
+
+            else:
+
+                states = self.align_states()
+
+            self.runs[name] = get_state_run(
+                states
+            )
+
+        return self.runs[name]
+
+    def direction_10_20(self):
+
+        if self.length < 20:
+
+            return "none"
+
+        return EMA_STATE_NAMES[
+            self.state_run("10_20")[0]
+        ]
+
+    def direction_20_60_120(self):
+
+        if self.length < 120:
+
+            return "none"
+
+        return EMA_STATE_NAMES[
+            self.state_run("20_60_120")[0]
+        ]
+
+    def count_10_20(self):
+
+        if self.length < 20:
+
+            return 0, "none"
+
+        state, count = self.state_run(
+            "10_20"
+        )
+
+        return count, EMA_STATE_NAMES[state]
+
+    # (상태, 지속 봉 수) / 봉 수 부족이면 (0, 0)
+    def run_10_20(self):
+
+        if self.length < 20:
+
+            return 0, 0
+
+        return self.state_run(
+            "10_20"
+        )
+
+    def run_20_60_120(self):
+
+        if self.length < 120:
+
+            return 0, 0
+
+        return self.state_run(
+            "20_60_120"
+        )
+
+    def status_10_20(self):
+
+        return format_ema_status(
+            *self.run_10_20()
+        )
+
+    def status_20_60_120(self):
+
+        return format_ema_status(
+            *self.run_20_60_120()
+        )
+
+
+# =========================================================
+# 일괄 EMA 계산 (심볼 × 캔들 행렬)
+#
+# 심볼별 종가를 오른쪽 정렬로 쌓아 2차원 배열 1개로 계산
+# 길이가 짧은 심볼은 앞쪽을 NaN 으로 채우고 마스크 처리
+# 반복은 캔들 수(시간축)만큼만, 심볼 축은 벡터 연산
+# → 추적 심볼이 30 → 수백 개로 늘어도 반복 횟수 동일
+#
+# EMA 식은 pandas ewm(adjust=False) 와 같은 연산 순서 사용
+# =========================================================
+
+EMA_SPANS = (
+    10,
+    20,
+    60,
+    120
+)
+
+
+# (종가 행렬, 심볼별 길이, 유효 구간 마스크)
+def build_close_matrix(
+    values_list
+):
+
+    lengths = np.array(
+        [
+            0 if values is None else len(values)
+            for values in values_list
+        ],
+        dtype=np.int64
+    )
+
+    width = int(lengths.max()) if len(lengths) else 0
+
+    matrix = np.full(
+        (len(values_list), width),
+        np.nan
+    )
+
+    for i, values in enumerate(values_list):
+
+        if lengths[i]:
+
+            matrix[i, width - lengths[i]:] = values
+
+    mask = (
+        np.arange(width)
+        >= (width - lengths)[:, None]
+    )
+
+    return matrix, lengths, mask
+
+
+# {기간: (심볼 수, 캔들 수) EMA 행렬}
+def get_batch_emas(
+    matrix,
+    spans=EMA_SPANS
+):
+
+    alpha = (
+        2.0
+        / (np.array(spans, dtype=np.float64) + 1)
+    )[:, None]
+
+    decay = 1 - alpha
+
+    result = np.full(
+        (len(spans),) + matrix.shape,
+        np.nan
+    )
+
+    ema = np.full(
+        (len(spans), matrix.shape[0]),
+        np.nan
+    )
+
+    for t in range(matrix.shape[1]):
+
+        close = matrix[:, t]
+
+        # 첫 값은 종가 그대로, 이후 가중 평균 (패딩 구간은 NaN 유지)
+        ema = np.where(
+            np.isnan(ema),
+            close,
+            (decay * ema + alpha * close) / (decay + alpha)
+        )
+
+        result[:, :, t] = ema
+
+    return {
+
+        span: result[i]
+
+        for i, span in enumerate(spans)
+
+    }
+
+
+# 심볼별 (현재 상태, 연속 캔들 수)
+def get_batch_state_runs(
+    states
+):
+
+    if states.shape[1] == 0:
+
+        return [
+            (0, 0)
+        ] * states.shape[0]
+
+    width = states.shape[1]
+
+    last = states[:, -1]
+
+    changed = states != last[:, None]
+
+    last_changed = width - 1 - np.argmax(
+        changed[:, ::-1],
+        axis=1
+    )
+
+    counts = np.where(
+        changed.any(axis=1),
+        width - 1 - last_changed,
+        width
+    )
+
+    counts[last == 0] = 0
+
+    return list(
+        zip(
+            last.tolist(),
+            counts.tolist()
+        )
+    )
+
+
+# 일괄 계산 결과 중 심볼 1개 구간을 지표 프레임으로 제공
+class BatchIndicatorFrame(IndicatorFrame):
+
+    def __init__(
+        self,
+        length,
+        emas,
+        states,
+        runs
+    ):
+
+        self.df = None
+
+        self.column = None
+
+        self.length = length
+
+        self.emas = emas
+
+        self.states = states
+
+        self.runs = runs
+
+
+def get_batch_indicator_frames(
+    values_list
+):
+
+    matrix, lengths, mask = build_close_matrix(
+        values_list
+    )
+
+    emas = get_batch_emas(
+        matrix
+    )
+
+    # 패딩 구간 상태는 0 (none)
+    cross = np.where(
+        mask,
+        get_ema_cross_states(
+            emas[10],
+            emas[20]
+        ),
+        0
+    ).astype(np.int8)
+
+    align = np.where(
+        mask,
+        get_ema_align_states(
+            emas[20],
+            emas[60],
+            emas[120]
+        ),
+        0
+    ).astype(np.int8)
+
+    cross_runs = get_batch_state_runs(
+        cross
+    )
+
+    align_runs = get_batch_state_runs(
+        align
+    )
+
+    width = matrix.shape[1]
+
+    frames = []
+
+    for i, length in enumerate(lengths.tolist()):
+
+        start = width - length
+
+        frames.append(
+            BatchIndicatorFrame(
+                length,
+                {
+                    span: emas[span][i, start:]
+                    for span in emas
+                },
+                {
+                    "10_20": cross[i, start:],
+                    "20_60_120": align[i, start:]
+                },
+                {
+                    "10_20": cross_runs[i],
+                    "20_60_120": align_runs[i]
+                }
+            )
+        )
+
+    return frames
+
+
+# =========================================================
+# 지표 계산 프로세스 풀 (선택)
+#
+# 시드할 심볼이 많을 때 (스크리너 첫 주기, 재수집 등)
+# 종가 배열(float64)만 묶어서 워커 프로세스로 전달
+# 워커는 일괄 EMA 계산 후 (길이, 마지막 EMA, 지속 캔들 수)만 반환
+#
+# 풀은 처음 1회만 생성해 계속 사용 (spawn : 수집 스레드와 무관하게 안전)
+# 워커 오류 시 풀을 다시 만들고 이번 계산은 현재 프로세스에서 처리
+# =========================================================
+
+indicator_pool = None
+
+indicator_pool_lock = threading.Lock()
+
+indicator_pool_counts = {
+    "local": 0,
+    "remote": 0,
+    "chunks": 0,
+    "errors": 0
+}
+
+
+def get_indicator_pool():
+
+    global indicator_pool
+
+    with indicator_pool_lock:
+
+        if (
+            indicator_pool is None
+            and
+            INDICATOR_PROCESS_WORKERS > 0
+        ):
+
+            indicator_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=INDICATOR_PROCESS_WORKERS,
+                mp_context=multiprocessing.get_context(
+                    "spawn"
+                )
+            )
+
+            # 워커 프로세스를 미리 띄워 첫 계산 지연 방지
+            for _ in range(INDICATOR_PROCESS_WORKERS):
+
+                indicator_pool.submit(
+                    get_seed_values,
+                    []
+                )
+
+            logging.info(
+                f"지표 계산 프로세스 {INDICATOR_PROCESS_WORKERS}개 시작"
+            )
+
+        return indicator_pool
+
+
+def reset_indicator_pool():
+
+    global indicator_pool
+
+    with indicator_pool_lock:
+
+        pool = indicator_pool
+
+        indicator_pool = None
+
+    if pool is not None:
+
+        pool.shutdown(
+            wait=False,
+            cancel_futures=True
+        )
+
+
+# 워커 실행 함수 (모듈 최상위에 있어야 프로세스로 전달 가능)
+def get_seed_values(
+    values_list
+):
+
+    return [
+
+        (
+            frame.length,
+            {
+                span: float(frame.ema(span)[-1])
+                for span in EMA_SPANS
+            } if frame.length else {},
+            dict(frame.runs)
+        )
+
+        for frame in get_batch_indicator_frames(
+            values_list
+        )
+
+    ]
+
+
+def compute_seed_values(
+    values_list
+):
+
+    pool = None
+
+    if len(values_list) >= INDICATOR_PROCESS_MIN_SYMBOLS:
+
+        pool = get_indicator_pool()
+
+    if pool is not None:
+
+        chunks = [
+            values_list[i:i + INDICATOR_PROCESS_CHUNK]
+            for i in range(
+                0,
+                len(values_list),
+                INDICATOR_PROCESS_CHUNK
+            )
+        ]
+
+        try:
+
+            result = []
+
+            for values in pool.map(
+                get_seed_values,
+                chunks
+            ):
+
+                result.extend(values)
+
+            with indicator_pool_lock:
+
+                indicator_pool_counts["remote"] += len(values_list)
+
+                indicator_pool_counts["chunks"] += len(chunks)
+
+            return result
+
+        except Exception as e:
+
+            logging.error(
+                f"지표 계산 프로세스 오류 → 현재 프로세스에서 계산:{e}"
+            )
+
+            with indicator_pool_lock:
+
+                indicator_pool_counts["errors"] += 1
+
+            reset_indicator_pool()
+
+    with indicator_pool_lock:
+
+        indicator_pool_counts["local"] += len(values_list)
+
+    return get_seed_values(
+        values_list
+    )
+
+
+def get_indicator_pool_stats():
+
+    with indicator_pool_lock:
+
+        return {
+
+            "workers":
+                INDICATOR_PROCESS_WORKERS,
+
+            "running":
+                indicator_pool is not None,
+
+            **indicator_pool_counts
+
+        }
+
+
+# =========================================================
+# 증분 EMA 상태
+#
+# (거래소, 심볼, 시간봉) 당 1개
+# 첫 조회 시 저장소의 긴 확정 캔들 이력으로 시드 (일괄 계산)
+# 이후 새로 확정된 캔들만 1개씩 반영 → 캔들당 O(1)
+# 지속 캔들 수도 같은 방식으로 누적
+# 이력이 끊기면 (저장소 재수집 등) 다시 시드
+#
+# 업비트 1H 는 진행 중 캔들을 한 단계 미리 계산해 표시 (상태 미반영)
+# =========================================================
+
+def step_ema_values(
+    emas,
+    close
+):
+
+    if not emas:
+
+        return {
+
+            span: close
+
+            for span in EMA_SPANS
+
+        }
+
+    result = {}
+
+    for span in EMA_SPANS:
+
+        alpha = 2.0 / (span + 1)
+
+        decay = 1 - alpha
+
+        result[span] = (
+            (decay * emas[span] + alpha * close)
+            /
+            (decay + alpha)
+        )
+
+    return result
+
+
+def step_state_run(
+    run,
+    state
+):
+
+    if state == 0:
+
+        return 0, 0
+
+    if state == run[0]:
+
+        return state, run[1] + 1
+
+    return state, 1
+
+
+def step_state_runs(
+    runs,
+    emas
+):
+
+    cross = int(
+        get_ema_cross_states(
+            emas[10],
+            emas[20]
+        )
+    )
+
+    align = int(
+        get_ema_align_states(
+            emas[20],
+            emas[60],
+            emas[120]
+        )
+    )
+
+    return {
+
+        "10_20":
+            step_state_run(
+                runs["10_20"],
+                cross
+            ),
+
+        "20_60_120":
+            step_state_run(
+                runs["20_60_120"],
+                align
+            )
+
+    }
+
+
+class EmaStateFrame(IndicatorFrame):
+
+    def __init__(
+        self,
+        length,
+        emas,
+        runs,
+        stamp
+    ):
+
+        self.df = None
+
+        self.column = None
+
+        self.length = length
+
+        self.emas = emas
+
+        self.states = {}
+
+        self.runs = runs
+
+        # (마지막 확정 캔들 시각, 시드한 버퍼 generation, 진행 중 캔들 종가)
+        self.stamp = stamp
+
+
+class EmaState:
+
+    def __init__(self):
+
+        # 마지막으로 반영한 확정 캔들 시각
+        self.last_ts = None
+
+        # 시드한 캔들 버퍼의 generation
+        self.generation = None
+
+        self.length = 0
+
+        # 기간별 마지막 EMA 값
+        self.emas = {}
+
+        self.runs = {
+            "10_20": (0, 0),
+            "20_60_120": (0, 0)
+        }
+
+    # values : (길이, 기간별 마지막 EMA, 지속 캔들 수)
+    def seed(
+        self,
+        last_ts,
+        values,
+        generation=None
+    ):
+
+        self.last_ts = last_ts
+
+        self.generation = generation
+
+        self.length, self.emas, self.runs = values
+
+    def apply(
+        self,
+        ts,
+        close
+    ):
+
+        self.emas = step_ema_values(
+            self.emas,
+            close
+        )
+
+        self.runs = step_state_runs(
+            self.runs,
+            self.emas
+        )
+
+        self.length += 1
+
+        self.last_ts = ts
+
+    # live_close : 진행 중 캔들 종가 (상태에는 반영하지 않음)
+    def frame(
+        self,
+        live_close=None
+    ):
+
+        if live_close is None:
+
+            return EmaStateFrame(
+                self.length,
+                self.emas,
+                self.runs,
+                (self.last_ts, self.generation, None)
+            )
+
+        emas = step_ema_values(
+            self.emas,
+            live_close
+        )
+
+        return EmaStateFrame(
+            self.length + 1,
+            emas,
+            step_state_runs(
+                self.runs,
+                emas
+            ),
+            (self.last_ts, self.generation, live_close)
+        )
+
+
+def get_candle_close(
+    exchange,
+    row
+):
+
+    if exchange == "okx":
+
+        return float(row[4])
+
+    return float(row["trade_price"])
+
+
+class EmaStateStore:
+
+    def __init__(self):
+
+        self.states = {}
+
+        # states / 잠금 목록 / 통계용
+        self.lock = threading.Lock()
+
+        # (거래소, 시간봉) 별 잠금 : 시드 계산 (프로세스 풀 포함) 중에도
+        # 다른 거래소 / 시간봉은 기다리지 않음
+        self.series_locks = {}
+
+        self.seeds = 0
+        self.steps = 0
+        self.peeks = 0
+
+    # 심볼 순서대로 지표 프레임 반환 (캔들 저장소는 미리 동기화)
+    # live_prices : 진행 중 캔들 대신 쓸 현재가 (캔들 조회 없는 순위 갱신용)
+    def frames(
+        self,
+        exchange,
+        timeframe,
+        symbols,
+        peek_live=False,
+        live_prices=None
+    ):
+
+        with self.lock:
+
+            series_lock = self.series_locks.setdefault(
+                (exchange, timeframe),
+                threading.Lock()
+            )
+
+        with series_lock:
+
+            reads = []
+
+            for symbol in symbols:
+
+                key = (
+                    exchange,
+                    symbol,
+                    timeframe
+                )
+
+                with self.lock:
+
+                    state = self.states.get(key)
+
+                    if state is None:
+
+                        state = EmaState()
+
+                        self.states[key] = state
+
+                generation = candle_store.get_generation(
+                    exchange,
+                    symbol,
+                    timeframe
+                )
+
+                # 버퍼를 다시 수집했으면 (스크리너 300 → TOP30 600 등) 처음부터
+                reads.append(
+                    (state,)
+                    +
+                    candle_store.read_since(
+                        exchange,
+                        symbol,
+                        timeframe,
+                        state.last_ts
+                        if state.generation == generation
+                        else None
+                    )
+                    +
+                    (generation,)
+                )
+
+            # 새 심볼 / 이력 끊김 / 다시 수집 → 일괄 시드
+            seeds = [
+                read
+                for read in reads
+                if not read[2]
+            ]
+
+            if seeds:
+
+                seed_values = compute_seed_values([
+                    np.array(
+                        [
+                            get_candle_close(exchange, row)
+                            for row in rows
+                        ],
+                        dtype=np.float64
+                    )
+                    for _, rows, _, _, _ in seeds
+                ])
+
+                for (state, rows, _, _, generation), values in zip(
+                    seeds,
+                    seed_values
+                ):
+
+                    state.seed(
+                        get_candle_ts(
+                            exchange,
+                            rows[-1]
+                        ),
+                        values,
+                        generation
+                    )
+
+                with self.lock:
+
+                    self.seeds += len(seeds)
+
+            result = []
+
+            steps = 0
+
+            peeks = 0
+
+            for symbol, (state, rows, connected, live, _) in zip(symbols, reads):
+
+                if connected:
+
+                    for row in rows:
+
+                        state.apply(
+                            get_candle_ts(exchange, row),
+                            get_candle_close(exchange, row)
+                        )
+
+                    steps += len(rows)
+
+                live_close = None
+
+                if peek_live and state.length:
+
+                    if live_prices and symbol in live_prices:
+
+                        live_close = live_prices[symbol]
+
+                    elif (
+                        live is not None
+                        and
+                        get_candle_ts(exchange, live) > state.last_ts
+                    ):
+
+                        live_close = get_candle_close(
+                            exchange,
+                            live
+                        )
+
+                if live_close is not None:
+
+                    peeks += 1
+
+                result.append(
+                    state.frame(
+                        live_close
+                    )
+                )
+
+            with self.lock:
+
+                self.steps += steps
+
+                self.peeks += peeks
+
+            return result
+
+    def stats(self):
+
+        with self.lock:
+
+            return {
+
+                "states":
+                    len(self.states),
+
+                "seeds":
+                    self.seeds,
+
+                "steps":
+                    self.steps,
+
+                "peeks":
+                    self.peeks
+
+            }
+
+
+ema_state_store = EmaStateStore()
+
+
+# =========================================================
+# EMA 10-20 방향
+# =========================================================
+
+def get_ema_10_20_direction(
+    df,
+    column
+):
+
+    return IndicatorFrame(
+        df,
+        column
+    ).direction_10_20()
+
+
+# =========================================================
+# EMA 20-60-120 방향
+# =========================================================
+
+def get_ema_20_60_120_direction(
+    df,
+    column
+):
+
+    return IndicatorFrame(
+        df,
+        column
+    ).direction_20_60_120()
+
+
+# =========================================================
+# EMA 10-20 상태
+# =========================================================
+
+def check_ema_10_20(
+    df,
+    column
+):
+
+    return IndicatorFrame(
+        df,
+        column
+    ).status_10_20()
+
+
+# =========================================================
+# EMA 20-60-120 상태
+# =========================================================
+
+def check_ema(
+    df,
+    column
+):
+
+    return IndicatorFrame(
+        df,
+        column
+    ).status_20_60_120()
+
+
+# =========================================================
+# EMA 10-20 지속 캔들 수
+# =========================================================
+
+def get_ema_10_20_count(
+    df,
+    column
+):
+
+    return IndicatorFrame(
+        df,
+        column
+    ).count_10_20()
+
+
+# =========================================================
+# 1H 눌림 조건
+#
+# LONG
+# 1H 10-20 역배열
+# 1H 20-60-120 정배열
+# 4H 10-20 정배열
+# 4H 20-60-120 정배열
+# 4H 10-20 정배열 지속 10봉 이하
+#
+# SHORT
+# 반대
+# =========================================================
+
+def check_1h_warning(
+    ind1h,
+    ind4h
+):
+
+    if (
+        ind1h.length < 120
+        or
+        ind4h.length < 120
+    ):
+
+        return NO_ALERT
+
+
+    # =====================================================
+    # 1H
+    # =====================================================
+
+    ema1h_10_20 = (
+        ind1h.direction_10_20()
+    )
+
+    ema1h_20_60_120 = (
+        ind1h.direction_20_60_120()
+    )
+
+
+    # =====================================================
+    # 4H
+    # =====================================================
+
+    ema4h_10_20 = (
+        ind4h.direction_10_20()
+    )
+
+    ema4h_20_60_120 = (
+        ind4h.direction_20_60_120()
+    )
+
+
+    # =====================================================
+    # 4H 10-20 지속 봉 수
+    # =====================================================
+
+    count4h, direction4h = (
+        ind4h.count_10_20()
+    )
+
+
+    # =====================================================
+    # LONG 눌림
+    # =====================================================
+
+    if (
+        ema1h_10_20 == "short"
+        and
+        ema1h_20_60_120 == "long"
+        and
+        ema4h_10_20 == "long"
+        and
+        ema4h_20_60_120 == "long"
+        and
+        direction4h == "long"
+        and
+        count4h >= 1
+        and
+        count4h <= 10
+    ):
+
+        return Trend.LONG, count4h
+
+
+    # =====================================================
+    # SHORT 눌림
+    # =====================================================
+
+    if (
+        ema1h_10_20 == "long"
+        and
+        ema1h_20_60_120 == "short"
+        and
+        ema4h_10_20 == "short"
+        and
+        ema4h_20_60_120 == "short"
+        and
+        direction4h == "short"
+        and
+        count4h >= 1
+        and
+        count4h <= 10
+    ):
+
+        return Trend.SHORT, count4h
+
+
+    return NO_ALERT
+
+
+# =========================================================
+# 1H 돌파 조건
+#
+# LONG
+# 1H 10-20 정배열
+# 1H 20-60-120 정배열
+# 4H 10-20 정배열
+# 4H 20-60-120 정배열
+# 4H 10-20 지속 10봉 이하
+#
+# SHORT
+# 반대
+#
+# ★ 돌파도 눌림과 동일하게
+#   4H 10-20 지속 캔들 수 표시
+# =========================================================
+
+def check_1h_breakout_warning(
+    ind1h,
+    ind4h
+):
+
+    if (
+        ind1h.length < 120
+        or
+        ind4h.length < 120
+    ):
+
+        return NO_ALERT
+
+
+    # =====================================================
+    # 1H 10-20 방향
+    # =====================================================
+
+    ema1h_10_20 = (
+        ind1h.direction_10_20()
+    )
+
+
+    # =====================================================
+    # 1H 20-60-120 방향
+    # =====================================================
+
+    ema1h_20_60_120 = (
+        ind1h.direction_20_60_120()
+    )
+
+
+    # =====================================================
+    # 4H 10-20 방향
+    # =====================================================
+
+    ema4h_10_20 = (
+        ind4h.direction_10_20()
+    )
+
+
+    # =====================================================
+    # 4H 20-60-120 방향
+    # =====================================================
+
+    ema4h_20_60_120 = (
+        ind4h.direction_20_60_120()
+    )
+
+
+    # =====================================================
+    # ★ 돌파도 4H 10-20 지속 캔들 수 사용
+    # =====================================================
+
+    count4h, direction4h = (
+        ind4h.count_10_20()
+    )
+
+
+    # =====================================================
+    # LONG 돌파
+    # =====================================================
+
+    if (
+        ema1h_10_20 == "long"
+        and
+        ema1h_20_60_120 == "long"
+        and
+        ema4h_10_20 == "long"
+        and
+        ema4h_20_60_120 == "long"
+        and
+        direction4h == "long"
+        and
+        count4h >= 1
+        and
+        count4h <= 10
+    ):
+
+        return Trend.LONG, count4h
+
+
+    # =====================================================
+    # SHORT 돌파
+    # =====================================================
+
+    if (
+        ema1h_10_20 == "short"
+        and
+        ema1h_20_60_120 == "short"
+        and
+        ema4h_10_20 == "short"
+        and
+        ema4h_20_60_120 == "short"
+        and
+        direction4h == "short"
+        and
+        count4h >= 1
+        and
+        count4h <= 10
+    ):
+
+        return Trend.SHORT, count4h
+
+
+    return NO_ALERT
+
+
+# =========================================================
+# 최종 LONG / SHORT 신호
+#
+# 경고가 발생한 경우에만 LONG / SHORT 표시
+# =========================================================
+
+def get_trade_signal(
+    warning,
+    breakout
+):
+
+    # =====================================================
+    # 돌파 우선
+    # =====================================================
+
+    if breakout[0] != Trend.NONE:
+
+        return breakout[0]
+
+
+    # =====================================================
+    # 눌림
+    # =====================================================
+
+    return warning[0]
+
+
+# =========================================================
+# 1H + 4H EMA 결과
+#
+# 시간봉별 지표 프레임 1개씩을 모든 판정에 공유
+# 표시 문자열 없이 원본 값만 보관 (표시는 렌더링할 때 변환)
+#
+# runs     : EMA_RUN_NAMES 순서의 (방향, 지속 봉 수)
+# warning  : 눌림 (방향, 4H 10-20 지속 봉 수) / 없으면 NO_ALERT
+# breakout : 돌파 (방향, 4H 10-20 지속 봉 수) / 없으면 NO_ALERT
+# signal   : 최종 LONG / SHORT (없으면 Trend.NONE)
+# =========================================================
+
+EMA_RUN_NAMES = (
+    "1h_10_20",
+    "1h_20_60_120",
+    "4h_10_20",
+    "4h_20_60_120"
+)
+
+
+class EmaResult:
+
+    __slots__ = (
+        "runs",
+        "warning",
+        "breakout",
+        "signal"
+    )
+
+    def __init__(
+        self,
+        runs,
+        warning,
+        breakout,
+        signal
+    ):
+
+        self.runs = tuple(
+            (Trend(int(state)), int(count))
+            for state, count in runs
+        )
+
+        self.warning = (
+            Trend(warning[0]),
+            int(warning[1])
+        )
+
+        self.breakout = (
+            Trend(breakout[0]),
+            int(breakout[1])
+        )
+
+        self.signal = Trend(
+            signal
+        )
+
+    def __getstate__(self):
+
+        return (
+            self.runs,
+            self.warning,
+            self.breakout,
+            self.signal
+        )
+
+    def __setstate__(
+        self,
+        state
+    ):
+
+        (
+            self.runs,
+            self.warning,
+            self.breakout,
+            self.signal
+        ) = state
+
+
+def get_frame_result(
+    ind1h,
+    ind4h
+):
+
+    warning = check_1h_warning(
+        ind1h,
+        ind4h
+    )
+
+
+    breakout = check_1h_breakout_warning(
+        ind1h,
+        ind4h
+    )
+
+
+    signal = get_trade_signal(
+        warning,
+        breakout
+    )
+
+
+    return EmaResult(
+        (
+            ind1h.run_10_20(),
+            ind1h.run_20_60_120(),
+            ind4h.run_10_20(),
+            ind4h.run_20_60_120()
+        ),
+        warning,
+        breakout,
+        signal
+    )
+
+
+# =========================================================
+# EMA 결과 메모
+#
+# (거래소, 심볼) 별 마지막 EMA 결과 보관
+# 입력 표시 = 시간봉별 (마지막 확정 캔들, 버퍼 generation, 업비트 1H 진행 중 종가)
+# 버퍼를 더 깊게 다시 수집해 재시드하면 마지막 캔들이 같아도 다시 판정
+# 표시가 같으면 눌림 / 돌파 / 상태 판정을 다시 하지 않고 그대로 반환
+# TOP30 에서 빠진 심볼은 오래 안 쓴 순서로 제거
+# =========================================================
+
+class EmaResultMemo:
+
+    def __init__(
+        self,
+        size
+    ):
+
+        self.size = size
+
+        self.entries = OrderedDict()
+
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(
+        self,
+        key,
+        stamp
+    ):
+
+        with self.lock:
+
+            entry = self.entries.get(key)
+
+            if entry is None or entry[0] != stamp:
+
+                self.misses += 1
+
+                return None
+
+            self.entries.move_to_end(key)
+
+            self.hits += 1
+
+            return entry[1]
+
+    def put(
+        self,
+        key,
+        stamp,
+        result
+    ):
+
+        with self.lock:
+
+            self.entries[key] = (
+                stamp,
+                result
+            )
+
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.size:
+
+                self.entries.popitem(
+                    last=False
+                )
+
+                self.evictions += 1
+
+    def stats(self):
+
+        with self.lock:
+
+            return {
+
+                "entries":
+                    len(self.entries),
+
+                "hits":
+                    self.hits,
+
+                "misses":
+                    self.misses,
+
+                "evictions":
+                    self.evictions
+
+            }
+
+
+ema_result_memo = EmaResultMemo(
+    EMA_MEMO_SIZE
+)
+
+
+# =========================================================
+# 1H + 4H EMA 일괄 계산
+#
+# 캔들 저장소 동기화 후 증분 EMA 상태에서 지표 프레임을 읽음
+# 새로 확정된 캔들이 없으면 EMA 재계산 없음
+# =========================================================
+
+def sync_candles(
+    exchange,
+    symbol,
+    timeframe
+):
+
+    return candle_cache.get(
+        exchange,
+        symbol,
+        timeframe,
+        EMA_SEED_DEPTH + 1,
+        lambda count: candle_store.sync(
+            exchange,
+            symbol,
+            timeframe,
+            count
+        )
+    )
+
+
+# limit 없음 : 주기 캐시 경유 (EMA 시드 깊이)
+# 동기화하지 못한 심볼 (시간 예산 초과 포함) 반환
+def sync_candle_set(
+    exchange,
+    symbols,
+    timeframes,
+    limit=None
+):
+
+    return {
+
+        symbol
+
+        for symbol, synced in iter_candle_syncs(
+            exchange,
+            {
+                symbol: timeframes
+                for symbol in symbols
+            },
+            limit
+        )
+
+        if not synced
+
+    }
+
+
+# symbol_timeframes : {심볼: 동기화할 시간봉}
+# 심볼의 시간봉이 모두 끝나는 순서대로 (심볼, 성공 여부) 반환
+def iter_candle_syncs(
+    exchange,
+    symbol_timeframes,
+    limit=None
+):
+
+    def sync(job):
+
+        symbol, timeframe = job
+
+        if limit is None:
+
+            return sync_candles(
+                exchange,
+                symbol,
+                timeframe
+            )
+
+        return candle_store.sync(
+            exchange,
+            symbol,
+            timeframe,
+            limit
+        )
+
+    remaining = {
+
+        symbol: len(timeframes)
+
+        for symbol, timeframes in symbol_timeframes.items()
+
+    }
+
+    synced = dict.fromkeys(
+        symbol_timeframes,
+        True
+    )
+
+    for symbol, count in remaining.items():
+
+        if count == 0:
+
+            yield symbol, True
+
+    # 작업마다 컨텍스트 복사 (시간 예산 전달)
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=CANDLE_SYNC_WORKERS
+    ) as pool:
+
+        futures = {
+
+            pool.submit(
+                contextvars.copy_context().run,
+                sync,
+                (symbol, timeframe)
+            ): symbol
+
+            for symbol, timeframes in symbol_timeframes.items()
+
+            for timeframe in timeframes
+
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+
+            symbol = futures[future]
+
+            if future.result() is None:
+
+                synced[symbol] = False
+
+            remaining[symbol] -= 1
+
+            if remaining[symbol] == 0:
+
+                yield symbol, synced[symbol]
+
+
+# timeframes 만 동기화, 현재 스냅샷에 없던 심볼은 전체 시간봉 동기화
+def sync_ema_candles(
+    exchange,
+    symbols,
+    timeframes,
+    all_timeframes,
+    tracked
+):
+
+    return {
+
+        symbol
+
+        for symbol, synced in iter_ema_candle_syncs(
+            exchange,
+            symbols,
+            timeframes,
+            all_timeframes,
+            tracked
+        )
+
+        if not synced
+
+    }
+
+
+# (심볼, 성공 여부) 를 size 개씩 묶어서 반환 (마지막 묶음은 남은 것만)
+def iter_sync_chunks(
+    syncs,
+    size=None
+):
+
+    chunk = []
+
+    for item in syncs:
+
+        chunk.append(item)
+
+        if len(chunk) >= (size or EMA_PUBLISH_CHUNK):
+
+            yield chunk
+
+            chunk = []
+
+    if chunk:
+
+        yield chunk
+
+
+def iter_ema_candle_syncs(
+    exchange,
+    symbols,
+    timeframes,
+    all_timeframes,
+    tracked
+):
+
+    return iter_candle_syncs(
+        exchange,
+        {
+
+            symbol: [
+                timeframe
+                for timeframe in all_timeframes
+                if timeframe in timeframes
+                or symbol not in tracked
+            ]
+
+            for symbol in symbols
+
+        }
+    )
+
+
+# 캔들 저장소는 미리 동기화
+def get_ema_results(
+    exchange,
+    symbols,
+    timeframe_1h,
+    timeframe_4h,
+    peek_live=False,
+    live_prices=None
+):
+
+    ind1h = ema_state_store.frames(
+        exchange,
+        timeframe_1h,
+        symbols,
+        peek_live,
+        live_prices
+    )
+
+    ind4h = ema_state_store.frames(
+        exchange,
+        timeframe_4h,
+        symbols
+    )
+
+    results = {}
+
+    for i, symbol in enumerate(symbols):
+
+        key = (
+            exchange,
+            symbol
+        )
+
+        stamp = (
+            ind1h[i].stamp,
+            ind4h[i].stamp
+        )
+
+        result = ema_result_memo.get(
+            key,
+            stamp
+        )
+
+        if result is None:
+
+            result = get_frame_result(
+                ind1h[i],
+                ind4h[i]
+            )
+
+            ema_result_memo.put(
+                key,
+                stamp,
+                result
+            )
+
+        results[symbol] = result
+
+    return results
+
+
+# =========================================================
+# OKX 1H + 4H EMA
+# 확정 캔들만 사용
+# =========================================================
+
+def get_okx_ema(
+    inst_id
+):
+
+    ema_map, _ = get_okx_ema_map(
+        [inst_id]
+    )
+
+    return ema_map[inst_id]
+
+
+# (심볼별 결과, 캔들 동기화 실패 심볼)
+def get_okx_ema_map(
+    symbols,
+    timeframes=("1H", "4H")
+):
+
+    failed = sync_ema_candles(
+        "okx",
+        symbols,
+        timeframes,
+        ("1H", "4H"),
+        get_tracked_symbols(
+            latest_okx_data
+        )
+    )
+
+    return get_okx_ema_results(
+        symbols
+    ), failed
+
+
+# 캔들 동기화 없이 저장소 캔들로 일괄 계산
+def get_okx_ema_results(
+    symbols
+):
+
+    return get_ema_results(
+        "okx",
+        symbols,
+        "1H",
+        "4H"
+    )
+
+
+# =========================================================
+# 업비트 1H + 4H EMA
+# 1H 는 진행 중 캔들 포함, 4H 는 확정 캔들만 사용
+# =========================================================
+
+def get_upbit_ema(
+    market
+):
+
+    ema_map, _ = get_upbit_ema_map(
+        [market]
+    )
+
+    return ema_map[market]
+
+
+# (마켓별 결과, 캔들 동기화 실패 마켓)
+# 1H 를 동기화하지 않는 순위 갱신은 진행 중 캔들 대신 현재가 사용
+def get_upbit_ema_map(
+    markets,
+    timeframes=(60, 240)
+):
+
+    failed = sync_ema_candles(
+        "upbit",
+        markets,
+        timeframes,
+        (60, 240),
+        get_tracked_symbols(
+            latest_upbit_data
+        )
+    )
+
+    return get_upbit_ema_results(
+        markets,
+        timeframes
+    ), failed
+
+
+# 1H 를 동기화하지 않는 순위 갱신은 진행 중 캔들 대신 현재가 사용
+def get_upbit_ema_results(
+    markets,
+    timeframes=(60, 240)
+):
+
+    return get_ema_results(
+        "upbit",
+        markets,
+        60,
+        240,
+        peek_live=True,
+        live_prices=(
+            None
+            if 60 in timeframes
+            else upbit_ticker_prices
+        )
+    )
+
+
+# =========================================================
+# OKX 24시간 거래대금 (비동기 일괄)
+#
+# 전체 심볼 캔들을 동시에 조회
+# 동시 요청 수는 OKX_FETCH_CONCURRENCY 로 제한
+# =========================================================
+
+async def get_okx_volume_async(
+    client,
+    semaphore,
+    inst_id
+):
+
+    df = await get_okx_ohlcv_async(
+        client,
+        semaphore,
+        inst_id,
+        "1H",
+        24
+    )
+
+    if df is None:
+
+        return 0
+
+    return df[
+        "volCcyQuote"
+    ].sum()
+
+
+async def collect_okx_volumes(
+    symbols,
+    concurrency=OKX_FETCH_CONCURRENCY
+):
+
+    semaphore = asyncio.Semaphore(
+        concurrency
+    )
+
+    client = get_async_client()
+
+    volumes = await asyncio.gather(*[
+
+        get_okx_volume_async(
+            client,
+            semaphore,
+            symbol
+        )
+
+        for symbol in symbols
+
+    ])
+
+    return dict(
+        zip(
+            symbols,
+            volumes
+        )
+    )
+
+
+# =========================================================
+# OKX 24시간 거래대금 (티커 일괄)
+#
+# SWAP 의 volCcy24h 는 기초자산 수량
+# 최종가를 곱해 USDT 거래대금으로 환산
+# =========================================================
+
+def get_okx_ticker_volumes():
+
+    response = http_get(
+        "https://www.okx.com/api/v5/"
+        "market/tickers?instType=SWAP"
+    )
+
+    if response is None:
+
+        return {}
+
+    try:
+
+        return {
+
+            x["instId"]:
+            float(x["volCcy24h"])
+            *
+            float(x["last"])
+
+            for x in response.json()["data"]
+            if x["instId"].endswith("-USDT-SWAP")
+
+        }
+
+    except Exception as e:
+
+        logging.error(
+            f"OKX 티커 오류:{e}"
+        )
+
+        return {}
+
+
+# =========================================================
+# OKX 24시간 거래대금 (USDT)
+# =========================================================
+
+okx_candle_volumes = {
+    "hour": None,
+    "volumes": {}
+}
+
+okx_candle_volumes_lock = threading.Lock()
+
+
+def get_okx_volumes(
+    symbols,
+    mode=OKX_VOLUME_MODE,
+    concurrency=OKX_FETCH_CONCURRENCY
+):
+
+    volumes, _ = get_okx_volumes_with_source(
+        symbols,
+        mode,
+        concurrency
+    )
+
+    return volumes
+
+
+# (거래대금, 실제 사용한 방식) : 티커 실패 시 "candle"
+def get_okx_volumes_with_source(
+    symbols,
+    mode=OKX_VOLUME_MODE,
+    concurrency=OKX_FETCH_CONCURRENCY
+):
+
+    if mode == "ticker":
+
+        volumes = get_okx_ticker_volumes()
+
+        if volumes:
+
+            return {
+
+                symbol:
+                volumes.get(symbol, 0)
+
+                for symbol in symbols
+
+            }, "ticker"
+
+        logging.error(
+            "OKX 티커 거래대금 실패 → 캔들 합산으로 대체"
+        )
+
+    # 확정 1H 캔들 합산 → 정시 전까지 같은 값, 없는 심볼만 조회
+    # 순위 작업 / 방식 비교가 함께 쓰므로 잠금 안에서만 읽고 씀 (조회는 잠금 밖)
+    hour = int(time.time() // 3600)
+
+    with okx_candle_volumes_lock:
+
+        if okx_candle_volumes["hour"] != hour:
+
+            okx_candle_volumes["hour"] = hour
+
+            okx_candle_volumes["volumes"] = {}
+
+        volumes = dict(
+            okx_candle_volumes["volumes"]
+        )
+
+    missing = [
+        symbol
+        for symbol in symbols
+        if symbol not in volumes
+    ]
+
+    if missing:
+
+        fetched = run_async(
+            collect_okx_volumes(
+                missing,
+                concurrency
+            )
+        )
+
+        # 실패(0)는 보관하지 않고 다음 조회 때 다시 시도
+        kept = {
+
+            symbol: volume
+
+            for symbol, volume in fetched.items()
+
+            if volume
+
+        }
+
+        with okx_candle_volumes_lock:
+
+            if okx_candle_volumes["hour"] == hour:
+
+                okx_candle_volumes["volumes"].update(
+                    kept
+                )
+
+        volumes.update(
+            fetched
+        )
+
+    return {
+
+        symbol:
+        volumes[symbol]
+
+        for symbol in symbols
+
+    }, "candle"
+
+
+def get_okx_volume_map(
+    symbols,
+    usdt_krw,
+    mode=OKX_VOLUME_MODE,
+    concurrency=OKX_FETCH_CONCURRENCY
+):
+
+    volumes = get_okx_volumes(
+        symbols,
+        mode,
+        concurrency
+    )
+
+    return {
+
+        symbol:
+        volumes[symbol]
+        *
+        usdt_krw
+        /
+        10
+
+        for symbol in symbols
+
+    }
+
+
+# =========================================================
+# OKX 거래대금 방식 비교
+#
+# 캔들 합산 TOP N 과 티커 TOP N 의 차이
+# 수집 결과는 OKX_VOLUME_PARITY_TTL 동안 재사용
+# 동시 요청은 잠금으로 한 번만 수집
+# =========================================================
+
+okx_volume_parity_cache = {
+    "at": None,
+    "candle": {},
+    "ticker": {},
+    "sources": {}
+}
+
+okx_volume_parity_lock = threading.Lock()
+
+
+def get_okx_parity_volumes():
+
+    with okx_volume_parity_lock:
+
+        cache = okx_volume_parity_cache
+
+        if (
+            cache["at"] is not None
+            and
+            time.time() - cache["at"] < OKX_VOLUME_PARITY_TTL
+        ):
+
+            return dict(cache)
+
+        symbols = get_all_okx_swap_symbols()
+
+        candle_volumes, candle_source = get_okx_volumes_with_source(
+            symbols,
+            "candle"
+        )
+
+        ticker_volumes, ticker_source = get_okx_volumes_with_source(
+            symbols,
+            "ticker"
+        )
+
+        if ticker_source != "ticker":
+
+            logging.warning(
+                "OKX 거래대금 비교 : 티커 실패 → 캔들 합산끼리 비교"
+            )
+
+        cache.update({
+
+            "at":
+                time.time(),
+
+            "candle":
+                candle_volumes,
+
+            "ticker":
+                ticker_volumes,
+
+            "sources": {
+                "candle": candle_source,
+                "ticker": ticker_source
+            }
+
+        })
+
+        return dict(cache)
+
+
+def get_okx_volume_parity(
+    top_n=30
+):
+
+    cache = get_okx_parity_volumes()
+
+    candle_volumes = cache["candle"]
+
+    ticker_volumes = cache["ticker"]
+
+    candle_top = sorted(
+        candle_volumes,
+        key=candle_volumes.get,
+        reverse=True
+    )[:top_n]
+
+    ticker_top = sorted(
+        ticker_volumes,
+        key=ticker_volumes.get,
+        reverse=True
+    )[:top_n]
+
+    rank_diff = {
+
+        symbol:
+        ticker_top.index(symbol)
+        -
+        candle_top.index(symbol)
+
+        for symbol in candle_top
+        if symbol in ticker_top
+
+    }
+
+    volume_ratio = {
+
+        symbol:
+        round(
+            ticker_volumes[symbol]
+            /
+            candle_volumes[symbol],
+            4
+        )
+
+        for symbol in candle_top
+        if candle_volumes[symbol]
+
+    }
+
+    return {
+
+        "top_n":
+            top_n,
+
+        # 실제 사용한 방식 (티커 실패 시 ticker 도 "candle")
+        "sources":
+            cache["sources"],
+
+        "collected_at":
+            cache["at"],
+
+        "overlap":
+            len(rank_diff),
+
+        "only_candle":
+            [
+                symbol
+                for symbol in candle_top
+                if symbol not in ticker_top
+            ],
+
+        "only_ticker":
+            [
+                symbol
+                for symbol in ticker_top
+                if symbol not in candle_top
+            ],
+
+        "max_rank_diff":
+            max(
+                map(abs, rank_diff.values()),
+                default=0
+            ),
+
+        "rank_diff":
+            rank_diff,
+
+        "volume_ratio":
+            volume_ratio
+
+    }
+
+
+# =========================================================
+# 업비트 24시간 거래대금
+# =========================================================
+
+def get_upbit_volume_map():
+
+    markets = get_upbit_markets()
+
+    if not markets:
+
+        return {}
+
+    response = http_get(
+        "https://api.upbit.com/v1/ticker?markets="
+        +
+        ",".join(markets)
+    )
+
+    if response is None:
+
+        return {}
+
+    try:
+
+        data = response.json()
+
+        upbit_ticker_prices.update({
+
+            x["market"]:
+            float(x["trade_price"])
+
+            for x in data
+
+        })
+
+        update_upbit_reference(
+            markets,
+            upbit_ticker_prices.get(
+                "KRW-USDT"
+            )
+        )
+
+        return {
+
+            x["market"]:
+            x["acc_trade_price_24h"]
+
+            for x in data
+
+        }
+
+    except Exception as e:
+
+        logging.error(
+            f"업비트 거래대금 오류:{e}"
+        )
+
+        return {}
+
+
+# =========================================================
+# OKX 변동률
+# =========================================================
+
+def get_okx_change(
+    inst_id
+):
+
+    df = get_okx_ohlcv(
+        inst_id,
+        "1H",
+        120
+    )
+
+    if df is None or len(df) < 50:
+
+        return None
+
+    df = df.copy()
+
+    df["datetime"] = (
+        pd.to_datetime(
+            df["ts"],
+            unit="ms"
+        )
+        +
+        pd.Timedelta(hours=9)
+    )
+
+    df.set_index(
+        "datetime",
+        inplace=True
+    )
+
+    daily = (
+        df["c"]
+        .resample(
+            "1D",
+            offset="9h"
+        )
+        .last()
+    )
+
+    if len(daily) < 5:
+
+        return None
+
+    result = []
+
+    for i in [-1, -2, -3]:
+
+        if daily.iloc[i - 1] == 0:
+
+            result.append(0)
+
+            continue
+
+        change = (
+            (
+                daily.iloc[i]
+                -
+                daily.iloc[i - 1]
+            )
+            /
+            daily.iloc[i - 1]
+            *
+            100
+        )
+
+        result.append(
+            round(float(change), 2)
+        )
+
+    return result
+
+
+# =========================================================
+# 업비트 변동률
+# =========================================================
+
+def get_upbit_change(
+    market
+):
+
+    df = get_upbit_ohlcv(
+        market,
+        60,
+        120
+    )
+
+    if df is None or len(df) < 50:
+
+        return None
+
+    df = df.copy()
+
+    df["datetime"] = pd.to_datetime(
+        df["candle_date_time_kst"]
+    )
+
+    df.set_index(
+        "datetime",
+        inplace=True
+    )
+
+    daily = (
+        df["trade_price"]
+        .resample(
+            "1D",
+            offset="9h"
+        )
+        .last()
+    )
+
+    if len(daily) < 5:
+
+        return None
+
+    result = []
+
+    for i in [-1, -2, -3]:
+
+        if daily.iloc[i - 1] == 0:
+
+            result.append(0)
+
+            continue
+
+        change = (
+            (
+                daily.iloc[i]
+                -
+                daily.iloc[i - 1]
+            )
+            /
+            daily.iloc[i - 1]
+            *
+            100
+        )
+
+        result.append(
+            round(float(change), 2)
+        )
+
+    return result
+
+
+# =========================================================
+# 변동률 표시
+# =========================================================
+
+def format_change(
+    changes
+):
+
+    if changes is None or len(changes) == 0:
+
+        return "N/A"
+
+    x = changes[0]
+
+    if x > 0:
+
+        color = "🟩"
+        sign = "+"
+
+    elif x < 0:
+
+        color = "🟥"
+        sign = ""
+
+    else:
+
+        color = "⬜️"
+        sign = ""
+
+    return f"""
+    <span class="change-item">
+
+        <span class="change-icon">
+            {color}
+        </span>
+
+        <span class="change-value">
+            {sign}{x:.2f}%
+        </span>
+
+    </span>
+    """
+
+
+# =========================================================
+# 눌림 경고 HTML
+# =========================================================
+
+def warning_html(
+    warning
+):
+
+    side, count = warning
+
+    if side == Trend.LONG:
+
+        return f"🚀({count})"
+
+
+    elif side == Trend.SHORT:
+
+        return f"🚨({count})"
+
+
+    return ""
+
+
+# =========================================================
+# 돌파 경고 HTML
+#
+# ★ 4H EMA 10-20 지속 캔들 수
+# =========================================================
+
+def breakout_html(
+    breakout
+):
+
+    side, count = breakout
+
+    if side == Trend.LONG:
+
+        return f"⚡({count})"
+
+
+    elif side == Trend.SHORT:
+
+        return f"💥({count})"
+
+
+    return ""
+
+
+# =========================================================
+# LONG / SHORT HTML
+# 경고가 있을 때만 표시
+# =========================================================
+
+def signal_html(
+    signal
+):
+
+    if signal == Trend.LONG:
+
+        return """
+        <span class="signal long-signal">
+            LONG
+        </span>
+        """
+
+    elif signal == Trend.SHORT:
+
+        return """
+        <span class="signal short-signal">
+            SHORT
+        </span>
+        """
+
+    return ""
+
+
+# =========================================================
+# EMA HTML
+# =========================================================
+
+def ema_html(
+    ema
+):
+
+    warning = warning_html(
+        ema.warning
+    )
+
+    breakout = breakout_html(
+        ema.breakout
+    )
+
+    signal = signal_html(
+        ema.signal
+    )
+
+    status_1h_10_20, status_1h_20_60_120, status_4h_10_20, status_4h_20_60_120 = [
+        format_ema_status(state, count)
+        for state, count in ema.runs
+    ]
+
+
+    return f"""
+
+<div class="ema-display">
+
+
+    <!-- LONG / SHORT -->
+
+    <div class="signal-period">
+
+        {signal}
+
+    </div>
+
+
+    <!-- 돌파 -->
+
+    <div class="ema-period breakout-period">
+
+        <span class="ema-warning breakout-warning">
+            {breakout}
+        </span>
+
+    </div>
+
+
+    <!-- 1H -->
+
+    <div class="ema-period">
+
+        <span class="ema-warning warning-size">
+            {warning}
+        </span>
+
+        <span class="ema-time">
+            1H
+        </span>
+
+        <span class="ema-status">
+            {status_1h_10_20}
+        </span>
+
+        <span class="ema-status">
+            {status_1h_20_60_120}
+        </span>
+
+    </div>
+
+
+    <!-- 4H -->
+
+    <div class="ema-period last">
+
+        <span class="ema-time">
+            4H
+        </span>
+
+        <span class="ema-status">
+            {status_4h_10_20}
+        </span>
+
+        <span class="ema-status">
+            {status_4h_20_60_120}
+        </span>
+
+    </div>
+
+
+</div>
+
+"""
+
+
+# =========================================================
+# 대시보드 행
+#
+# 원본 값만 보관 (거래대금 / 변동률 숫자, EMA 결과)
+# 거래대금 / 변동률 / 업비트 상장 표시는 렌더링할 때 변환
+# =========================================================
+
+class DashboardRow:
+
+    __slots__ = (
+        "rank",
+        "symbol",
+        "name",
+        "on_upbit",
+        "volume",
+        "changes",
+        "ema",
+        "stale",
+        "updated_at",
+        "cycle"
+    )
+
+    def __init__(
+        self,
+        rank,
+        symbol,
+        name,
+        volume,
+        changes,
+        ema,
+        on_upbit=False,
+        stale=False,
+        updated_at=None,
+        cycle=0
+    ):
+
+        self.rank = rank
+
+        self.symbol = symbol
+
+        self.name = name
+
+        self.on_upbit = on_upbit
+
+        self.volume = float(volume)
+
+        self.changes = (
+            tuple(changes)
+            if changes
+            else None
+        )
+
+        self.ema = ema
+
+        self.stale = stale
+
+        self.updated_at = updated_at
+
+        self.cycle = cycle
+
+    def copy(self):
+
+        row = DashboardRow.__new__(
+            DashboardRow
+        )
+
+        row.__setstate__(
+            self.__getstate__()
+        )
+
+        return row
+
+    def __getstate__(self):
+
+        return tuple(
+            getattr(self, name)
+            for name in DashboardRow.__slots__
+        )
+
+    def __setstate__(
+        self,
+        state
+    ):
+
+        for name, value in zip(DashboardRow.__slots__, state):
+
+            setattr(
+                self,
+                name,
+                value
+            )
+
+
+def row_name_html(
+    row
+):
+
+    if row.on_upbit:
+
+        return f"{row.name}(업비트)"
+
+    return row.name
+
+
+# =========================================================
+# 스냅샷 게시
+# =========================================================
+
+snapshot_lock = threading.RLock()
+
+
+def get_snapshot_rows(
+    exchange
+):
+
+    if exchange == "okx":
+
+        return latest_okx_data
+
+    return latest_upbit_data
+
+
+# 목록 전체를 새 리스트로 교체 (읽는 쪽은 항상 완성된 목록만 봄)
+def publish_snapshot(
+    exchange,
+    rows,
+    published_at=None
+):
+
+    global latest_okx_data
+    global latest_upbit_data
+
+    with snapshot_lock:
+
+        if exchange == "okx":
+
+            latest_okx_data = rows
+
+        else:
+
+            latest_upbit_data = rows
+
+        snapshot_versions[exchange] += 1
+
+        snapshot_published_at[exchange] = (
+            published_at or time.time()
+        )
+
+        # 지연 표시 없는 행의 계산 시각 중 가장 최근
+        fresh_at = max(
+            (
+                row.updated_at
+                for row in rows
+                if not row.stale
+                and row.updated_at is not None
+            ),
+            default=None
+        )
+
+        if fresh_at is not None and (
+            snapshot_fresh_at[exchange] is None
+            or
+            fresh_at > snapshot_fresh_at[exchange]
+        ):
+
+            snapshot_fresh_at[exchange] = fresh_at
+
+
+def publish_row(
+    exchange,
+    row,
+    order=None
+):
+
+    publish_rows(
+        exchange,
+        [row],
+        order
+    )
+
+
+# 일부 행만 교체한 사본을 게시 (copy-on-write)
+# order : 이번 주기 심볼 순서 (None 이면 현재 순서 유지)
+def publish_rows(
+    exchange,
+    new_rows,
+    order=None
+):
+
+    with snapshot_lock:
+
+        rows = get_snapshot_rows(
+            exchange
+        )
+
+        if order is None:
+
+            order = get_tracked_symbols(
+                rows
+            )
+
+        by_symbol = {
+
+            item.symbol: item
+
+            for item in rows
+
+        }
+
+        for row in new_rows:
+
+            by_symbol[row.symbol] = row
+
+        publish_snapshot(
+            exchange,
+            [
+                by_symbol[symbol]
+                for symbol in order
+                if symbol in by_symbol
+            ]
+        )
+
+
+# 주기 시작 : 새 순위대로 이전 행을 먼저 게시, 계산이 끝난 행부터 교체
+def start_snapshot_cycle(
+    exchange,
+    order,
+    previous_rows,
+    volume_map
+):
+
+    with snapshot_lock:
+
+        snapshot_cycles[exchange] += 1
+
+        publish_snapshot(
+            exchange,
+            [
+                reuse_previous_row(
+                    previous_rows,
+                    symbol,
+                    rank,
+                    volume_map[symbol],
+                    stale=previous_rows[symbol].stale
+                )
+                for rank, symbol in enumerate(order, 1)
+                if symbol in previous_rows
+            ]
+        )
+
+        return snapshot_cycles[exchange]
+
+
+# =========================================================
+# 이전 스냅샷 행 재사용
+#
+# 캔들 API 회로가 열려 있으면
+# 대기 없이 직전 스냅샷의 행을 순위 / 거래대금만 바꿔 사용
+# =========================================================
+
+def reuse_previous_row(
+    previous_rows,
+    symbol,
+    rank,
+    volume,
+    stale=True
+):
+
+    row = previous_rows[symbol].copy()
+
+    row.rank = rank
+
+    row.volume = float(volume)
+
+    row.stale = stale
+
+    return row
+
+
+# =========================================================
+# OKX TOP30
+# =========================================================
+
+# timeframes : 이번에 캔들을 동기화할 시간봉 (비우면 순위만 갱신)
+def update_okx(
+    timeframes=("1H", "4H")
+):
+
+    logging.info(
+        "OKX TOP30 시작"
+    )
+
+    symbols = get_all_okx_swap_symbols()
+
+    if not symbols:
+
+        logging.error(
+            "OKX 목록 없음 → 이전 데이터 유지"
+        )
+
+        return
+
+    usdt_krw, upbit_coin_set, _ = get_upbit_reference()
+
+    volume_map = get_okx_volume_map(
+        symbols,
+        usdt_krw
+    )
+
+    if not any(volume_map.values()):
+
+        logging.error(
+            "OKX 거래대금 없음 → 이전 데이터 유지"
+        )
+
+        return
+
+
+    top30 = sorted(
+        volume_map,
+        key=volume_map.get,
+        reverse=True
+    )[:30]
+
+
+    previous_rows = {
+
+        row.symbol: row
+
+        for row in latest_okx_data
+
+    }
+
+    cycle = start_snapshot_cycle(
+        "okx",
+        top30,
+        previous_rows,
+        volume_map
+    )
+
+
+    # 캔들 동기화가 끝난 심볼을 묶음 단위로 일괄 계산 후 바로 게시
+    for chunk in iter_sync_chunks(
+        iter_ema_candle_syncs(
+            "okx",
+            top30,
+            timeframes,
+            ("1H", "4H"),
+            previous_rows
+        )
+    ):
+
+        # 시간 예산 초과 / 캔들 동기화 실패 → 이전 행 유지 (지연 표시)
+        # 새로 들어온 심볼은 이전 행이 없으므로 지연 표시로 게시
+        expired = is_deadline_expired()
+
+        failed = {
+
+            symbol
+
+            for symbol, synced in chunk
+
+            if not synced or expired
+
+        }
+
+        reused = {
+
+            symbol
+
+            for symbol in failed
+
+            if symbol in previous_rows
+
+        }
+
+        ema_map = get_okx_ema_results([
+            symbol
+            for symbol, _ in chunk
+            if symbol not in reused
+        ])
+
+        rows = []
+
+        for symbol, _ in chunk:
+
+            rank = top30.index(symbol) + 1
+
+            # 캔들 API 회로 차단 → 이전 행 사용
+            if symbol in previous_rows and (
+                symbol in reused
+                or
+                is_circuit_open(
+                    get_okx_candles_url(
+                        symbol,
+                        "1H",
+                        200
+                    )
+                )
+            ):
+
+                rows.append(
+                    reuse_previous_row(
+                        previous_rows,
+                        symbol,
+                        rank,
+                        volume_map[symbol]
+                    )
+                )
+
+                continue
+
+
+            coin = symbol.replace(
+                "-USDT-SWAP",
+                ""
+            )
+
+
+            # 변동률은 1H 캔들 갱신 때만 다시 계산 (시간 예산 초과 후에는 조회 안 함)
+            stale = symbol in failed
+
+            if stale or is_deadline_expired():
+
+                changes = (
+                    previous_rows[symbol].changes
+                    if symbol in previous_rows
+                    else None
+                )
+
+                stale = stale or changes is None
+
+            elif (
+                "1H" in timeframes
+                or
+                symbol not in previous_rows
+            ):
+
+                changes = get_okx_change(
+                    symbol
+                )
+
+            else:
+
+                changes = previous_rows[symbol].changes
+
+
+            rows.append(
+                DashboardRow(
+                    rank,
+                    symbol,
+                    coin,
+                    volume_map[symbol],
+                    changes,
+                    ema_map[symbol],
+                    on_upbit=coin in upbit_coin_set,
+                    stale=stale,
+                    updated_at=None if stale else time.time(),
+                    cycle=cycle
+                )
+            )
+
+        publish_rows(
+            "okx",
+            rows,
+            top30
+        )
+
+
+    logging.info(
+        "OKX 완료"
+    )
+
+
+# =========================================================
+# 업비트 TOP30
+# =========================================================
+
+# timeframes : 이번에 캔들을 동기화할 시간봉 (비우면 순위만 갱신)
+def update_upbit(
+    timeframes=(60, 240)
+):
+
+    logging.info(
+        "업비트 TOP30 시작"
+    )
+
+    volume_map = get_upbit_volume_map()
+
+    if not volume_map:
+
+        return
+
+
+    top30 = sorted(
+        volume_map,
+        key=volume_map.get,
+        reverse=True
+    )[:30]
+
+
+    previous_rows = {
+
+        row.symbol: row
+
+        for row in latest_upbit_data
+
+    }
+
+    cycle = start_snapshot_cycle(
+        "upbit",
+        top30,
+        previous_rows,
+        volume_map
+    )
+
+
+    # 캔들 동기화가 끝난 심볼을 묶음 단위로 일괄 계산 후 바로 게시
+    for chunk in iter_sync_chunks(
+        iter_ema_candle_syncs(
+            "upbit",
+            top30,
+            timeframes,
+            (60, 240),
+            previous_rows
+        )
+    ):
+
+        # 시간 예산 초과 / 캔들 동기화 실패 → 이전 행 유지 (지연 표시)
+        # 새로 들어온 심볼은 이전 행이 없으므로 지연 표시로 게시
+        expired = is_deadline_expired()
+
+        failed = {
+
+            market
+
+            for market, synced in chunk
+
+            if not synced or expired
+
+        }
+
+        reused = {
+
+            market
+
+            for market in failed
+
+            if market in previous_rows
+
+        }
+
+        ema_map = get_upbit_ema_results(
+            [
+                market
+                for market, _ in chunk
+                if market not in reused
+            ],
+            timeframes
+        )
+
+        # 캔들 API 회로 차단 → 이전 행 사용
+        circuit_open = (
+            is_circuit_open(
+                "https://api.upbit.com/v1/candles/minutes/60"
+            )
+            or
+            is_circuit_open(
+                "https://api.upbit.com/v1/candles/minutes/240"
+            )
+        )
+
+        rows = []
+
+        for market, _ in chunk:
+
+            rank = top30.index(market) + 1
+
+            if market in previous_rows and (
+                market in reused
+                or
+                circuit_open
+            ):
+
+                rows.append(
+                    reuse_previous_row(
+                        previous_rows,
+                        market,
+                        rank,
+                        volume_map[market]
+                    )
+                )
+
+                continue
+
+
+            coin = market.replace(
+                "KRW-",
+                ""
+            )
+
+
+            # 변동률은 1H 캔들 갱신 때만 다시 계산 (시간 예산 초과 후에는 조회 안 함)
+            stale = market in failed
+
+            if stale or is_deadline_expired():
+
+                changes = (
+                    previous_rows[market].changes
+                    if market in previous_rows
+                    else None
+                )
+
+                stale = stale or changes is None
+
+            elif (
+                60 in timeframes
+                or
+                market not in previous_rows
+            ):
+
+                changes = get_upbit_change(
+                    market
+                )
+
+            else:
+
+                changes = previous_rows[market].changes
+
+
+            rows.append(
+                DashboardRow(
+                    rank,
+                    market,
+                    coin,
+                    volume_map[market],
+                    changes,
+                    ema_map[market],
+                    stale=stale,
+                    updated_at=None if stale else time.time(),
+                    cycle=cycle
+                )
+            )
+
+        publish_rows(
+            "upbit",
+            rows,
+            top30
+        )
+
+
+    logging.info(
+        "업비트 완료"
+    )
+
+
+# =========================================================
+# 전체 심볼 스크리너
+#
+# TOP30 뿐 아니라 OKX 전체 SWAP / 업비트 전체 KRW 마켓의
+# 눌림 / 돌파 신호를 매 주기 계산
+#
+# 캔들 : 스레드 풀로 저장소 동기화 (TOP30 은 이번 주기 캐시 재사용)
+# 계산 : 증분 EMA 상태 + 결과 메모 (새 심볼은 일괄 시드)
+# =========================================================
+
+def update_screener(
+    exchange
+):
+
+    if exchange == "okx":
+
+        symbols = get_all_okx_swap_symbols()
+
+        tracked = get_tracked_symbols(
+            latest_okx_data
+        )
+
+        timeframes = ("1H", "4H")
+
+    else:
+
+        symbols = get_upbit_markets()
+
+        tracked = get_tracked_symbols(
+            latest_upbit_data
+        )
+
+        timeframes = (60, 240)
+
+    if not symbols:
+
+        logging.error(
+            f"스크리너 목록 없음 {exchange} → 이전 결과 유지"
+        )
+
+        return
+
+    start = time.time()
+
+    # TOP30 : 이번 주기 캐시 사용
+    sync_candle_set(
+        exchange,
+        [
+            symbol
+            for symbol in symbols
+            if symbol in tracked
+        ],
+        timeframes
+    )
+
+    sync_candle_set(
+        exchange,
+        [
+            symbol
+            for symbol in symbols
+            if symbol not in tracked
+        ],
+        timeframes,
+        SCREENER_CANDLE_DEPTH
+    )
+
+    results = get_ema_results(
+        exchange,
+        symbols,
+        timeframes[0],
+        timeframes[1],
+        peek_live=exchange == "upbit"
+    )
+
+    latest_screener_data[exchange] = [
+
+        (symbol, results[symbol])
+
+        for symbol in symbols
+
+    ]
+
+    screener_updated_at[exchange] = time.time()
+
+    logging.info(
+        f"스크리너 {exchange} {len(symbols)}개 "
+        f"{time.time() - start:.1f}초"
+    )
+
+
+# kind : warning / breakout
+def get_screener_items(
+    exchange=None,
+    signal=None,
+    kind=None,
+    include_all=False
+):
+
+    items = []
+
+    for name in ("okx", "upbit"):
+
+        if exchange and exchange != name:
+
+            continue
+
+        for symbol, ema in latest_screener_data[name]:
+
+            if not include_all and ema.signal == Trend.NONE:
+
+                continue
+
+            if signal and ema.signal.name != signal.upper():
+
+                continue
+
+            if kind and (
+                kind not in ("warning", "breakout")
+                or
+                getattr(ema, kind)[0] == Trend.NONE
+            ):
+
+                continue
+
+            items.append({
+                "exchange": name,
+                "symbol": symbol,
+                **get_ema_data(ema)
+            })
+
+    return items
+
+
+# =========================================================
+# 실시간 수신 (웹소켓)
+#
+# OKX   : candle1H / candle4H (confirm=1 이면 마감)
+# 업비트 : candle.60m / candle.240m (다음 캔들 시작 시 마감), ticker
+#
+# 수신한 캔들은 캔들 저장소에 반영
+# 캔들이 마감되면 해당 심볼 행만 다시 계산해 즉시 게시
+# 연결 중에는 REST 캔들 조회 생략, 끊기면 REST 로 복귀
+# =========================================================
+
+# 업비트 ticker 24시간 거래대금
+upbit_stream_volumes = {}
+
+
+def get_tracked_symbols(
+    rows
+):
+
+    return [
+        row.symbol
+        for row in rows
+    ]
+
+
+def refresh_okx_row(
+    symbol
+):
+
+    for row in latest_okx_data:
+
+        if row.symbol != symbol:
+
+            continue
+
+        row = row.copy()
+
+        row.stale = False
+
+        row.updated_at = time.time()
+
+        changes = get_okx_change(
+            symbol
+        )
+
+        row.changes = (
+            tuple(changes)
+            if changes
+            else None
+        )
+
+        row.ema = get_okx_ema(
+            symbol
+        )
+
+        publish_row(
+            "okx",
+            row
+        )
+
+        logging.info(
+            f"OKX 캔들 마감 반영 {symbol}"
+        )
+
+        return
+
+
+def refresh_upbit_row(
+    market
+):
+
+    for row in latest_upbit_data:
+
+        if row.symbol != market:
+
+            continue
+
+        row = row.copy()
+
+        row.stale = False
+
+        row.updated_at = time.time()
+
+        changes = get_upbit_change(
+            market
+        )
+
+        row.changes = (
+            tuple(changes)
+            if changes
+            else None
+        )
+
+        row.ema = get_upbit_ema(
+            market
+        )
+
+        if market in upbit_stream_volumes:
+
+            row.volume = float(
+                upbit_stream_volumes[market]
+            )
+
+        publish_row(
+            "upbit",
+            row
+        )
+
+        logging.info(
+            f"업비트 캔들 마감 반영 {market}"
+        )
+
+        return
+
+
+def log_stream_refresh_error(
+    future
+):
+
+    if future.cancelled() or future.exception() is None:
+
+        return
+
+    logging.error(
+        f"캔들 마감 반영 오류:{future.exception()}"
+    )
+
+
+# 마감 반영은 REST 요청이 섞여 있어 웹소켓 루프 밖 스레드에서 실행
+def dispatch_stream_refresh(
+    refresh,
+    symbol
+):
+
+    future = asyncio.get_running_loop().run_in_executor(
+        None,
+        contextvars.copy_context().run,
+        refresh,
+        symbol
+    )
+
+    future.add_done_callback(
+        log_stream_refresh_error
+    )
+
+    return future
+
+
+def handle_okx_stream_message(
+    message
+):
+
+    if message == "pong":
+
+        return
+
+    data = json.loads(message)
+
+    arg = data.get("arg", {})
+
+    channel = arg.get("channel", "")
+
+    if not channel.startswith("candle") or "data" not in data:
+
+        return
+
+    symbol = arg["instId"]
+
+    closed = False
+
+    for row in data["data"]:
+
+        closed |= candle_store.apply_stream(
+            "okx",
+            symbol,
+            channel.replace("candle", ""),
+            row
+        )
+
+    if closed:
+
+        dispatch_stream_refresh(
+            refresh_okx_row,
+            symbol
+        )
+
+
+def handle_upbit_stream_message(
+    message
+):
+
+    data = json.loads(message)
+
+    kind = data.get("type", "")
+
+    market = data.get("code")
+
+    if kind == "ticker":
+
+        upbit_stream_volumes[market] = data[
+            "acc_trade_price_24h"
+        ]
+
+        return
+
+    if not kind.startswith("candle."):
+
+        return
+
+    row = dict(data)
+
+    row["market"] = market
+
+    if candle_store.apply_stream(
+        "upbit",
+        market,
+        int(kind.replace("candle.", "").replace("m", "")),
+        row
+    ):
+
+        dispatch_stream_refresh(
+            refresh_upbit_row,
+            market
+        )
+
+
+async def stream_exchange(
+    exchange,
+    url,
+    get_rows,
+    subscribe,
+    handle,
+    ping
+):
+
+    while True:
+
+        symbols = get_tracked_symbols(
+            get_rows()
+        )
+
+        if not symbols:
+
+            await asyncio.sleep(
+                STREAM_RECONNECT_DELAY
+            )
+
+            continue
+
+        try:
+
+            async with websockets.connect(
+                url,
+                ping_interval=None
+            ) as ws:
+
+                await ws.send(
+                    subscribe(symbols)
+                )
+
+                candle_store.set_streaming(
+                    exchange,
+                    symbols,
+                    True
+                )
+
+                logging.info(
+                    f"{exchange} 웹소켓 구독 {len(symbols)}개"
+                )
+
+                # 구독 심볼이 바뀌면 재연결
+                while get_tracked_symbols(get_rows()) == symbols:
+
+                    try:
+
+                        message = await asyncio.wait_for(
+                            ws.recv(),
+                            STREAM_CHECK_INTERVAL
+                        )
+
+                    except asyncio.TimeoutError:
+
+                        await ws.send(ping)
+
+                        continue
+
+                    try:
+
+                        handle(message)
+
+                    except Exception as e:
+
+                        logging.error(
+                            f"{exchange} 웹소켓 처리 오류:{e}"
+                        )
+
+        except Exception as e:
+
+            logging.error(
+                f"{exchange} 웹소켓 오류:{e}"
+            )
+
+        finally:
+
+            candle_store.set_streaming(
+                exchange,
+                symbols,
+                False
+            )
+
+        await asyncio.sleep(
+            STREAM_RECONNECT_DELAY
+        )
+
+
+def subscribe_okx_stream(
+    symbols
+):
+
+    return json.dumps({
+
+        "op":
+            "subscribe",
+
+        "args":
+            [
+                {
+                    "channel": f"candle{bar}",
+                    "instId": symbol
+                }
+                for symbol in symbols
+                for bar in ["1H", "4H"]
+            ]
+
+    })
+
+
+def subscribe_upbit_stream(
+    symbols
+):
+
+    return json.dumps([
+
+        {"ticket": str(uuid.uuid4())},
+
+        {"type": "ticker", "codes": symbols},
+
+        {"type": "candle.60m", "codes": symbols},
+
+        {"type": "candle.240m", "codes": symbols},
+
+        {"format": "DEFAULT"}
+
+    ])
+
+
+async def stream_ingest():
+
+    await asyncio.gather(
+
+        stream_exchange(
+            "okx",
+            OKX_WS_URL,
+            lambda: latest_okx_data,
+            subscribe_okx_stream,
+            handle_okx_stream_message,
+            "ping"
+        ),
+
+        stream_exchange(
+            "upbit",
+            UPBIT_WS_URL,
+            lambda: latest_upbit_data,
+            subscribe_upbit_stream,
+            handle_upbit_stream_message,
+            "PING"
+        )
+
+    )
+
+
+def start_stream_ingest():
+
+    threading.Thread(
+        target=asyncio.run,
+        args=(stream_ingest(),),
+        daemon=True
+    ).start()
+
+
+# =========================================================
+# 모의 웹소켓 서버
+#
+# 오프라인 테스트용
+# OKX / 업비트 구독 요청을 구분해 캔들을 흉내내어 전송
+# MOCK_STREAM_TICKS 회 전송마다 캔들 1개 마감
+#
+# 실행
+#   python -c "import main; main.run_mock_stream_server()"
+# 이후 OKX_WS_URL / UPBIT_WS_URL 을 ws://127.0.0.1:8765 로 설정
+# =========================================================
+
+MOCK_STREAM_INTERVAL = 1
+
+MOCK_STREAM_TICKS = 5
+
+
+def mock_okx_candle(
+    ts,
+    price,
+    confirmed
+):
+
+    return [
+        str(ts),
+        str(price),
+        str(price),
+        str(price),
+        str(price),
+        "1",
+        "1",
+        str(price),
+        "1" if confirmed else "0"
+    ]
+
+
+def mock_upbit_candle(
+    kind,
+    market,
+    ts,
+    price
+):
+
+    utc = datetime.fromtimestamp(
+        ts / 1000,
+        timezone.utc
+    )
+
+    return {
+        "type": kind,
+        "code": market,
+        "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+        "candle_date_time_kst": (
+            utc + pd.Timedelta(hours=9)
+        ).strftime("%Y-%m-%dT%H:%M:%S"),
+        "opening_price": price,
+        "high_price": price,
+        "low_price": price,
+        "trade_price": price,
+        "candle_acc_trade_volume": 1.0,
+        "candle_acc_trade_price": price,
+        "timestamp": ts
+    }
+
+
+async def mock_stream_handler(
+    websocket,
+    path=None
+):
+
+    request = json.loads(
+        await websocket.recv()
+    )
+
+    if isinstance(request, dict):
+
+        streams = [
+            (
+                "okx",
+                arg["channel"],
+                arg["instId"],
+                CANDLE_INTERVALS[
+                    ("okx", arg["channel"].replace("candle", ""))
+                ]
+            )
+            for arg in request["args"]
+        ]
+
+    else:
+
+        streams = [
+            (
+                "upbit",
+                item["type"],
+                code,
+                int(item["type"][7:-1]) * 60_000
+            )
+            for item in request[1:]
+            if item.get("type", "").startswith("candle.")
+            for code in item["codes"]
+        ]
+
+    now = int(time.time() * 1000)
+
+    state = {
+        key[1:3]: [now // key[3] * key[3], 100.0]
+        for key in streams
+    }
+
+    tick = 0
+
+    while True:
+
+        await asyncio.sleep(
+            MOCK_STREAM_INTERVAL
+        )
+
+        tick += 1
+
+        closing = tick % MOCK_STREAM_TICKS == 0
+
+        for exchange, kind, symbol, interval in streams:
+
+            candle = state[(kind, symbol)]
+
+            candle[1] = round(
+                candle[1] * (1 + random.uniform(-0.01, 0.01)),
+                4
+            )
+
+            if exchange == "okx":
+
+                await websocket.send(json.dumps({
+                    "arg": {"channel": kind, "instId": symbol},
+                    "data": [
+                        mock_okx_candle(
+                            candle[0],
+                            candle[1],
+                            closing
+                        )
+                    ]
+                }))
+
+            else:
+
+                await websocket.send(json.dumps(
+                    mock_upbit_candle(
+                        kind,
+                        symbol,
+                        candle[0],
+                        candle[1]
+                    )
+                ).encode())
+
+            if closing:
+
+                candle[0] += interval
+
+
+async def serve_mock_stream(
+    host,
+    port
+):
+
+    async with websockets.serve(
+        mock_stream_handler,
+        host,
+        port
+    ):
+
+        await asyncio.Future()
+
+
+def run_mock_stream_server(
+    host="127.0.0.1",
+    port=8765
+):
+
+    asyncio.run(
+        serve_mock_stream(
+            host,
+            port
+        )
+    )
+
+
+# =========================================================
+# 재시작용 디스크 캐시
+#
+# 주기마다 캔들 버퍼와 마지막 스냅샷을 한 파일로 저장
+# 캔들은 열 단위 numpy 배열(int64 / float64)로 압축 보관
+# 시작 시 즉시 복원해 바로 서비스하고
+# 이후 주기에서 마지막 캔들 이후분만 갱신
+# =========================================================
+
+OKX_CANDLE_FIELDS = [
+    "o",
+    "h",
+    "l",
+    "c",
+    "vol",
+    "volCcy",
+    "volCcyQuote"
+]
+
+UPBIT_CANDLE_FIELDS = [
+    "opening_price",
+    "high_price",
+    "low_price",
+    "trade_price",
+    "candle_acc_trade_price",
+    "candle_acc_trade_volume"
+]
+
+
+def pack_candle_rows(
+    exchange,
+    rows
+):
+
+    if exchange == "okx":
+
+        ints = np.array(
+            [[int(row[0])] for row in rows],
+            dtype=np.int64
+        )
+
+        floats = np.array(
+            [[float(x) for x in row[1:8]] for row in rows],
+            dtype=np.float64
+        )
+
+    else:
+
+        ints = np.array(
+            [
+                [
+                    get_candle_ts(exchange, row),
+                    int(row.get("timestamp") or 0)
+                ]
+                for row in rows
+            ],
+            dtype=np.int64
+        )
+
+        floats = np.array(
+            [
+                [float(row[field]) for field in UPBIT_CANDLE_FIELDS]
+                for row in rows
+            ],
+            dtype=np.float64
+        )
+
+    return ints, floats
+
+
+def unpack_candle_rows(
+    exchange,
+    symbol,
+    timeframe,
+    ints,
+    floats
+):
+
+    if exchange == "okx":
+
+        return [
+            [str(int(i[0]))]
+            + [str(x) for x in f]
+            + ["1"]
+            for i, f in zip(ints.tolist(), floats.tolist())
+        ]
+
+    rows = []
+
+    for i, f in zip(ints.tolist(), floats.tolist()):
+
+        utc = datetime.fromtimestamp(
+            i[0] / 1000,
+            timezone.utc
+        )
+
+        row = {
+            "market": symbol,
+            "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+            "candle_date_time_kst": (
+                utc + timedelta(hours=9)
+            ).strftime("%Y-%m-%dT%H:%M:%S"),
+            "timestamp": i[1],
+            "unit": timeframe
+        }
+
+        row.update(
+            zip(UPBIT_CANDLE_FIELDS, f)
+        )
+
+        rows.append(row)
+
+    return rows
+
+
+warm_cache_lock = threading.Lock()
+
+# 저장하는 스냅샷 행 형식 (DashboardRow 구조가 바뀌면 올림)
+ROW_FORMAT = 2
+
+# 저장하는 캔들 형식 (다르면 파일 전체 무시)
+# 2 : (거래소, 심볼, 시간봉, 정수 배열, 실수 배열, 깊이, generation)
+CANDLE_FORMAT = 2
+
+
+def save_warm_cache():
+
+    try:
+
+        candles = [
+            (exchange, symbol, timeframe)
+            +
+            pack_candle_rows(exchange, rows)
+            +
+            (depth, generation)
+            for exchange, symbol, timeframe, rows, depth, generation
+            in candle_store.export()
+        ]
+
+        payload = pickle.dumps(
+            {
+                "saved_at": time.time(),
+                "row_format": ROW_FORMAT,
+                "candle_format": CANDLE_FORMAT,
+                "okx": latest_okx_data,
+                "upbit": latest_upbit_data,
+                "candles": candles
+            },
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+        os.makedirs(
+            os.path.dirname(WARM_CACHE_PATH),
+            exist_ok=True
+        )
+
+        # 쓰는 도중 종료돼도 이전 파일 유지
+        tmp_path = WARM_CACHE_PATH + ".tmp"
+
+        # 두 거래소 스레드가 동시에 저장할 수 있음
+        with warm_cache_lock:
+
+            with open(tmp_path, "wb") as f:
+
+                f.write(payload)
+
+            os.replace(
+                tmp_path,
+                WARM_CACHE_PATH
+            )
+
+    except Exception as e:
+
+        logging.error(
+            f"디스크 캐시 저장 오류:{e}"
+        )
+
+
+# 스냅샷만 즉시 복원, 캔들은 압축 상태로 반환
+def load_warm_cache():
+
+    if not os.path.exists(WARM_CACHE_PATH):
+
+        return None
+
+    try:
+
+        with open(WARM_CACHE_PATH, "rb") as f:
+
+            payload = pickle.load(f)
+
+        if payload.get("candle_format") != CANDLE_FORMAT:
+
+            logging.info(
+                "디스크 캐시 형식이 달라 무시"
+            )
+
+            return None
+
+        for exchange in ["okx", "upbit"]:
+
+            # 행 형식이 바뀐 예전 캐시는 캔들만 사용
+            if (
+                payload[exchange]
+                and
+                payload.get("row_format") == ROW_FORMAT
+            ):
+
+                publish_snapshot(
+                    exchange,
+                    payload[exchange],
+                    payload["saved_at"]
+                )
+
+    except Exception as e:
+
+        logging.error(
+            f"디스크 캐시 복원 오류:{e}"
+        )
+
+        return None
+
+    logging.info(
+        f"디스크 캐시 스냅샷 복원 "
+        f"({time.time() - payload['saved_at']:.0f}초 전 저장)"
+    )
+
+    return payload["candles"]
+
+
+def restore_warm_candles(
+    candles
+):
+
+    started = time.perf_counter()
+
+    for exchange, symbol, timeframe, ints, floats, depth, generation in candles:
+
+        candle_store.restore(
+            exchange,
+            symbol,
+            timeframe,
+            unpack_candle_rows(
+                exchange,
+                symbol,
+                timeframe,
+                ints,
+                floats
+            ),
+            depth,
+            generation
+        )
+
+    logging.info(
+        f"디스크 캐시 캔들 복원 {len(candles)}개 "
+        f"{(time.perf_counter() - started) * 1000:.0f}ms"
+    )
+
+
+# =========================================================
+# 거래소별 업데이트
+#
+# OKX / 업비트는 각자 스레드와 스케줄러에서 따로 실행
+# 한쪽이 느리거나 실패해도 다른 쪽 갱신 / 게시는 그대로 진행
+#
+# 순위   : 거래대금만 다시 조회, 기존 심볼은 저장된 EMA 상태 사용
+#          (OKX 캔들 합산 거래대금은 정시마다 1회만 조회)
+# 1H 마감 : TOP30 1H 캔들 동기화 → 1H 지표 + 변동률
+#          (변동률의 일 경계 09:00 KST = 00:00 UTC 는 1H 마감과 겹침)
+# 4H 마감 : UTC 4시간 경계에서 4H 캔들도 동기화
+# =========================================================
+
+EXCHANGE_TIMEFRAMES = {
+    "okx": ("1H", "4H"),
+    "upbit": (60, 240)
+}
+
+
+def update_exchange(
+    exchange,
+    timeframes
+):
+
+    try:
+
+        with candle_cache.cycle(exchange):
+
+            if exchange == "okx":
+
+                update_okx(timeframes)
+
+            else:
+
+                update_upbit(timeframes)
+
+            if SCREENER_ENABLED:
+
+                run_screener(exchange)
+
+        collector_errors[exchange] = None
+
+        return True
+
+    except Exception as e:
+
+        logging.error(
+            f"{exchange} 갱신 오류:{e}"
+        )
+
+        collector_errors[exchange] = (
+            time.time(),
+            str(e)
+        )
+
+        return False
+
+
+# =========================================================
+# 거래소별 갱신 작업
+#
+# 1회 실행마다 CYCLE_DEADLINE 시간 예산 적용
+# 실행 중 들어온 요청은 줄 세우지 않고 1건으로 병합
+# (시간봉 합집합) 해서 끝난 직후 1회만 이어서 실행
+# 실행 시간 / 예산 초과 / 병합 횟수 기록
+# =========================================================
+
+def merge_timeframes(
+    exchange,
+    first,
+    second
+):
+
+    merged = set(first or ()) | set(second or ())
+
+    return tuple(
+        timeframe
+        for timeframe in EXCHANGE_TIMEFRAMES[exchange]
+        if timeframe in merged
+    )
+
+
+class ExchangeJob:
+
+    def __init__(
+        self,
+        exchange
+    ):
+
+        self.exchange = exchange
+
+        self.lock = threading.Lock()
+
+        self.running = False
+
+        # 실행 중 들어온 요청 (병합된 시간봉)
+        self.pending = None
+
+        self.runs = 0
+        self.coalesced = 0
+        self.overruns = 0
+        self.failures = 0
+
+        self.last_duration = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    # wait : 현재 스레드에서 바로 실행 (첫 수집)
+    def request(
+        self,
+        timeframes,
+        wait=False
+    ):
+
+        with self.lock:
+
+            if self.running:
+
+                self.pending = merge_timeframes(
+                    self.exchange,
+                    self.pending,
+                    timeframes
+                )
+
+                self.coalesced += 1
+
+                logging.info(
+                    f"{self.exchange} 갱신 진행 중 → 요청 병합 {self.pending}"
+                )
+
+                return
+
+            self.running = True
+
+        if wait:
+
+            self.run(timeframes)
+
+            return
+
+        threading.Thread(
+            target=self.run,
+            args=(timeframes,),
+            name=f"update-{self.exchange}",
+            daemon=True
+        ).start()
+
+    def run(
+        self,
+        timeframes
+    ):
+
+        while True:
+
+            started = time.time()
+
+            with deadline_budget(CYCLE_DEADLINE):
+
+                ok = update_exchange(
+                    self.exchange,
+                    timeframes
+                )
+
+                expired = is_deadline_expired()
+
+            duration = time.time() - started
+
+            # 캔들이 갱신된 경우만 디스크 캐시 저장
+            if ok and timeframes:
+
+                save_warm_cache()
+
+            if expired:
+
+                logging.error(
+                    f"{self.exchange} 시간 예산 초과 {duration:.0f}초 "
+                    f"→ 남은 심볼 이전 값 유지"
+                )
+
+            with self.lock:
+
+                self.runs += 1
+
+                self.overruns += int(expired)
+
+                self.failures += int(not ok)
+
+                self.last_duration = duration
+
+                self.max_duration = max(
+                    self.max_duration,
+                    duration
+                )
+
+                self.total_duration += duration
+
+                timeframes = self.pending
+
+                self.pending = None
+
+                if timeframes is None:
+
+                    self.running = False
+
+                    return
+
+    def stats(self):
+
+        with self.lock:
+
+            return {
+
+                "running":
+                    self.running,
+
+                "runs":
+                    self.runs,
+
+                "coalesced":
+                    self.coalesced,
+
+                "overruns":
+                    self.overruns,
+
+                "failures":
+                    self.failures,
+
+                "last_duration":
+                    round(self.last_duration, 2)
+                    if self.last_duration is not None
+                    else None,
+
+                "max_duration":
+                    round(self.max_duration, 2),
+
+                "avg_duration":
+                    round(self.total_duration / self.runs, 2)
+                    if self.runs
+                    else None
+
+            }
+
+
+exchange_jobs = {
+    "okx": ExchangeJob("okx"),
+    "upbit": ExchangeJob("upbit")
+}
+
+
+def refresh_ranking(
+    exchange
+):
+
+    logging.info(
+        f"{exchange} 순위 갱신 요청"
+    )
+
+    exchange_jobs[exchange].request(
+        ()
+    )
+
+
+# UTC 정시 + CANDLE_SETTLE_DELAY 초 중 now 이후 가장 가까운 시각
+# epoch 기준으로 계산해 서버 시간대와 무관 (30 / 45분 시차 포함)
+def get_next_candle_close(
+    now=None
+):
+
+    if now is None:
+
+        now = time.time()
+
+    return (
+        (now - CANDLE_SETTLE_DELAY) // 3600 + 1
+    ) * 3600 + CANDLE_SETTLE_DELAY
+
+
+# close_at : 이번 마감 반영 예정 시각 (4H 마감 여부 판단용)
+def refresh_candle_close(
+    exchange,
+    close_at=None
+):
+
+    if close_at is None:
+
+        close_at = time.time()
+
+    timeframes = EXCHANGE_TIMEFRAMES[exchange]
+
+    if int(close_at // 3600) % 4 != 0:
+
+        timeframes = timeframes[:1]
+
+    logging.info(
+        f"{exchange} 캔들 마감 갱신 요청 {timeframes}"
+    )
+
+    exchange_jobs[exchange].request(
+        timeframes
+    )
+
+
+# 스크리너 실패는 TOP30 갱신에 영향 없음
+def run_screener(
+    exchange
+):
+
+    try:
+
+        update_screener(exchange)
+
+    except Exception as e:
+
+        logging.error(
+            f"스크리너 오류 {exchange}:{e}"
+        )
+
+
+# =========================================================
+# 거래소별 수집 스레드
+#
+# 첫 수집을 서버 시작과 분리
+# 디스크 캐시가 있으면 캔들 복원 후 이후분만 갱신
+# 첫 수집이 끝난 뒤 거래소 전용 스케줄러 시작
+# =========================================================
+
+def run_collector(
+    exchange,
+    candles
+):
+
+    if candles is not None:
+
+        restore_warm_candles([
+            candle
+            for candle in candles
+            if candle[0] == exchange
+        ])
+
+    # 프로세스 풀은 첫 수집 전에 미리 생성
+    get_indicator_pool()
+
+    logging.info(
+        f"{exchange} 첫 수집 시작"
+    )
+
+    exchange_jobs[exchange].request(
+        EXCHANGE_TIMEFRAMES[exchange],
+        wait=True
+    )
+
+    exchange_scheduler = schedule.Scheduler()
+
+    exchange_scheduler.every(
+        RANKING_REFRESH[exchange]
+    ).minutes.do(
+        refresh_ranking,
+        exchange
+    )
+
+    # 캔들 마감은 schedule 의 서버 현지 시각 대신 UTC 기준으로 직접 계산
+    next_close = get_next_candle_close()
+
+    while True:
+
+        exchange_scheduler.run_pending()
+
+        if time.time() >= next_close:
+
+            refresh_candle_close(
+                exchange,
+                next_close
+            )
+
+            next_close = get_next_candle_close()
+
+        time.sleep(1)
+
+
+def start_collectors(
+    candles
+):
+
+    for exchange in ("okx", "upbit"):
+
+        thread = threading.Thread(
+            target=run_collector,
+            args=(exchange, candles),
+            name=f"collector-{exchange}",
+            daemon=True
+        )
+
+        collector_threads[exchange] = thread
+
+        thread.start()
+
+
+# =========================================================
+# 스냅샷 상태
+# =========================================================
+
+def format_kst_time(
+    timestamp
+):
+
+    return datetime.fromtimestamp(
+        timestamp,
+        timezone(timedelta(hours=9))
+    ).strftime(
+        "%m-%d %H:%M"
+    )
+
+
+def get_readiness():
+
+    now = time.time()
+
+    exchanges = {
+
+        exchange: {
+
+            "published":
+                published_at is not None,
+
+            # 게시됐고 마지막 새 계산이 SNAPSHOT_STALE_AFTER 이내
+            "fresh":
+                published_at is not None
+                and
+                not is_snapshot_delayed(exchange),
+
+            # 마지막으로 새로 계산된 데이터 기준
+            "age_seconds":
+                round(now - snapshot_fresh_at[exchange], 1)
+                if snapshot_fresh_at[exchange] is not None
+                else None,
+
+            "last_error":
+                collector_errors[exchange]
+
+        }
+
+        for exchange, published_at in snapshot_published_at.items()
+
+    }
+
+    # OKX 가 쓰는 업비트 환율 / 마켓 목록
+    exchanges["okx"]["upbit_reference_stale"] = (
+        is_upbit_reference_stale()
+    )
+
+    return {
+
+        "ready":
+            any(
+                x["fresh"]
+                for x in exchanges.values()
+            ),
+
+        "exchanges":
+            exchanges
+
+    }
+
+
+def get_dashboard_refresh():
+
+    if None in snapshot_published_at.values():
+
+        return DASHBOARD_WARMUP_REFRESH
+
+    return DASHBOARD_REFRESH
+
+
+def is_snapshot_delayed(
+    exchange
+):
+
+    fresh_at = snapshot_fresh_at[exchange]
+
+    return (
+        snapshot_published_at[exchange] is not None
+        and
+        (
+            fresh_at is None
+            or
+            time.time() - fresh_at > SNAPSHOT_STALE_AFTER
+        )
+    )
+
+
+def snapshot_status_html(
+    exchange
+):
+
+    published_at = snapshot_published_at[exchange]
+
+    if published_at is None:
+
+        return """
+<p class="snapshot-status">
+⏳ 첫 데이터 수집 중입니다
+</p>
+"""
+
+    fresh_at = snapshot_fresh_at[exchange]
+
+    if fresh_at is None:
+
+        return """
+<p class="snapshot-status">
+⚠️ 이전 데이터 (갱신 지연)
+</p>
+"""
+
+    if is_snapshot_delayed(exchange):
+
+        return f"""
+<p class="snapshot-status">
+⚠️ {format_kst_time(fresh_at)} 기준 데이터 (갱신 지연)
+</p>
+"""
+
+    return f"""
+<p class="snapshot-status">
+🕒 {format_kst_time(fresh_at)} 갱신
+</p>
+"""
+
+
+# 시간 예산 초과 / 조회 실패로 이전 값을 유지 중인 행
+def stale_html(
+    item
+):
+
+    if item.stale:
+
+        return '<span class="stale-mark" title="이전 값 유지">⏳</span>'
+
+    return ""
+
+
+# 행별 계산 시각 + 이번 주기에 새로 계산된 행 표시
+def row_age_html(
+    item,
+    exchange
+):
+
+    updated_at = item.updated_at
+
+    if updated_at is None:
+
+        return ""
+
+    html = ""
+
+    if (
+        not item.stale
+        and
+        item.cycle == snapshot_cycles[exchange]
+    ):
+
+        html += '<span class="fresh-mark" title="이번 주기 갱신">●</span>'
+
+    html += f'<span class="row-time">{format_kst_time(updated_at)}</span>'
+
+    return html
+
+
+# =========================================================
+# 웹 대시보드 (렌더링)
+# =========================================================
+
+def render_dashboard():
+
+    html = f"""
+
+<html>
+
+<head>
+
+<meta
+    http-equiv="refresh"
+    content="{get_dashboard_refresh()}"
+>
+
+"""
+
+    html += """
+<title>
+OKX + UPBIT
+</title>
+
+
+<style>
+
+/* =====================================================
+   전체
+   ===================================================== */
+
+body{
+
+    background:#111;
+
+    color:white;
+
+    font-family:Arial;
+
+    padding:20px;
+
+}
+
+
+/* =====================================================
+   테이블
+   ===================================================== */
+
+table{
+
+    width:auto;
+
+    border-collapse:collapse;
+
+    border:1px solid #444;
+
+}
+
+
+/* =====================================================
+   헤더
+   ===================================================== */
+
+th{
+
+    background:#333;
+
+    padding:10px 12px;
+
+    border-right:2px solid #555;
+
+    white-space:nowrap;
+
+}
+
+
+th:last-child{
+
+    border-right:none;
+
+}
+
+
+/* =====================================================
+   일반 셀
+   ===================================================== */
+
+td{
+
+    padding:8px 12px;
+
+    border-bottom:1px solid #444;
+
+    border-right:2px solid #333;
+
+    text-align:center;
+
+    white-space:nowrap;
+
+}
+
+
+td:last-child{
+
+    border-right:none;
+
+}
+
+
+/* =====================================================
+   순위
+   ===================================================== */
+
+.rank-cell{
+
+    width:45px;
+
+    min-width:45px;
+
+}
+
+
+/* =====================================================
+   코인
+   ===================================================== */
+
+.coin-cell{
+
+    min-width:90px;
+
+    text-align:left;
+
+    font-weight:bold;
+
+}
+
+
+/* =====================================================
+   거래대금
+   ===================================================== */
+
+.volume-cell{
+
+    min-width:100px;
+
+    padding-left:15px;
+
+    padding-right:15px;
+
+    text-align:right;
+
+    white-space:nowrap;
+
+}
+
+
+/* =====================================================
+   변동률
+   ===================================================== */
+
+.change-cell{
+
+    min-width:105px;
+
+    padding-left:12px;
+
+    padding-right:12px;
+
+    white-space:nowrap;
+
+}
+
+
+.change-item{
+
+    display:inline-flex;
+
+    align-items:center;
+
+    width:95px;
+
+    min-width:95px;
+
+    box-sizing:border-box;
+
+}
+
+
+.change-icon{
+
+    display:inline-block;
+
+    width:28px;
+
+    min-width:28px;
+
+    text-align:center;
+
+}
+
+
+.change-value{
+
+    display:inline-block;
+
+    width:67px;
+
+    min-width:67px;
+
+    text-align:right;
+
+    font-family:monospace;
+
+}
+
+
+/* =====================================================
+   EMA 전체
+   ===================================================== */
+
+.ema-display{
+
+    display:flex;
+
+    align-items:center;
+
+    height:40px;
+
+    white-space:nowrap;
+
+    font-family:monospace;
+
+    padding:0 5px;
+
+}
+
+
+/* =====================================================
+   LONG / SHORT
+   ===================================================== */
+
+.signal-period{
+
+    width:70px;
+
+    min-width:70px;
+
+    text-align:center;
+
+}
+
+
+.signal{
+
+    display:inline-block;
+
+    font-weight:bold;
+
+    font-size:16px;
+
+    padding:4px 7px;
+
+    border-radius:4px;
+
+}
+
+
+.long-signal{
+
+    color:#00ff66;
+
+    border:1px solid #00ff66;
+
+}
+
+
+.short-signal{
+
+    color:#ff4444;
+
+    border:1px solid #ff4444;
+
+}
+
+
+/* =====================================================
+   EMA 시간봉 그룹
+   ===================================================== */
+
+.ema-period{
+
+    display:flex;
+
+    align-items:center;
+
+    padding:0 10px;
+
+    border-right:2px solid #555;
+
+}
+
+
+.ema-period.last{
+
+    border-right:none;
+
+}
+
+
+/* =====================================================
+   돌파
+   ===================================================== */
+
+.breakout-period{
+
+    min-width:65px;
+
+    padding-left:5px;
+
+    padding-right:5px;
+
+}
+
+
+.breakout-warning{
+
+    font-size:24px;
+
+    line-height:28px;
+
+}
+
+
+/* =====================================================
+   눌림 경고
+   ===================================================== */
+
+.ema-warning{
+
+    display:inline-block;
+
+    width:50px;
+
+    min-width:50px;
+
+    text-align:center;
+
+}
+
+
+.warning-size{
+
+    font-size:24px;
+
+    line-height:28px;
+
+}
+
+
+/* =====================================================
+   시간봉
+   ===================================================== */
+
+.ema-time{
+
+    display:inline-block;
+
+    width:40px;
+
+    min-width:40px;
+
+    text-align:left;
+
+    font-weight:bold;
+
+}
+
+
+/* =====================================================
+   EMA 상태
+   ===================================================== */
+
+.ema-status{
+
+    display:inline-block;
+
+    width:70px;
+
+    min-width:70px;
+
+    text-align:left;
+
+}
+
+
+/* =====================================================
+   섹션
+   ===================================================== */
+
+.section-title{
+
+    margin-top:25px;
+
+    padding:10px 12px;
+
+    background:#222;
+
+    border-left:5px solid #666;
+
+}
+
+
+/* =====================================================
+   수집 상태
+   ===================================================== */
+
+.snapshot-status{
+
+    padding:8px 12px;
+
+    color:#ffcc00;
+
+}
+
+.stale-mark{
+
+    margin-left:4px;
+
+    font-size:12px;
+
+}
+
+.fresh-mark{
+
+    margin-left:4px;
+
+    font-size:9px;
+
+    color:#00ff66;
+
+}
+
+.row-time{
+
+    display:block;
+
+    font-size:10px;
+
+    color:#94a3b8;
+
+}
+
+
+/* =====================================================
+   행 hover
+   ===================================================== */
+
+tr:hover{
+
+    background:#1d1d1d;
+
+}
+
+</style>
+
+</head>
+
+
+<body>
+
+
+<h2>
+📊 암호화폐 실시간 분석
+</h2>
+
+
+<p>
+1시간 EMA · 4시간 추세 · 눌림 · 돌파 · LONG / SHORT
+</p>
+
+
+<h2 class="section-title">
+🏆 OKX 선물 거래대금 TOP30
+</h2>
+
+"""
+
+    html += snapshot_status_html(
+        "okx"
+    )
+
+    html += """
+
+<table>
+
+<tr>
+
+<th class="rank-cell">
+순위
+</th>
+
+<th>
+코인
+</th>
+
+<th>
+거래대금
+</th>
+
+<th>
+오늘
+</th>
+
+<th>
+EMA 상태
+</th>
+
+</tr>
+
+"""
+
+
+    # =====================================================
+    # OKX
+    # =====================================================
+
+    for item in latest_okx_data:
+
+        html += f"""
+
+<tr>
+
+<td class="rank-cell">
+{item.rank}
+</td>
+
+<td class="coin-cell">
+{row_name_html(item)}{stale_html(item)}{row_age_html(item, "okx")}
+</td>
+
+<td class="volume-cell">
+{format_volume(item.volume)}
+</td>
+
+<td class="change-cell">
+{format_change(item.changes)}
+</td>
+
+<td>
+
+{ema_html(
+    item.ema
+)}
+
+</td>
+
+</tr>
+
+"""
+
+
+    html += """
+
+</table>
 
 
-    rows = []
+<h2 class="section-title">
+🏆 업비트 현물 거래대금 TOP30
+</h2>
 
-    rank = 1
+"""
 
+    html += snapshot_status_html(
+        "upbit"
+    )
 
-    for market in top30:
+    html += """
 
-        coin = market.replace(
-            "KRW-",
-            ""
-        )
+<table>
 
+<tr>
 
-        changes = get_upbit_change(
-            market
-        )
+<th class="rank-cell">
+순위
+</th>
 
+<th>
+코인
+</th>
 
-        ema = get_upbit_ema(
-            market
-        )
+<th>
+거래대금
+</th>
 
+<th>
+오늘
+</th>
 
-        rows.append({
+<th>
+EMA 상태
+</th>
 
-            "rank":
-                rank,
+</tr>
 
-            "name":
-                coin,
+"""
 
-            "change":
-                format_change(
-                    changes
-                ),
 
-            "volume":
-                format_volume(
-                    volume_map[market]
-                ),
+    # =====================================================
+    # 업비트
+    # =====================================================
 
-            "ema":
-                ema
+    for item in latest_upbit_data:
 
-        })
+        html += f"""
 
+<tr>
 
-        rank += 1
+<td class="rank-cell">
+{item.rank}
+</td>
 
+<td class="coin-cell">
+{row_name_html(item)}{stale_html(item)}{row_age_html(item, "upbit")}
+</td>
 
-    latest_upbit_data = rows
+<td class="volume-cell">
+{format_volume(item.volume)}
+</td>
 
+<td class="change-cell">
+{format_change(item.changes)}
+</td>
 
-    logging.info(
-        "업비트 완료"
-    )
+<td>
 
+{ema_html(
+    item.ema
+)}
 
-# =========================================================
-# 전체 업데이트
-# =========================================================
+</td>
 
-def update_dashboard():
+</tr>
 
-    logging.info(
-        "전체 조회 시작"
-    )
+"""
 
-    update_okx()
 
-    update_upbit()
+    html += """
 
-    logging.info(
-        "전체 업데이트 완료"
-    )
+</table>
 
 
-# =========================================================
-# 스케줄러
-# =========================================================
+</body>
 
-def scheduler():
+</html>
 
-    while True:
+"""
 
-        schedule.run_pending()
 
-        time.sleep(1)
+    return html
 
 
 # =========================================================
-# 웹 대시보드
+# 대시보드 페이지 캐시
+#
+# 스냅샷이 바뀔 때만 다시 렌더링하고 bytes 로 보관
+# 렌더링 직후 gzip / brotli 로 1회 압축 → 요청마다 압축하지 않음
+# ETag / Last-Modified 로 조건부 요청은 304 응답
+#
+# 키 : 거래소별 스냅샷 버전 + 갱신 지연 여부 + 새로고침 주기
+# (지연 표시와 새로고침 주기는 게시 없이도 바뀜)
 # =========================================================
 
-@app.get(
-    "/",
-    response_class=HTMLResponse
-)
-def dashboard():
-
-    html = """
-
-<html>
-
-<head>
+class DashboardPage:
 
-<meta
-    http-equiv="refresh"
-    content="300"
->
+    def __init__(self):
 
-<title>
-OKX + UPBIT
-</title>
+        self.lock = threading.Lock()
 
+        self.key = None
 
-<style>
+        self.page = None
 
-/* =====================================================
-   전체
-   ===================================================== */
+        self.renders = 0
 
-body{
+        self.hits = 0
 
-    background:#111;
+        self.not_modified = 0
 
-    color:white;
+        self.served = {}
 
-    font-family:Arial;
+        self.bytes_sent = 0
 
-    padding:20px;
+        self.bytes_saved = 0
 
-}
 
+    def get(
+        self,
+        key
+    ):
 
-/* =====================================================
-   테이블
-   ===================================================== */
+        with self.lock:
 
-table{
+            if key == self.key:
 
-    width:auto;
+                self.hits += 1
 
-    border-collapse:collapse;
+                return self.page
 
-    border:1px solid #444;
+            body = render_dashboard().encode(
+                "utf-8"
+            )
 
-}
+            etag = hashlib.sha1(
+                body
+            ).hexdigest()
 
+            variants = {
 
-/* =====================================================
-   헤더
-   ===================================================== */
+                "identity":
+                    body,
 
-th{
+                "gzip":
+                    gzip.compress(
+                        body,
+                        compresslevel=DASHBOARD_GZIP_LEVEL,
+                        mtime=0
+                    )
 
-    background:#333;
+            }
 
-    padding:10px 12px;
+            if brotli is not None:
 
-    border-right:2px solid #555;
+                variants["br"] = brotli.compress(
+                    body,
+                    quality=DASHBOARD_BROTLI_QUALITY
+                )
 
-    white-space:nowrap;
+            # Last-Modified : 렌더링 시각이 아닌 스냅샷 게시 시각 (초 단위)
+            # 같은 본문이면 이전 값 유지 / 본문이 바뀌었는데 같은 초라면
+            # 1초 올려서 If-Modified-Since 로 바뀐 페이지를 놓치지 않음
+            previous = self.page
 
-}
+            if previous and previous["etags"]["identity"] == f'"{etag}"':
 
+                modified_at = previous["modified_at"]
 
-th:last-child{
+            else:
 
-    border-right:none;
+                modified_at = int(
+                    max(
+                        (
+                            published_at
+                            for published_at in snapshot_published_at.values()
+                            if published_at is not None
+                        ),
+                        default=time.time()
+                    )
+                )
 
-}
+                if previous and modified_at <= previous["modified_at"]:
 
+                    modified_at = previous["modified_at"] + 1
 
-/* =====================================================
-   일반 셀
-   ===================================================== */
+            # 렌더링 결과는 통째로 교체 (읽는 쪽은 잠금 없이 사용)
+            self.key = key
 
-td{
+            self.page = {
 
-    padding:8px 12px;
+                "variants":
+                    variants,
 
-    border-bottom:1px solid #444;
+                # 인코딩마다 다른 표현이므로 ETag 도 구분
+                "etags": {
 
-    border-right:2px solid #333;
+                    encoding: (
+                        f'"{etag}"'
+                        if encoding == "identity"
+                        else f'"{etag}-{encoding}"'
+                    )
 
-    text-align:center;
+                    for encoding in variants
 
-    white-space:nowrap;
+                },
 
-}
+                "modified_at":
+                    modified_at,
 
+                "last_modified":
+                    formatdate(
+                        modified_at,
+                        usegmt=True
+                    )
 
-td:last-child{
+            }
 
-    border-right:none;
+            self.renders += 1
 
-}
+            return self.page
 
 
-/* =====================================================
-   순위
-   ===================================================== */
+    def count_not_modified(self):
 
-.rank-cell{
+        with self.lock:
 
-    width:45px;
+            self.not_modified += 1
 
-    min-width:45px;
 
-}
+    def count_served(
+        self,
+        page,
+        encoding
+    ):
 
+        size = len(
+            page["variants"][encoding]
+        )
 
-/* =====================================================
-   코인
-   ===================================================== */
+        with self.lock:
 
-.coin-cell{
+            self.served[encoding] = (
+                self.served.get(encoding, 0) + 1
+            )
 
-    min-width:90px;
+            self.bytes_sent += size
 
-    text-align:left;
+            self.bytes_saved += (
+                len(page["variants"]["identity"]) - size
+            )
 
-    font-weight:bold;
 
-}
+    def stats(self):
 
+        with self.lock:
 
-/* =====================================================
-   거래대금
-   ===================================================== */
+            sizes = {
 
-.volume-cell{
+                encoding: len(body)
 
-    min-width:100px;
+                for encoding, body in (
+                    self.page["variants"].items()
+                    if self.page
+                    else ()
+                )
 
-    padding-left:15px;
+            }
 
-    padding-right:15px;
+            return {
+                "renders": self.renders,
+                "hits": self.hits,
+                "not_modified": self.not_modified,
+                "brotli": brotli is not None,
+                "bytes": sizes,
+                "ratio": {
+                    encoding: round(
+                        sizes["identity"] / size,
+                        2
+                    )
+                    for encoding, size in sizes.items()
+                    if encoding != "identity" and size
+                },
+                "served": dict(self.served),
+                "bytes_sent": self.bytes_sent,
+                "bytes_saved": self.bytes_saved
+            }
 
-    text-align:right;
 
-    white-space:nowrap;
+# Accept-Encoding 에서 보낼 수 있는 인코딩 선택 (br > gzip > identity)
+def choose_encoding(
+    accept_encoding,
+    variants
+):
 
-}
+    accepted = {}
 
+    for part in (accept_encoding or "").split(","):
 
-/* =====================================================
-   변동률
-   ===================================================== */
+        name, _, params = part.strip().partition(";")
 
-.change-cell{
+        name = name.strip().lower()
 
-    min-width:105px;
+        if not name:
 
-    padding-left:12px;
+            continue
 
-    padding-right:12px;
+        quality = 1.0
 
-    white-space:nowrap;
+        for param in params.split(";"):
 
-}
+            key, _, value = param.strip().partition("=")
 
+            if key.strip() == "q":
 
-.change-item{
+                try:
 
-    display:inline-flex;
+                    quality = float(value)
 
-    align-items:center;
+                except ValueError:
 
-    width:95px;
+                    quality = 0.0
 
-    min-width:95px;
+        accepted[name] = quality
 
-    box-sizing:border-box;
+    for encoding in ("br", "gzip"):
 
-}
+        quality = accepted.get(
+            encoding,
+            accepted.get("*", 0.0)
+        )
 
+        if encoding in variants and quality > 0:
 
-.change-icon{
+            return encoding
 
-    display:inline-block;
+    return "identity"
 
-    width:28px;
 
-    min-width:28px;
+def is_not_modified(
+    request,
+    page
+):
 
-    text-align:center;
+    if_none_match = request.headers.get(
+        "if-none-match"
+    )
 
-}
+    # If-None-Match 가 있으면 If-Modified-Since 는 무시
+    if if_none_match is not None:
 
+        # 같은 렌더링의 어느 인코딩 ETag 든 일치로 봄
+        return if_none_match.strip() == "*" or any(
+            tag.strip().removeprefix("W/") in page["etags"].values()
+            for tag in if_none_match.split(",")
+        )
 
-.change-value{
+    if_modified_since = request.headers.get(
+        "if-modified-since"
+    )
 
-    display:inline-block;
+    if if_modified_since is None:
 
-    width:67px;
+        return False
 
-    min-width:67px;
+    try:
 
-    text-align:right;
+        return parsedate_to_datetime(
+            if_modified_since
+        ) >= parsedate_to_datetime(
+            page["last_modified"]
+        )
 
-    font-family:monospace;
+    except (TypeError, ValueError):
 
-}
+        return False
 
 
-/* =====================================================
-   EMA 전체
-   ===================================================== */
+dashboard_page = DashboardPage()
 
-.ema-display{
 
-    display:flex;
+def get_dashboard_key():
 
-    align-items:center;
+    return (
+        tuple(
+            (
+                snapshot_versions[exchange],
+                is_snapshot_delayed(exchange)
+            )
+            for exchange in ("okx", "upbit")
+        ),
+        get_dashboard_refresh()
+    )
 
-    height:40px;
 
-    white-space:nowrap;
+# =========================================================
+# 웹 대시보드
+# =========================================================
 
-    font-family:monospace;
+@app.get(
+    "/",
+    response_class=HTMLResponse
+)
+def dashboard(
+    request: Request
+):
 
-    padding:0 5px;
+    page = dashboard_page.get(
+        get_dashboard_key()
+    )
 
-}
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding"),
+        page["variants"]
+    )
 
+    headers = {
+        "ETag": page["etags"][encoding],
+        "Last-Modified": page["last_modified"],
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
 
-/* =====================================================
-   LONG / SHORT
-   ===================================================== */
+    if is_not_modified(
+        request,
+        page
+    ):
 
-.signal-period{
+        dashboard_page.count_not_modified()
 
-    width:70px;
+        return Response(
+            status_code=304,
+            headers=headers
+        )
 
-    min-width:70px;
+    if encoding != "identity":
 
-    text-align:center;
+        headers["Content-Encoding"] = encoding
 
-}
+    dashboard_page.count_served(
+        page,
+        encoding
+    )
 
+    return Response(
+        content=page["variants"][encoding],
+        media_type="text/html; charset=utf-8",
+        headers=headers
+    )
 
-.signal{
 
-    display:inline-block;
+# =========================================================
+# 상태 확인
+#
+# /healthz : 프로세스와 수집 스레드 동작 여부
+# /readyz  : 새로 계산된 스냅샷 여부 (SNAPSHOT_STALE_AFTER 넘으면 준비 안 됨) 와 경과 시간
+# =========================================================
 
-    font-weight:bold;
+@app.get(
+    "/healthz"
+)
+def healthz():
 
-    font-size:16px;
+    workers = {
 
-    padding:4px 7px;
+        exchange: (
+            exchange in collector_threads
+            and
+            collector_threads[exchange].is_alive()
+        )
 
-    border-radius:4px;
+        for exchange in ("okx", "upbit")
 
-}
+    }
 
+    alive = all(
+        workers.values()
+    )
 
-.long-signal{
+    return JSONResponse(
+        {
+            "status": "ok" if alive else "down",
+            "worker_alive": workers
+        },
+        status_code=200 if alive else 503
+    )
 
-    color:#00ff66;
 
-    border:1px solid #00ff66;
+@app.get(
+    "/readyz"
+)
+def readyz():
 
-}
+    readiness = get_readiness()
 
+    return JSONResponse(
+        readiness,
+        status_code=200 if readiness["ready"] else 503
+    )
 
-.short-signal{
 
-    color:#ff4444;
+# =========================================================
+# 통계
+# =========================================================
 
-    border:1px solid #ff4444;
+@app.get(
+    "/stats"
+)
+def stats():
 
-}
+    return {
 
+        "transport":
+            get_transport_stats(),
 
-/* =====================================================
-   EMA 시간봉 그룹
-   ===================================================== */
+        "rate_limit":
+            get_rate_limit_stats(),
 
-.ema-period{
+        "circuit":
+            get_circuit_stats(),
 
-    display:flex;
+        "candle_cache":
+            candle_cache.stats(),
 
-    align-items:center;
+        "candle_store":
+            candle_store.stats(),
 
-    padding:0 10px;
+        "dashboard":
+            dashboard_page.stats(),
 
-    border-right:2px solid #555;
+        "api":
+            get_api_stats(),
 
-}
+        "ema_state":
+            ema_state_store.stats(),
 
+        "ema_memo":
+            ema_result_memo.stats(),
 
-.ema-period.last{
+        "indicator_pool":
+            get_indicator_pool_stats(),
 
-    border-right:none;
+        "collector": {
 
-}
+            exchange: job.stats()
 
+            for exchange, job in exchange_jobs.items()
 
-/* =====================================================
-   돌파
-   ===================================================== */
+        }
 
-.breakout-period{
+    }
 
-    min-width:65px;
 
-    padding-left:5px;
+# =========================================================
+# 구조화 데이터 API
+#
+# /api/okx, /api/upbit : 행 원본 값 (HTML / 표시 문자열 없음)
+# 스냅샷 버전마다 1회 변환 후 orjson bytes 로 보관
+# fields 로 필요한 항목만 선택 (조합별 결과도 버전마다 보관)
+# =========================================================
 
-    padding-right:5px;
+API_FIELDS = (
+    "rank",
+    "symbol",
+    "name",
+    "on_upbit",
+    "volume",
+    "changes",
+    "ema",
+    "warning",
+    "breakout",
+    "signal",
+    "stale",
+    "updated_at"
+)
 
-}
 
+def dumps_json(
+    value
+):
 
-.breakout-warning{
+    if orjson is not None:
 
-    font-size:24px;
+        return orjson.dumps(
+            value
+        )
 
-    line-height:28px;
+    return json.dumps(
+        value,
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
 
-}
 
+def get_alert_data(
+    alert
+):
 
-/* =====================================================
-   눌림 경고
-   ===================================================== */
+    side, count = alert
 
-.ema-warning{
+    if side == Trend.NONE:
 
-    display:inline-block;
+        return None
 
-    width:50px;
+    return {
+        "side": EMA_STATE_NAMES[side],
+        "count": count
+    }
 
-    min-width:50px;
 
-    text-align:center;
+def get_ema_data(
+    ema
+):
 
-}
+    return {
 
+        "ema": {
 
-.warning-size{
+            name: {
+                "state": EMA_STATE_NAMES[state],
+                "count": count
+            }
 
-    font-size:24px;
+            for name, (state, count) in zip(EMA_RUN_NAMES, ema.runs)
 
-    line-height:28px;
+        },
 
-}
+        "warning":
+            get_alert_data(
+                ema.warning
+            ),
 
+        "breakout":
+            get_alert_data(
+                ema.breakout
+            ),
 
-/* =====================================================
-   시간봉
-   ===================================================== */
+        "signal":
+            (
+                ema.signal.name
+                if ema.signal != Trend.NONE
+                else None
+            )
 
-.ema-time{
+    }
 
-    display:inline-block;
 
-    width:40px;
+def get_row_data(
+    row
+):
 
-    min-width:40px;
+    return {
 
-    text-align:left;
+        "rank":
+            row.rank,
 
-    font-weight:bold;
+        "symbol":
+            row.symbol,
 
-}
+        "name":
+            row.name,
 
+        "on_upbit":
+            row.on_upbit,
 
-/* =====================================================
-   EMA 상태
-   ===================================================== */
+        "volume":
+            row.volume,
 
-.ema-status{
+        "changes":
+            row.changes,
 
-    display:inline-block;
+        **get_ema_data(
+            row.ema
+        ),
 
-    width:70px;
+        "stale":
+            row.stale,
 
-    min-width:70px;
+        "updated_at":
+            row.updated_at
 
-    text-align:left;
+    }
 
-}
 
+class ApiSnapshot:
 
-/* =====================================================
-   섹션
-   ===================================================== */
+    def __init__(
+        self,
+        exchange
+    ):
 
-.section-title{
+        self.exchange = exchange
 
-    margin-top:25px;
+        self.lock = threading.Lock()
 
-    padding:10px 12px;
+        self.version = None
 
-    background:#222;
+        self.items = None
 
-    border-left:5px solid #666;
+        self.bodies = OrderedDict()
 
-}
+        self.builds = 0
 
+        self.hits = 0
 
-/* =====================================================
-   행 hover
-   ===================================================== */
+        self.misses = 0
 
-tr:hover{
 
-    background:#1d1d1d;
+    def get(
+        self,
+        fields
+    ):
 
-}
+        with self.lock:
 
-</style>
+            version = snapshot_versions[self.exchange]
 
-</head>
+            if version != self.version:
 
+                self.version = version
 
-<body>
+                self.items = [
+                    get_row_data(row)
+                    for row in get_snapshot_rows(
+                        self.exchange
+                    )
+                ]
 
+                self.bodies.clear()
 
-<h2>
-📊 암호화폐 실시간 분석
-</h2>
+                self.builds += 1
 
+            if fields in self.bodies:
 
-<p>
-1시간 EMA · 4시간 추세 · 눌림 · 돌파 · LONG / SHORT
-</p>
+                self.bodies.move_to_end(
+                    fields
+                )
 
+                self.hits += 1
 
-<h2 class="section-title">
-🏆 OKX 선물 거래대금 TOP30
-</h2>
+                return self.bodies[fields]
 
+            self.misses += 1
 
-<table>
+            items = self.items
 
-<tr>
+            if fields != API_FIELDS:
 
-<th class="rank-cell">
-순위
-</th>
+                items = [
+                    {
+                        field: item[field]
+                        for field in fields
+                    }
+                    for item in items
+                ]
 
-<th>
-코인
-</th>
+            body = dumps_json({
 
-<th>
-거래대금
-</th>
+                "exchange":
+                    self.exchange,
 
-<th>
-오늘
-</th>
+                "version":
+                    version,
 
-<th>
-EMA 상태
-</th>
+                "updated_at":
+                    snapshot_fresh_at[self.exchange],
 
-</tr>
+                "published_at":
+                    snapshot_published_at[self.exchange],
 
-"""
+                "count":
+                    len(items),
 
+                "items":
+                    items
 
-    # =====================================================
-    # OKX
-    # =====================================================
+            })
 
-    for item in latest_okx_data:
+            self.bodies[fields] = body
 
-        html += f"""
+            if len(self.bodies) > API_FIELDS_CACHE_SIZE:
 
-<tr>
+                self.bodies.popitem(
+                    last=False
+                )
 
-<td class="rank-cell">
-{item['rank']}
-</td>
+            return body
 
-<td class="coin-cell">
-{item['name']}
-</td>
 
-<td class="volume-cell">
-{item['volume']}
-</td>
+    def stats(self):
 
-<td class="change-cell">
-{item['change']}
-</td>
+        with self.lock:
 
-<td>
+            return {
+                "version": self.version,
+                "builds": self.builds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "cached": len(self.bodies)
+            }
 
-{ema_html(
-    item["ema"]
-)}
 
-</td>
+api_snapshots = {
+    "okx": ApiSnapshot("okx"),
+    "upbit": ApiSnapshot("upbit")
+}
 
-</tr>
 
-"""
+def get_api_stats():
 
+    return {
 
-    html += """
+        "serializer":
+            "orjson" if orjson is not None else "json",
 
-</table>
+        **{
+            exchange: snapshot.stats()
+            for exchange, snapshot in api_snapshots.items()
+        }
 
+    }
 
-<h2 class="section-title">
-🏆 업비트 현물 거래대금 TOP30
-</h2>
 
+# fields="rank,name,ema" → 중복 제거, API_FIELDS 순서로 정렬
+# 알 수 없는 항목이 있으면 None
+def parse_api_fields(
+    fields
+):
 
-<table>
+    if not fields:
 
-<tr>
+        return API_FIELDS
 
-<th class="rank-cell">
-순위
-</th>
+    names = {
+        name.strip()
+        for name in fields.split(",")
+        if name.strip()
+    }
 
-<th>
-코인
-</th>
+    if not names or not names <= set(API_FIELDS):
 
-<th>
-거래대금
-</th>
+        return None
 
-<th>
-오늘
-</th>
+    return tuple(
+        name
+        for name in API_FIELDS
+        if name in names
+    )
 
-<th>
-EMA 상태
-</th>
 
-</tr>
+def api_response(
+    exchange,
+    fields
+):
 
-"""
+    selected = parse_api_fields(
+        fields
+    )
 
+    if selected is None:
 
-    # =====================================================
-    # 업비트
-    # =====================================================
+        return JSONResponse(
+            {
+                "error": "unknown fields",
+                "fields": list(API_FIELDS)
+            },
+            status_code=400
+        )
 
-    for item in latest_upbit_data:
+    return Response(
+        content=api_snapshots[exchange].get(
+            selected
+        ),
+        media_type="application/json"
+    )
 
-        html += f"""
 
-<tr>
+@app.get(
+    "/api/okx"
+)
+def api_okx(
+    fields: str = None
+):
 
-<td class="rank-cell">
-{item['rank']}
-</td>
+    return api_response(
+        "okx",
+        fields
+    )
 
-<td class="coin-cell">
-{item['name']}
-</td>
 
-<td class="volume-cell">
-{item['volume']}
-</td>
+@app.get(
+    "/api/upbit"
+)
+def api_upbit(
+    fields: str = None
+):
 
-<td class="change-cell">
-{item['change']}
-</td>
+    return api_response(
+        "upbit",
+        fields
+    )
 
-<td>
 
-{ema_html(
-    item["ema"]
-)}
+# =========================================================
+# 스크리너
+# =========================================================
 
-</td>
+@app.get(
+    "/api/screener"
+)
+def screener(
+    exchange: str = None,
+    signal: str = None,
+    kind: str = None,
+    include_all: bool = False
+):
 
-</tr>
+    items = get_screener_items(
+        exchange,
+        signal,
+        kind,
+        include_all
+    )
 
-"""
+    return {
 
+        "enabled":
+            SCREENER_ENABLED,
 
-    html += """
+        "updated_at":
+            screener_updated_at,
 
-</table>
+        "count":
+            len(items),
 
+        "items":
+            items
 
-</body>
+    }
 
-</html>
 
-"""
+# =========================================================
+# OKX 거래대금 방식 비교
+# =========================================================
 
+@app.get(
+    "/okx/volume-parity"
+)
+def okx_volume_parity(
+    top_n: int = 30
+):
 
-    return html
+    return get_okx_volume_parity(
+        top_n
+    )
 
 
 # =========================================================
@@ -2605,16 +9377,16 @@ EMA 상태
 @app.on_event("startup")
 def startup():
 
-    update_dashboard()
+    # 디스크 캐시 스냅샷은 즉시 게시, 수집은 거래소별 백그라운드
+    candles = load_warm_cache()
 
-    schedule.every(5).minutes.do(
-        update_dashboard
+    start_collectors(
+        candles
     )
 
-    threading.Thread(
-        target=scheduler,
-        daemon=True
-    ).start()
+    if STREAM_ENABLED:
+
+        start_stream_ingest()
 
 
 # =========================================================
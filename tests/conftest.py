@@ -0,0 +1,38 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0,
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+import fake_exchange  # noqa: E402
+
+
+# 가짜 거래소 + 새로 불러온 main (모듈 전역 상태 초기화)
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+
+    fake_exchange.reset()
+
+    fake_exchange.install(monkeypatch)
+
+    import main
+
+    main = importlib.reload(main)
+
+    monkeypatch.setattr(main, "RATE_LIMITS", {})
+    monkeypatch.setattr(main, "DEFAULT_RATE_LIMIT", (100_000, 1))
+    monkeypatch.setattr(main, "RETRY_BASE_DELAY", 0.01)
+    monkeypatch.setattr(main, "WARM_CACHE_PATH", str(tmp_path / "warm_cache.bin"))
+
+    return main
+
+
+@pytest.fixture
+def exchange():
+
+    return fake_exchange
@@ -0,0 +1,358 @@
+# 테스트용 가짜 OKX / 업비트 REST
+#
+# requests / httpx 전송 계층을 바꿔 실제 네트워크 없이 응답
+# 가격 / 거래대금은 심볼과 시각으로 정해지는 결정적 값
+
+import datetime as dt
+import json
+import math
+import threading
+import time
+
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import requests
+import requests.adapters
+
+
+state = {}
+
+lock = threading.Lock()
+
+real_time = time.time
+
+
+def reset(
+    okx=60,
+    upbit=40
+):
+
+    state.clear()
+
+    state.update({
+        "okx": okx,
+        "upbit": upbit,
+        "latency": 0.0,
+        "fail_paths": set(),
+        "status": {},
+        "offset_ms": 0,
+        "calls": {},
+        "queries": []
+    })
+
+
+reset()
+
+
+def okx_symbols():
+
+    return [f"C{i:03d}-USDT-SWAP" for i in range(state["okx"])]
+
+
+def upbit_markets():
+
+    return [f"KRW-C{i:03d}" for i in range(state["upbit"])]
+
+
+def now_ms():
+
+    return int(real_time() * 1000) + state["offset_ms"]
+
+
+# 거래소와 프로세스 시계를 함께 앞으로 (새 캔들 마감 흉내)
+def advance(monkeypatch, seconds):
+
+    state["offset_ms"] += int(seconds * 1000)
+
+    offset = state["offset_ms"] / 1000
+
+    monkeypatch.setattr(
+        time,
+        "time",
+        lambda: real_time() + offset
+    )
+
+
+def price(symbol, t_ms):
+
+    seed = sum(map(ord, symbol))
+
+    h = t_ms / 3_600_000
+
+    return (
+        100
+        + seed % 50
+        + 10 * math.sin(h / (7 + seed % 13))
+        + 5 * math.sin(h / 3.1 + seed)
+    )
+
+
+def volume(symbol, t_ms):
+
+    seed = sum(map(ord, symbol))
+
+    return 1000 * (1 + seed % 17) * (1.5 + math.sin(t_ms / 3_600_000 / 5 + seed))
+
+
+def okx_candles(query):
+
+    inst = query["instId"][0]
+
+    step = {"1H": 3_600_000, "4H": 14_400_000}[query.get("bar", ["1H"])[0]]
+
+    limit = int(query.get("limit", ["100"])[0])
+
+    current = now_ms() // step * step
+
+    after = int(query["after"][0]) if "after" in query else None
+
+    before = int(query["before"][0]) if "before" in query else None
+
+    t = current if after is None else after - step
+
+    rows = []
+
+    while len(rows) < limit:
+
+        if before is not None and t <= before:
+
+            break
+
+        p = price(inst, t)
+
+        v = volume(inst, t)
+
+        rows.append([
+            str(t), str(p), str(p + 1), str(p - 1), str(p),
+            str(v), str(v), str(v * p),
+            "0" if t == current else "1"
+        ])
+
+        t -= step
+
+    return {"code": "0", "data": rows}
+
+
+def upbit_candles(unit, query):
+
+    market = query["market"][0]
+
+    count = int(query.get("count", ["200"])[0])
+
+    step = unit * 60_000
+
+    if "to" in query:
+
+        to = dt.datetime.fromisoformat(
+            query["to"][0].replace("Z", "+00:00").replace(" ", "T")
+        )
+
+        if to.tzinfo is None:
+
+            to = to.replace(tzinfo=dt.timezone.utc)
+
+        t = (int(to.timestamp() * 1000) - 1) // step * step
+
+    else:
+
+        t = now_ms() // step * step
+
+    rows = []
+
+    for _ in range(count):
+
+        p = price(market, t)
+
+        v = volume(market, t)
+
+        utc = dt.datetime.fromtimestamp(t / 1000, dt.timezone.utc)
+
+        rows.append({
+            "market": market,
+            "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+            "candle_date_time_kst": (
+                utc + dt.timedelta(hours=9)
+            ).strftime("%Y-%m-%dT%H:%M:%S"),
+            "opening_price": p,
+            "high_price": p + 1,
+            "low_price": p - 1,
+            "trade_price": p,
+            "timestamp": t + step - 1,
+            "candle_acc_trade_price": v * p,
+            "candle_acc_trade_volume": v,
+            "unit": unit
+        })
+
+        t -= step
+
+    return rows
+
+
+def route(url, sleep=True):
+
+    parsed = urlparse(str(url))
+
+    query = parse_qs(parsed.query)
+
+    path = parsed.path
+
+    with lock:
+
+        state["calls"][path] = state["calls"].get(path, 0) + 1
+
+        state["queries"].append((path, query))
+
+    if state["latency"] and sleep:
+
+        time.sleep(state["latency"])
+
+    if path in state["fail_paths"]:
+
+        raise ConnectionError("fake exchange down")
+
+    if path in state["status"]:
+
+        return state["status"][path], {}, {}
+
+    headers = {}
+
+    if path == "/api/v5/public/instruments":
+
+        body = {"code": "0", "data": [
+            {"instId": symbol, "state": "live"}
+            for symbol in okx_symbols()
+        ]}
+
+    elif path in ("/api/v5/market/candles", "/api/v5/market/history-candles"):
+
+        body = okx_candles(query)
+
+    elif path == "/api/v5/market/tickers":
+
+        t = now_ms() // 3_600_000 * 3_600_000
+
+        body = {"code": "0", "data": [
+            {
+                "instId": symbol,
+                "last": str(price(symbol, t)),
+                "volCcy24h": str(sum(
+                    volume(symbol, t - i * 3_600_000)
+                    for i in range(1, 25)
+                )),
+                "vol24h": "1"
+            }
+            for symbol in okx_symbols()
+        ]}
+
+    elif path == "/v1/market/all":
+
+        body = [{"market": market} for market in upbit_markets()]
+
+        headers["Remaining-Req"] = "group=market; min=600; sec=9"
+
+    elif path == "/v1/ticker":
+
+        markets = query["markets"][0].split(",")
+
+        body = [
+            {
+                "market": market,
+                "trade_price": (
+                    1400.0
+                    if market == "KRW-USDT"
+                    else price(market, now_ms())
+                ),
+                "acc_trade_price_24h": volume(market, 0) * 1e5
+            }
+            for market in markets
+        ]
+
+        headers["Remaining-Req"] = "group=ticker; min=600; sec=9"
+
+    elif path.startswith("/v1/candles/minutes/"):
+
+        body = upbit_candles(int(path.rsplit("/", 1)[1]), query)
+
+        headers["Remaining-Req"] = "group=candles; min=600; sec=9"
+
+    else:
+
+        return 404, {}, {}
+
+    return 200, body, headers
+
+
+# prefix 로 시작하는 경로의 요청 쿼리 (요청 순서)
+def queries(prefix=""):
+
+    with lock:
+
+        return [
+            query
+            for path, query in state["queries"]
+            if path.startswith(prefix)
+        ]
+
+
+def calls(prefix=""):
+
+    with lock:
+
+        return sum(
+            count
+            for path, count in state["calls"].items()
+            if path.startswith(prefix)
+        )
+
+
+def requests_send(self, request, **kwargs):
+
+    status, body, headers = route(request.url)
+
+    response = requests.Response()
+
+    response.status_code = status
+
+    response._content = json.dumps(body).encode()
+
+    response.headers.update(headers)
+
+    response.url = request.url
+
+    response.request = request
+
+    return response
+
+
+async def httpx_handle(self, request):
+
+    import asyncio
+
+    if state["latency"]:
+
+        await asyncio.sleep(state["latency"])
+
+    status, body, headers = route(request.url, sleep=False)
+
+    return httpx.Response(
+        status,
+        json=body,
+        headers=headers,
+        request=request
+    )
+
+
+def install(monkeypatch):
+
+    monkeypatch.setattr(
+        requests.adapters.HTTPAdapter,
+        "send",
+        requests_send
+    )
+
+    monkeypatch.setattr(
+        httpx.AsyncHTTPTransport,
+        "handle_async_request",
+        httpx_handle
+    )
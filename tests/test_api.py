@@ -0,0 +1,104 @@
+# /api/okx, /api/upbit : 원본 값 JSON / 필드 선택 / 잘못된 필드는 400 / 버전마다 1회 변환
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(app):
+
+    app.update_okx(("1H", "4H"))
+
+    app.update_upbit((60, 240))
+
+    return TestClient(app.app)
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_snapshot_is_structured(app, client, exchange_name):
+
+    response = client.get(f"/api/{exchange_name}")
+
+    assert response.status_code == 200
+
+    assert response.headers["content-type"] == "application/json"
+
+    data = response.json()
+
+    rows = app.get_snapshot_rows(exchange_name)
+
+    assert data["exchange"] == exchange_name
+
+    assert data["version"] == app.snapshot_versions[exchange_name]
+
+    assert data["count"] == len(rows) == len(data["items"])
+
+    for item, row in zip(data["items"], rows):
+
+        assert list(item) == list(app.API_FIELDS)
+
+        assert item["rank"] == row.rank
+
+        assert item["symbol"] == row.symbol
+
+        assert item["volume"] == row.volume
+
+        assert isinstance(item["volume"], float)
+
+        assert item["changes"] == (list(row.changes) if row.changes else None)
+
+        assert set(item["ema"]) == set(app.EMA_RUN_NAMES)
+
+        for name, (state, count) in zip(app.EMA_RUN_NAMES, row.ema.runs):
+
+            assert item["ema"][name] == {
+                "state": app.EMA_STATE_NAMES[state],
+                "count": count
+            }
+
+        assert item["signal"] in (None, "LONG", "SHORT")
+
+        assert "<" not in str(item)
+
+
+def test_field_selection(client):
+
+    data = client.get("/api/okx", params={"fields": "volume, rank,,symbol"}).json()
+
+    # 요청 순서와 관계없이 API_FIELDS 순서
+    assert all(list(item) == ["rank", "symbol", "volume"] for item in data["items"])
+
+
+@pytest.mark.parametrize("fields", ["rank,html", ",", "RANK"])
+def test_unknown_fields_are_rejected(app, client, fields):
+
+    response = client.get("/api/upbit", params={"fields": fields})
+
+    assert response.status_code == 400
+
+    assert response.json() == {
+        "error": "unknown fields",
+        "fields": list(app.API_FIELDS)
+    }
+
+
+def test_body_is_built_once_per_version(app, client):
+
+    first = client.get("/api/okx").content
+
+    assert client.get("/api/okx").content == first
+
+    client.get("/api/okx", params={"fields": "rank"})
+
+    client.get("/api/okx", params={"fields": "rank"})
+
+    stats = app.api_snapshots["okx"].stats()
+
+    assert (stats["builds"], stats["misses"], stats["hits"]) == (1, 2, 2)
+
+    app.update_okx(())
+
+    assert client.get("/api/okx").json()["version"] == app.snapshot_versions["okx"]
+
+    assert app.api_snapshots["okx"].stats()["builds"] == 2
@@ -0,0 +1,56 @@
+# 비동기 수집은 같은 이벤트 루프 / 같은 클라이언트를 계속 사용
+
+import asyncio
+
+
+def test_collections_share_one_long_lived_client(app):
+
+    symbols = app.get_all_okx_swap_symbols()[:5]
+
+    app.run_async(app.collect_okx_volumes(symbols))
+
+    clients = dict(app.async_clients)
+
+    volumes = app.run_async(app.collect_okx_volumes(symbols))
+
+    assert all(volumes.values())
+
+    assert app.async_clients == clients
+
+    assert len(clients) == 1
+
+    (loop, client), = clients.items()
+
+    assert loop is app.get_async_loop()
+
+    assert not client.is_closed
+
+
+def test_run_async_keeps_caller_deadline(app):
+
+    async def remaining():
+
+        return app.get_deadline_remaining()
+
+    assert app.run_async(remaining()) is None
+
+    with app.deadline_budget(30):
+
+        assert 0 < app.run_async(remaining()) <= 30
+
+
+def test_client_of_closed_loop_is_dropped(app):
+
+    async def client():
+
+        return app.get_async_client()
+
+    loop = asyncio.new_event_loop()
+
+    loop.run_until_complete(client())
+
+    loop.close()
+
+    app.run_async(client())
+
+    assert loop not in app.async_clients
@@ -0,0 +1,89 @@
+# 심볼 × 캔들 행렬 일괄 계산이 심볼별 계산과 같은지 (길이가 다른 이력 포함)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+
+def ragged_closes(count, seed=3):
+
+    rng = np.random.default_rng(seed)
+
+    return [
+        100 + np.cumsum(rng.normal(size=int(rng.integers(0, 400))))
+        for _ in range(count)
+    ]
+
+
+def single_frame(values):
+
+    return main.IndicatorFrame(pd.DataFrame({"c": values}), "c")
+
+
+@pytest.mark.parametrize("count", [1, 30, 300])
+def test_batch_matches_single_symbol_frames(count):
+
+    closes = ragged_closes(count)
+
+    for values, frame in zip(closes, main.get_batch_indicator_frames(closes)):
+
+        single = single_frame(values)
+
+        assert frame.length == len(values)
+
+        for span in main.EMA_SPANS:
+
+            np.testing.assert_allclose(frame.ema(span), single.ema(span), rtol=1e-12)
+
+        assert frame.run_10_20() == single.run_10_20()
+
+        assert frame.run_20_60_120() == single.run_20_60_120()
+
+
+def test_missing_history_is_masked():
+
+    longest = 100 + np.arange(200, dtype=np.float64)
+
+    frames = main.get_batch_indicator_frames([None, longest, longest[:5]])
+
+    assert frames[0].length == 0
+
+    assert frames[0].run_10_20() == (0, 0)
+
+    # 짧은 심볼의 앞쪽 패딩은 상태 / 지속 수에 들어가지 않음
+    assert frames[2].length == 5
+
+    assert frames[2].state_run("10_20") == single_frame(longest[:5]).state_run("10_20")
+
+    assert frames[1].run_20_60_120() == single_frame(longest).run_20_60_120()
+
+
+def test_time_loop_does_not_grow_with_symbols(monkeypatch):
+
+    steps = []
+
+    where = np.where
+
+    def counting(*args):
+
+        steps.append(1)
+
+        return where(*args)
+
+    closes = ragged_closes(10)
+
+    width = max(len(values) for values in closes)
+
+    for symbols in (closes, closes * 30):
+
+        steps.clear()
+
+        monkeypatch.setattr(main.np, "where", counting)
+
+        main.get_batch_emas(main.build_close_matrix(symbols)[0])
+
+        monkeypatch.setattr(main.np, "where", where)
+
+        assert len(steps) == width
@@ -0,0 +1,139 @@
+# 캔들 마감 반영 시각 (UTC 기준) / OKX 캔들 거래대금 캐시 공유
+
+import threading
+import time
+
+import pytest
+
+HOUR = 3600
+
+
+@pytest.fixture
+def requests_made(app, monkeypatch):
+
+    made = []
+
+    class Job:
+
+        def request(self, timeframes, wait=False):
+
+            made.append(timeframes)
+
+    monkeypatch.setattr(app, "exchange_jobs", {"okx": Job(), "upbit": Job()})
+
+    return made
+
+
+@pytest.mark.parametrize(
+    "offset, expected",
+    [
+        (0, 20),
+        (19, 20),
+        (20, HOUR + 20),
+        (1000, HOUR + 20),
+        (HOUR + 19, HOUR + 20)
+    ]
+)
+def test_next_close_is_utc_hour_plus_delay(app, offset, expected):
+
+    base = 490_000 * HOUR
+
+    assert app.get_next_candle_close(base + offset) == base + expected
+
+
+def test_next_close_ignores_server_timezone(app, monkeypatch):
+
+    now = 490_000 * HOUR + 1000
+
+    expected = app.get_next_candle_close(now)
+
+    # 30분 시차 시간대에서도 같은 시각
+    monkeypatch.setenv("TZ", "Asia/Kolkata")
+
+    time.tzset()
+
+    try:
+
+        assert app.get_next_candle_close(now) == expected
+
+    finally:
+
+        monkeypatch.undo()
+
+        time.tzset()
+
+
+def test_four_hour_candles_refresh_on_utc_boundaries(app, requests_made):
+
+    # 490_000 은 4의 배수 → UTC 0/4/8/12/16/20시
+    app.refresh_candle_close("okx", 490_000 * HOUR + 20)
+
+    app.refresh_candle_close("okx", 490_001 * HOUR + 20)
+
+    app.refresh_candle_close("upbit", 490_004 * HOUR + 20)
+
+    assert requests_made == [("1H", "4H"), ("1H",), (60, 240)]
+
+
+def test_candle_volume_cache_is_shared_safely(app, exchange):
+
+    symbols = app.get_all_okx_swap_symbols()
+
+    results = []
+
+    def collect():
+
+        results.append(app.get_okx_volumes(symbols, "candle"))
+
+    threads = [threading.Thread(target=collect) for _ in range(4)]
+
+    for thread in threads:
+
+        thread.start()
+
+    for thread in threads:
+
+        thread.join()
+
+    assert len(results) == 4
+
+    assert all(result == results[0] for result in results)
+
+    assert set(app.okx_candle_volumes["volumes"]) == set(symbols)
+
+    # 같은 시간 안에서는 다시 조회하지 않음
+    before = exchange.calls("/api/v5/market/candles")
+
+    app.get_okx_volumes(symbols, "candle")
+
+    assert exchange.calls("/api/v5/market/candles") == before
+
+
+def test_fetch_finished_after_hour_change_is_not_cached(
+    app,
+    exchange,
+    monkeypatch
+):
+
+    symbols = app.get_all_okx_swap_symbols()[:3]
+
+    collect = app.collect_okx_volumes
+
+    async def collect_across_hour(missing, concurrency):
+
+        # 조회 중 정시가 지나 캐시가 새 시간으로 바뀜
+        with app.okx_candle_volumes_lock:
+
+            app.okx_candle_volumes["hour"] += 1
+
+            app.okx_candle_volumes["volumes"] = {}
+
+        return await collect(missing, concurrency)
+
+    monkeypatch.setattr(app, "collect_okx_volumes", collect_across_hour)
+
+    volumes = app.get_okx_volumes(symbols, "candle")
+
+    assert all(volumes.values())
+
+    assert app.okx_candle_volumes["volumes"] == {}
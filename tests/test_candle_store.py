@@ -0,0 +1,230 @@
+# 캔들 저장소 : 처음 전체 수집 / 이후분만 조회 / 누락 시 재수집 / 더 깊은 요청 / generation
+
+import pytest
+
+HOUR_MS = 3_600_000
+
+OKX_CANDLES = ("/api/v5/market/candles", "/api/v5/market/history-candles")
+
+CASES = {
+    "okx": ("C000-USDT-SWAP", "1H", "/api/v5/market/"),
+    "upbit": ("KRW-C000", 60, "/v1/candles/")
+}
+
+
+def sync(app, exchange_name, limit):
+
+    symbol, timeframe, _ = CASES[exchange_name]
+
+    return app.candle_store.sync(exchange_name, symbol, timeframe, limit)
+
+
+def buffer_of(app, exchange_name):
+
+    symbol, timeframe, _ = CASES[exchange_name]
+
+    return app.candle_store.get_buffer(exchange_name, symbol, timeframe)
+
+
+def timestamps(app, exchange_name):
+
+    return [
+        app.get_candle_ts(exchange_name, row)
+        for row in buffer_of(app, exchange_name).rows
+    ]
+
+
+def assert_contiguous(app, exchange_name):
+
+    ts = timestamps(app, exchange_name)
+
+    assert all(b - a == HOUR_MS for a, b in zip(ts, ts[1:]))
+
+
+def fail_candles(exchange):
+
+    exchange.state["fail_paths"] |= set(OKX_CANDLES) | {"/v1/candles/minutes/60"}
+
+
+def recover_candles(app, exchange):
+
+    exchange.state["fail_paths"].clear()
+
+    app.circuit_breakers.clear()
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_failed_deeper_refill_keeps_history(app, exchange, exchange_name):
+
+    assert sync(app, exchange_name, 300)
+
+    buffer = buffer_of(app, exchange_name)
+
+    rows = list(buffer.rows)
+
+    fail_candles(exchange)
+
+    assert sync(app, exchange_name, 601) is None
+
+    assert buffer.rows == rows
+
+    assert buffer.depth == 300
+
+    assert buffer.generation == 1
+
+    # 복구 후 다음 요청 때 다시 깊게 수집
+    recover_candles(app, exchange)
+
+    assert sync(app, exchange_name, 601)
+
+    assert buffer.depth == 601
+
+    assert len(buffer.rows) > len(rows)
+
+    assert buffer.generation == 2
+
+    assert_contiguous(app, exchange_name)
+
+
+def store_stats(app):
+
+    stats = app.candle_store.stats()
+
+    return stats["refills"], stats["deltas"], stats["gaps"]
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_first_sync_fills_requested_depth(app, exchange, exchange_name):
+
+    data = sync(app, exchange_name, 300)
+
+    buffer = buffer_of(app, exchange_name)
+
+    assert len(data) == 300
+
+    # 확정 캔들 + 진행 중 캔들 1개
+    assert len(buffer.rows) == 299 and buffer.live is not None
+
+    assert buffer.generation == 1
+
+    assert store_stats(app) == (1, 0, 0)
+
+    assert_contiguous(app, exchange_name)
+
+    # 업비트는 페이지 200개 → 2회
+    pages = len(exchange.queries(CASES[exchange_name][2]))
+
+    assert pages == (1 if exchange_name == "okx" else 2)
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_closed_candles_are_fetched_as_delta(
+    app,
+    exchange,
+    monkeypatch,
+    exchange_name
+):
+
+    sync(app, exchange_name, 300)
+
+    last_ts = timestamps(app, exchange_name)[-1]
+
+    exchange.state["queries"].clear()
+
+    # 정시 3번 지남
+    exchange.advance(monkeypatch, 3 * 3600)
+
+    sync(app, exchange_name, 300)
+
+    # 새 확정 3개 + 진행 중 1개 + 여유 1개를 요청 1회로
+    query, = exchange.queries(CASES[exchange_name][2])
+
+    if exchange_name == "okx":
+
+        assert query["before"] == [str(last_ts)]
+
+        assert "after" not in query
+
+        assert query["limit"] == ["5"]
+
+    else:
+
+        assert "to" not in query
+
+        assert query["count"] == ["5"]
+
+    assert timestamps(app, exchange_name)[-1] == last_ts + 3 * HOUR_MS
+
+    # 깊이만큼만 보관 (오래된 캔들부터 제거)
+    assert len(buffer_of(app, exchange_name).rows) == 300
+
+    assert buffer_of(app, exchange_name).generation == 1
+
+    assert store_stats(app) == (1, 1, 0)
+
+    assert_contiguous(app, exchange_name)
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_gap_longer_than_a_page_refills(
+    app,
+    exchange,
+    monkeypatch,
+    exchange_name
+):
+
+    sync(app, exchange_name, 300)
+
+    last_ts = timestamps(app, exchange_name)[-1]
+
+    hours = app.CANDLE_PAGE_SIZE[exchange_name] + 10
+
+    exchange.advance(monkeypatch, hours * 3600)
+
+    sync(app, exchange_name, 300)
+
+    assert timestamps(app, exchange_name)[-1] == last_ts + hours * HOUR_MS
+
+    assert buffer_of(app, exchange_name).generation == 2
+
+    assert store_stats(app) == (2, 0, 1)
+
+    assert_contiguous(app, exchange_name)
+
+
+@pytest.mark.parametrize("exchange_name", ["okx", "upbit"])
+def test_deeper_request_refills_and_bumps_generation(app, exchange_name):
+
+    sync(app, exchange_name, 300)
+
+    first_ts = timestamps(app, exchange_name)[0]
+
+    # 같은 깊이 / 더 얕은 요청은 다시 수집하지 않음
+    sync(app, exchange_name, 100)
+
+    assert buffer_of(app, exchange_name).generation == 1
+
+    assert len(sync(app, exchange_name, 601)) == 601
+
+    buffer = buffer_of(app, exchange_name)
+
+    assert (buffer.depth, len(buffer.rows), buffer.generation) == (601, 600, 2)
+
+    assert timestamps(app, exchange_name)[0] == first_ts - 301 * HOUR_MS
+
+    assert_contiguous(app, exchange_name)
+
+
+def test_streaming_buffer_skips_rest(app, exchange, monkeypatch):
+
+    sync(app, "okx", 300)
+
+    app.candle_store.set_streaming("okx", [CASES["okx"][0]], True)
+
+    exchange.state["queries"].clear()
+
+    exchange.advance(monkeypatch, 3600)
+
+    assert len(sync(app, "okx", 300)) == 300
+
+    assert exchange.queries("/api/v5/market/") == []
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+class FakeResponse:
+
+    def __init__(self, status_code):
+
+        self.status_code = status_code
+
+        self.headers = {}
+
+
+def responder(*codes):
+
+    codes = list(codes)
+
+    def func(*args, **kwargs):
+
+        return FakeResponse(codes.pop(0))
+
+    return func
+
+
+def async_responder(*codes):
+
+    codes = list(codes)
+
+    async def func(*args, **kwargs):
+
+        return FakeResponse(codes.pop(0))
+
+    return func
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+
+    monkeypatch.setattr(main, "CIRCUIT_COOLDOWN", 0)
+    monkeypatch.setattr(main, "RETRY_ATTEMPTS", 1)
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+
+    breaker = main.CircuitBreaker("test")
+
+    breaker.trip()
+
+    return breaker
+
+
+def test_probe_429_then_recovers(breaker):
+
+    assert main.retry_request(responder(429), breaker=breaker) is None
+
+    assert breaker.state == "half_open"
+    assert breaker.probing is False
+
+    result = main.retry_request(responder(200), breaker=breaker)
+
+    assert result.status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_probe_429_then_recovers_async(breaker, monkeypatch):
+
+    async def no_sleep(seconds):
+
+        return None
+
+    monkeypatch.setattr(main.asyncio, "sleep", no_sleep)
+
+    assert asyncio.run(
+        main.retry_request_async(async_responder(429), breaker=breaker)
+    ) is None
+
+    assert breaker.probing is False
+
+    result = asyncio.run(
+        main.retry_request_async(async_responder(200), breaker=breaker)
+    )
+
+    assert result.status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_probe_failure_reopens(breaker):
+
+    assert main.retry_request(responder(500), breaker=breaker) is None
+
+    assert breaker.state == "open"
+
+
+def test_only_one_probe_at_a_time(breaker):
+
+    assert breaker.allow() == "probe"
+    assert breaker.allow() is False
+
+    breaker.release()
+
+    assert breaker.allow() == "probe"
@@ -0,0 +1,115 @@
+# 대시보드 압축본은 렌더링 때 1회 생성 / Accept-Encoding 에 맞는 본문을 메모리에서 전송
+
+import gzip
+
+import brotli
+import pytest
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(app):
+
+    return TestClient(app.app)
+
+
+def raw(client, encoding):
+
+    with client.stream("GET", "/", headers={"Accept-Encoding": encoding}) as response:
+
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip, deflate, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0", "identity"),
+        ("*", "br"),
+        ("*;q=0", "identity"),
+        ("identity", "identity"),
+        ("", "identity"),
+        (None, "identity"),
+        ("GZIP;q=0.5", "gzip"),
+        ("br;q=bad, gzip", "gzip")
+    ]
+)
+def test_choose_encoding(app, accept, expected):
+
+    variants = {"identity": b"", "gzip": b"", "br": b""}
+
+    assert app.choose_encoding(accept, variants) == expected
+
+
+def test_gzip_only_page_never_sends_brotli(app):
+
+    assert app.choose_encoding("br", {"identity": b"", "gzip": b""}) == "identity"
+
+
+def test_variants_decode_to_the_same_page(app, client):
+
+    plain, plain_body = raw(client, "identity")
+
+    gzipped, gzip_body = raw(client, "gzip")
+
+    brotlied, brotli_body = raw(client, "br")
+
+    assert "Content-Encoding" not in plain.headers
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+
+    assert brotlied.headers["Content-Encoding"] == "br"
+
+    for response in (plain, gzipped, brotlied):
+
+        assert response.headers["Vary"] == "Accept-Encoding"
+
+    assert gzip.decompress(gzip_body) == plain_body
+
+    assert brotli.decompress(brotli_body) == plain_body
+
+    assert len({plain.headers["ETag"], gzipped.headers["ETag"], brotlied.headers["ETag"]}) == 3
+
+
+def test_requests_do_not_compress(app, client, monkeypatch):
+
+    app.update_upbit((60, 240))
+
+    raw(client, "gzip")
+
+    def fail(*args, **kwargs):
+
+        raise AssertionError("compressed per request")
+
+    monkeypatch.setattr(app.gzip, "compress", fail)
+
+    monkeypatch.setattr(app.brotli, "compress", fail)
+
+    for encoding in ("gzip", "br", "identity"):
+
+        assert raw(client, encoding)[0].status_code == 200
+
+
+def test_compression_is_reported(app, client):
+
+    app.update_upbit((60, 240))
+
+    _, body = raw(client, "gzip")
+
+    raw(client, "br")
+
+    stats = app.dashboard_page.stats()
+
+    assert stats["bytes"]["gzip"] == len(body)
+
+    assert stats["ratio"]["gzip"] > 2
+
+    assert stats["ratio"]["br"] >= stats["ratio"]["gzip"]
+
+    assert stats["served"] == {"gzip": 1, "br": 1}
+
+    assert stats["bytes_saved"] == (
+        2 * stats["bytes"]["identity"] - stats["bytes"]["gzip"] - stats["bytes"]["br"]
+    )
@@ -0,0 +1,140 @@
+# 대시보드는 스냅샷 게시마다 1회 렌더링 / ETag · Last-Modified 조건부 요청은 304
+
+from email.utils import formatdate, parsedate_to_datetime
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(app):
+
+    return TestClient(app.app)
+
+
+def get(client, **headers):
+
+    return client.get("/", headers={"Accept-Encoding": "identity", **headers})
+
+
+def test_page_is_rendered_once_per_snapshot(app, client):
+
+    first = get(client)
+
+    second = get(client)
+
+    assert first.status_code == second.status_code == 200
+
+    assert first.content == second.content
+
+    assert app.dashboard_page.stats()["renders"] == 1
+
+    app.update_upbit((60, 240))
+
+    third = get(client)
+
+    assert third.headers["ETag"] != first.headers["ETag"]
+
+    assert app.dashboard_page.stats()["renders"] == 2
+
+
+def test_matching_etag_is_not_modified(app, client):
+
+    etag = get(client).headers["ETag"]
+
+    for tag in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+
+        response = get(client, **{"If-None-Match": tag})
+
+        assert response.status_code == 304
+
+        assert response.content == b""
+
+        assert response.headers["ETag"] == etag
+
+    assert get(client, **{"If-None-Match": '"other"'}).status_code == 200
+
+    assert app.dashboard_page.stats()["not_modified"] == 4
+
+
+def test_last_modified_is_honoured(app, client):
+
+    last_modified = get(client).headers["Last-Modified"]
+
+    assert get(client, **{"If-Modified-Since": last_modified}).status_code == 304
+
+    assert get(
+        client,
+        **{"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"}
+    ).status_code == 200
+
+    # If-None-Match 가 있으면 If-Modified-Since 무시
+    assert get(
+        client,
+        **{"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    ).status_code == 200
+
+    assert get(client, **{"If-Modified-Since": "garbage"}).status_code == 200
+
+
+def test_new_snapshot_invalidates_old_etag(app, client):
+
+    etag = get(client).headers["ETag"]
+
+    app.update_okx(())
+
+    assert get(client, **{"If-None-Match": etag}).status_code == 200
+
+
+def test_last_modified_is_the_snapshot_publish_time(app, client):
+
+    app.update_okx(())
+
+    published_at = max(
+        value
+        for value in app.snapshot_published_at.values()
+        if value is not None
+    )
+
+    last_modified = get(client).headers["Last-Modified"]
+
+    assert last_modified == formatdate(int(published_at), usegmt=True)
+
+    # 게시 없이 다시 렌더링해도 (새로고침 주기 변경 등) 같은 본문이면 그대로
+    app.dashboard_page.key = None
+
+    assert get(client).headers["Last-Modified"] == last_modified
+
+
+def test_publish_within_the_same_second_is_modified(app, client):
+
+    first = get(client)
+
+    published_at = parsedate_to_datetime(
+        first.headers["Last-Modified"]
+    ).timestamp()
+
+    app.update_okx(())
+
+    # 이전 게시와 같은 초에 다시 게시
+    for exchange in app.snapshot_published_at:
+
+        app.snapshot_published_at[exchange] = published_at + 0.5
+
+    second = get(client, **{"If-Modified-Since": first.headers["Last-Modified"]})
+
+    assert second.status_code == 200
+
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+    assert parsedate_to_datetime(
+        second.headers["Last-Modified"]
+    ) > parsedate_to_datetime(
+        first.headers["Last-Modified"]
+    )
+
+    assert get(
+        client,
+        **{"If-Modified-Since": second.headers["Last-Modified"]}
+    ).status_code == 304
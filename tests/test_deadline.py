@@ -0,0 +1,85 @@
+import pytest
+
+import main
+
+from test_circuit_breaker import FakeResponse, responder
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+
+    monkeypatch.setattr(main, "CIRCUIT_COOLDOWN", 0)
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+
+    breaker = main.CircuitBreaker("test")
+
+    breaker.trip()
+
+    return breaker
+
+
+def test_expired_deadline_does_not_take_probe(breaker):
+
+    with main.deadline_budget(0):
+
+        assert main.retry_request(responder(200), breaker=breaker) is None
+
+    assert breaker.probing is False
+    assert breaker.allow() == "probe"
+
+
+def test_limiter_give_up_releases_probe(breaker):
+
+    limiter = main.TokenBucket("test", 1, 1000)
+
+    # 버킷 비우기
+    limiter.acquire()
+
+    before = limiter.stats()
+
+    with main.deadline_budget(0.5):
+
+        assert main.retry_request(
+            responder(200),
+            limiter=limiter,
+            breaker=breaker
+        ) is None
+
+    assert breaker.probing is False
+    assert breaker.state == "half_open"
+
+    # 취소된 예약은 대기 통계에 남지 않음
+    assert limiter.stats() == before
+
+
+def test_cancelled_reservation_keeps_stats():
+
+    limiter = main.TokenBucket("test", 1, 1000)
+
+    limiter.acquire()
+
+    assert limiter.acquire(max_wait=0.1) is None
+
+    stats = limiter.stats()
+
+    assert stats["requests"] == 1
+    assert stats["waited"] == 0
+    assert stats["avg_wait"] == 0
+    assert stats["max_wait"] == 0
+
+
+def test_deadline_caps_timeout():
+
+    seen = {}
+
+    def func(url, timeout):
+
+        seen["timeout"] = timeout
+
+        return FakeResponse(200)
+
+    with main.deadline_budget(0.5):
+
+        main.retry_request(func, "x", timeout=(5, 10))
+
+    assert all(value <= 0.5 for value in seen["timeout"])
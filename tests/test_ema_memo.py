@@ -0,0 +1,99 @@
+# EMA 결과 메모 : 마지막 확정 캔들이 같으면 판정을 다시 하지 않음 / LRU 제거 / 통계
+
+import pytest
+
+
+@pytest.fixture
+def frame_results(app, monkeypatch):
+
+    calls = []
+
+    get_frame_result = app.get_frame_result
+
+    def counting(ind1h, ind4h):
+
+        calls.append(1)
+
+        return get_frame_result(ind1h, ind4h)
+
+    monkeypatch.setattr(app, "get_frame_result", counting)
+
+    return calls
+
+
+def test_unchanged_candles_reuse_results(app, frame_results):
+
+    app.update_okx(("1H", "4H"))
+
+    assert len(frame_results) == 30
+
+    before = app.ema_result_memo.stats()
+
+    # 순위만 갱신 (새 확정 캔들 없음)
+    app.update_okx(())
+
+    after = app.ema_result_memo.stats()
+
+    assert len(frame_results) == 30
+
+    assert after["hits"] - before["hits"] == 30
+
+    assert after["misses"] == before["misses"]
+
+    assert app.stats()["ema_memo"] == after
+
+
+def test_new_closed_candle_recomputes(app, exchange, monkeypatch, frame_results):
+
+    app.update_okx(("1H", "4H"))
+
+    exchange.advance(monkeypatch, 3600)
+
+    app.update_okx(("1H",))
+
+    assert len(frame_results) == 60
+
+
+def test_upbit_live_price_is_part_of_the_stamp(app, frame_results):
+
+    app.update_upbit((60, 240))
+
+    market = app.get_tracked_symbols(app.get_snapshot_rows("upbit"))[0]
+
+    app.get_upbit_ema_results([market], ())
+
+    calls = len(frame_results)
+
+    app.upbit_ticker_prices[market] *= 1.01
+
+    app.get_upbit_ema_results([market], ())
+
+    assert len(frame_results) == calls + 1
+
+
+def test_memo_evicts_least_recently_used():
+
+    import main
+
+    memo = main.EmaResultMemo(2)
+
+    memo.put("a", 1, "A")
+
+    memo.put("b", 1, "B")
+
+    assert memo.get("a", 1) == "A"
+
+    memo.put("c", 1, "C")
+
+    assert memo.get("b", 1) is None
+
+    assert memo.get("a", 2) is None
+
+    assert memo.get("c", 1) == "C"
+
+    assert memo.stats() == {
+        "entries": 2,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1
+    }
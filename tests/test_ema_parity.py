@@ -0,0 +1,235 @@
+# 벡터 연산 EMA 상태 / 연속 캔들 수가 기존 iterrows 구현과 같은지 확인
+#
+# reference_* 는 벡터화 이전 main.py 의 로직을 그대로 옮긴 것
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+
+def reference_states_10_20(df, column):
+
+    df = df.copy()
+
+    df["ema10"] = df[column].ewm(span=10, adjust=False).mean()
+    df["ema20"] = df[column].ewm(span=20, adjust=False).mean()
+
+    states = []
+
+    for _, row in df.iterrows():
+
+        if row["ema10"] > row["ema20"]:
+
+            states.append("long")
+
+        elif row["ema10"] < row["ema20"]:
+
+            states.append("short")
+
+        else:
+
+            states.append("none")
+
+    return states
+
+
+def reference_states_20_60_120(df, column):
+
+    df = df.copy()
+
+    df["ema20"] = df[column].ewm(span=20, adjust=False).mean()
+    df["ema60"] = df[column].ewm(span=60, adjust=False).mean()
+    df["ema120"] = df[column].ewm(span=120, adjust=False).mean()
+
+    states = []
+
+    for _, row in df.iterrows():
+
+        if row["ema20"] > row["ema60"] > row["ema120"]:
+
+            states.append("long")
+
+        elif row["ema20"] < row["ema60"] < row["ema120"]:
+
+            states.append("short")
+
+        else:
+
+            states.append("none")
+
+    return states
+
+
+def reference_run(states):
+
+    current_state = states[-1]
+
+    if current_state == "none":
+
+        return 0, "none"
+
+    count = 0
+
+    for state in reversed(states):
+
+        if state == current_state:
+
+            count += 1
+
+        else:
+
+            break
+
+    return count, current_state
+
+
+def reference_status(count, state):
+
+    if state == "long":
+
+        return f"🟢({count})"
+
+    elif state == "short":
+
+        return f"🔴({count})"
+
+    return "⚪(0)"
+
+
+def reference_check_ema_10_20(df, column):
+
+    if df is None or len(df) < 20:
+
+        return "⚪(0)"
+
+    return reference_status(*reference_run(reference_states_10_20(df, column)))
+
+
+def reference_check_ema(df, column):
+
+    if df is None or len(df) < 120:
+
+        return "⚪(0)"
+
+    return reference_status(*reference_run(reference_states_20_60_120(df, column)))
+
+
+def reference_get_ema_10_20_count(df, column):
+
+    if df is None or len(df) < 20:
+
+        return 0, "none"
+
+    return reference_run(reference_states_10_20(df, column))
+
+
+def reference_direction_10_20(df, column):
+
+    if df is None or len(df) < 20:
+
+        return "none"
+
+    return reference_states_10_20(df, column)[-1]
+
+
+def reference_direction_20_60_120(df, column):
+
+    if df is None or len(df) < 120:
+
+        return "none"
+
+    return reference_states_20_60_120(df, column)[-1]
+
+
+def make_frames():
+
+    rng = np.random.default_rng(7)
+
+    frames = {
+        "flat": [100.0] * 200,
+        "flat_then_up": [100.0] * 150 + [100.0 + i for i in range(50)],
+        "up_then_flat": [100.0 + i for i in range(150)] + [250.0] * 60,
+        "rising": [100.0 + i for i in range(200)],
+        "falling": [300.0 - i for i in range(200)],
+        "short_5": [1.0, 2.0, 3.0, 2.0, 1.0],
+        "short_19": [100.0 + i % 3 for i in range(19)],
+        "exact_20": [100.0 + (i % 4) for i in range(20)],
+        "short_119": list(100 + np.cumsum(rng.normal(size=119))),
+        "exact_120": list(100 + np.cumsum(rng.normal(size=120))),
+        "integer_steps": list(rng.integers(95, 105, size=300).astype(float))
+    }
+
+    for i in range(20):
+
+        frames[f"random_{i}"] = list(
+            100 + np.cumsum(rng.normal(scale=1 + i % 4, size=int(rng.integers(20, 400))))
+        )
+
+    return {
+        name: pd.DataFrame({"c": values})
+        for name, values in frames.items()
+    }
+
+
+FRAMES = make_frames()
+
+
+@pytest.mark.parametrize("name", sorted(FRAMES))
+def test_vectorized_matches_iterrows(name):
+
+    df = FRAMES[name]
+
+    assert main.check_ema_10_20(df, "c") == reference_check_ema_10_20(df, "c")
+    assert main.check_ema(df, "c") == reference_check_ema(df, "c")
+    assert main.get_ema_10_20_count(df, "c") == reference_get_ema_10_20_count(df, "c")
+    assert main.get_ema_10_20_direction(df, "c") == reference_direction_10_20(df, "c")
+    assert main.get_ema_20_60_120_direction(df, "c") == reference_direction_20_60_120(df, "c")
+
+
+def test_none_frame():
+
+    assert main.check_ema_10_20(None, "c") == "⚪(0)"
+    assert main.check_ema(None, "c") == "⚪(0)"
+    assert main.get_ema_10_20_count(None, "c") == (0, "none")
+
+
+@pytest.mark.parametrize(
+    "states",
+    [
+        [1],
+        [0],
+        [-1],
+        [1, 1, 1],
+        [0, 0, 1],
+        [1, 0, 1, 1],
+        [-1, 1, -1, -1, -1],
+        [1, 1, 0],
+        [1, -1, 0, 0]
+    ]
+)
+def test_state_run_kernel(states):
+
+    names = [main.EMA_STATE_NAMES[state] for state in states]
+
+    count, name = reference_run(names)
+
+    state, run = main.get_state_run(np.array(states, dtype=np.int8))
+
+    assert (run, main.EMA_STATE_NAMES[state]) == (count, name)
+
+
+def test_state_run_kernel_random():
+
+    rng = np.random.default_rng(11)
+
+    for _ in range(500):
+
+        states = rng.integers(-1, 2, size=int(rng.integers(1, 40))).astype(np.int8)
+
+        names = [main.EMA_STATE_NAMES[int(state)] for state in states]
+
+        state, run = main.get_state_run(states)
+
+        assert (run, main.EMA_STATE_NAMES[state]) == reference_run(names)
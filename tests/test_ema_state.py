@@ -0,0 +1,226 @@
+# 증분 EMA 상태 (EmaState) 가 같은 캔들 전체를 다시 계산한 값과 같은지 확인
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+
+def full_frame(closes):
+
+    return main.IndicatorFrame(
+        pd.DataFrame({"c": closes}),
+        "c"
+    )
+
+
+def incremental_state(closes, seed_length):
+
+    state = main.EmaState()
+
+    state.seed(
+        seed_length - 1,
+        main.compute_seed_values([
+            np.asarray(closes[:seed_length], dtype=np.float64)
+        ])[0]
+    )
+
+    for ts, close in enumerate(closes[seed_length:], seed_length):
+
+        state.apply(ts, close)
+
+    return state
+
+
+def assert_same(state, closes):
+
+    frame = full_frame(closes)
+
+    assert state.length == len(closes)
+
+    for span in main.EMA_SPANS:
+
+        assert state.emas[span] == pytest.approx(
+            frame.ema(span)[-1],
+            rel=1e-12
+        )
+
+    assert state.runs["10_20"] == frame.state_run("10_20")
+    assert state.runs["20_60_120"] == frame.state_run("20_60_120")
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_matches_full_recompute(seed):
+
+    rng = np.random.default_rng(seed)
+
+    closes = list(100 + np.cumsum(rng.normal(size=400)))
+
+    state = incremental_state(closes, 300)
+
+    assert_same(state, closes)
+
+
+def test_each_append_matches_full_recompute():
+
+    rng = np.random.default_rng(3)
+
+    closes = list(100 + np.cumsum(rng.normal(size=260)))
+
+    state = incremental_state(closes, 200)
+
+    for close in rng.normal(size=30).cumsum() + closes[-1]:
+
+        closes.append(float(close))
+
+        state.apply(len(closes) - 1, float(close))
+
+        assert_same(state, closes)
+
+
+def test_streak_is_not_capped_by_seed_window():
+
+    # 계속 오르는 시세 : 지속 캔들 수가 시드 길이(600)를 넘어 계속 증가
+    closes = [100.0 + i for i in range(700)]
+
+    state = incremental_state(closes, main.EMA_SEED_DEPTH)
+
+    assert_same(state, closes)
+    assert state.runs["10_20"][1] > main.EMA_SEED_DEPTH
+
+
+def test_live_peek_does_not_change_state():
+
+    closes = list(100 + np.cumsum(np.random.default_rng(5).normal(size=300)))
+
+    state = incremental_state(closes, 300)
+
+    before = (state.length, dict(state.emas), dict(state.runs))
+
+    frame = state.frame(closes[-1] + 5)
+
+    assert frame.length == state.length + 1
+    assert (state.length, state.emas, state.runs) == before
+
+    full = full_frame(closes + [closes[-1] + 5])
+
+    assert frame.runs["10_20"] == full.state_run("10_20")
+
+
+@pytest.mark.parametrize(
+    "exchange_name, timeframe",
+    [("okx", "1H"), ("okx", "4H"), ("upbit", 60), ("upbit", 240)]
+)
+def test_store_appends_match_full_recompute(
+    app,
+    exchange,
+    monkeypatch,
+    exchange_name,
+    timeframe
+):
+
+    if exchange_name == "okx":
+
+        app.update_okx(("1H", "4H"))
+
+    else:
+
+        app.update_upbit((60, 240))
+
+    symbol = app.get_tracked_symbols(app.get_snapshot_rows(exchange_name))[0]
+
+    first, _, _ = app.candle_store.read_since(exchange_name, symbol, timeframe, None)
+
+    # 시계를 9시간 앞으로 : 1H 9개 / 4H 2개 정도 새 캔들
+    exchange.advance(monkeypatch, 9 * 3600)
+
+    if exchange_name == "okx":
+
+        app.update_okx(("1H", "4H"))
+
+    else:
+
+        app.update_upbit((60, 240))
+
+    added, connected, _ = app.candle_store.read_since(
+        exchange_name,
+        symbol,
+        timeframe,
+        app.get_candle_ts(exchange_name, first[-1])
+    )
+
+    assert connected and added
+
+    closes = [
+        app.get_candle_close(exchange_name, row)
+        for row in first + added
+    ]
+
+    state = app.ema_state_store.states[(exchange_name, symbol, timeframe)]
+
+    assert_same(state, closes)
+
+
+def test_seeding_one_exchange_does_not_block_the_other(app, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    app.update_upbit((60, 240))
+
+    okx_symbols = app.get_tracked_symbols(app.get_snapshot_rows("okx"))
+
+    upbit_symbols = app.get_tracked_symbols(app.get_snapshot_rows("upbit"))
+
+    store = app.EmaStateStore()
+
+    seeding = threading.Event()
+
+    release = threading.Event()
+
+    compute = app.compute_seed_values
+
+    def slow_compute(closes):
+
+        # OKX 시드 계산만 멈춰 둠
+        if threading.current_thread().name == "okx-seed":
+
+            seeding.set()
+
+            release.wait(5)
+
+        return compute(closes)
+
+    monkeypatch.setattr(app, "compute_seed_values", slow_compute)
+
+    worker = threading.Thread(
+        target=store.frames,
+        args=("okx", "1H", okx_symbols),
+        name="okx-seed"
+    )
+
+    worker.start()
+
+    try:
+
+        assert seeding.wait(5)
+
+        done = threading.Event()
+
+        threading.Thread(
+            target=lambda: (store.frames("upbit", 60, upbit_symbols), done.set()),
+            daemon=True
+        ).start()
+
+        # OKX 가 시드 중이어도 Upbit 은 끝남
+        assert done.wait(5)
+
+    finally:
+
+        release.set()
+
+        worker.join(5)
+
+    assert store.seeds == len(okx_symbols) + len(upbit_symbols)
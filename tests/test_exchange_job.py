@@ -0,0 +1,109 @@
+# 거래소별 갱신 작업 : 실행 중 요청 병합 / 시간 예산 초과 기록 / 남은 심볼 이전 행 유지
+
+import threading
+import time
+
+
+def test_requests_during_a_run_are_coalesced(app, monkeypatch):
+
+    started = threading.Event()
+
+    release = threading.Event()
+
+    runs = []
+
+    def update(exchange, timeframes):
+
+        runs.append(timeframes)
+
+        if len(runs) == 1:
+
+            started.set()
+
+            release.wait(5)
+
+        return True
+
+    monkeypatch.setattr(app, "update_exchange", update)
+
+    job = app.ExchangeJob("okx")
+
+    job.request(())
+
+    assert started.wait(5)
+
+    # 실행 중 요청 3건 → 끝난 뒤 1회 (시간봉 합집합)
+    job.request(("4H",))
+
+    job.request(())
+
+    job.request(("1H",))
+
+    release.set()
+
+    for _ in range(500):
+
+        if not job.stats()["running"]:
+
+            break
+
+        time.sleep(0.01)
+
+    assert runs == [(), ("1H", "4H")]
+
+    stats = job.stats()
+
+    assert (stats["runs"], stats["coalesced"], stats["running"]) == (2, 3, False)
+
+
+def test_overrun_is_recorded(app, monkeypatch):
+
+    monkeypatch.setattr(app, "CYCLE_DEADLINE", 0.05)
+
+    def update(exchange, timeframes):
+
+        time.sleep(0.1)
+
+        return True
+
+    monkeypatch.setattr(app, "update_exchange", update)
+
+    job = app.ExchangeJob("upbit")
+
+    job.request((), wait=True)
+
+    stats = job.stats()
+
+    assert stats["overruns"] == 1
+
+    assert stats["last_duration"] >= 0.1
+
+    assert stats["max_duration"] == stats["last_duration"]
+
+
+def test_expired_cycle_keeps_previous_rows(app, exchange, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    previous = {row.symbol: row for row in app.get_snapshot_rows("okx")}
+
+    # 다음 정시 캔들 조회가 예산 안에 끝나지 않음
+    exchange.advance(monkeypatch, 3600)
+
+    exchange.state["latency"] = 0.05
+
+    monkeypatch.setattr(app, "CYCLE_DEADLINE", 0.3)
+
+    app.exchange_jobs["okx"].request(("1H",), wait=True)
+
+    assert app.exchange_jobs["okx"].stats()["overruns"] == 1
+
+    rows = app.get_snapshot_rows("okx")
+
+    stale = [row for row in rows if row.stale]
+
+    assert stale
+
+    for row in stale:
+
+        assert row.ema is previous[row.symbol].ema
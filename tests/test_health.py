@@ -0,0 +1,125 @@
+# /healthz : 수집 스레드 동작 여부 / /readyz : 새로 계산된 스냅샷이 있는지
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+
+class Thread:
+
+    def __init__(self, alive):
+
+        self.alive = alive
+
+    def is_alive(self):
+
+        return self.alive
+
+
+@pytest.fixture
+def client(app):
+
+    return TestClient(app.app)
+
+
+def test_not_ready_before_first_publish(app, client):
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 503
+
+    data = response.json()
+
+    assert data["ready"] is False
+
+    assert data["exchanges"]["okx"] == {
+        "published": False,
+        "fresh": False,
+        "age_seconds": None,
+        "last_error": None,
+        "upbit_reference_stale": True
+    }
+
+
+def test_ready_after_first_publish(app, client):
+
+    app.update_upbit((60, 240))
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 200
+
+    data = response.json()
+
+    assert data["ready"] is True
+
+    assert data["exchanges"]["upbit"]["fresh"] is True
+
+    assert data["exchanges"]["okx"]["published"] is False
+
+    assert 0 <= data["exchanges"]["upbit"]["age_seconds"] < 60
+
+
+def test_not_ready_when_snapshot_goes_stale(app, client, exchange, monkeypatch):
+
+    app.update_upbit((60, 240))
+
+    exchange.advance(monkeypatch, app.SNAPSHOT_STALE_AFTER + 1)
+
+    # 이후 주기는 게시만 되고 새로 계산된 행 없음
+    exchange.state["fail_paths"].add("/v1/candles/minutes/60")
+
+    app.update_upbit((60, 240))
+
+    response = client.get("/readyz")
+
+    assert response.status_code == 503
+
+    upbit = response.json()["exchanges"]["upbit"]
+
+    assert upbit["published"] is True and upbit["fresh"] is False
+
+    assert upbit["age_seconds"] > app.SNAPSHOT_STALE_AFTER
+
+
+def test_collector_errors_are_reported(app, client, exchange, monkeypatch):
+
+    exchange.state["fail_paths"].add("/v1/market/all")
+
+    app.update_exchange("upbit", ())
+
+    assert client.get("/readyz").json()["exchanges"]["upbit"]["last_error"] is None
+
+    def broken(timeframes):
+
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(app, "update_upbit", broken)
+
+    app.update_exchange("upbit", ())
+
+    error = client.get("/readyz").json()["exchanges"]["upbit"]["last_error"]
+
+    assert error[1] == "boom"
+
+
+@pytest.mark.parametrize(
+    "threads, status, body",
+    [
+        ({}, 503, "down"),
+        ({"okx": Thread(True)}, 503, "down"),
+        ({"okx": Thread(True), "upbit": Thread(False)}, 503, "down"),
+        ({"okx": Thread(True), "upbit": Thread(True)}, 200, "ok")
+    ]
+)
+def test_healthz_follows_collector_threads(app, client, monkeypatch, threads, status, body):
+
+    monkeypatch.setattr(app, "collector_threads", threads)
+
+    response = client.get("/healthz")
+
+    assert response.status_code == status
+
+    assert response.json()["status"] == body
+
+    assert set(response.json()["worker_alive"]) == {"okx", "upbit"}
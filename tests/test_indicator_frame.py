@@ -0,0 +1,109 @@
+# 시간봉별 지표 프레임 1개를 모든 판정이 공유 : EMA 기간마다 한 번만 계산
+
+import collections
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+
+from main import Trend
+
+
+def random_frame(seed, size=300):
+
+    rng = np.random.default_rng(seed)
+
+    return pd.DataFrame({"c": 100 + np.cumsum(rng.normal(size=size))})
+
+
+def frame_with_runs(run_10_20, run_20_60_120, length=200):
+
+    frame = main.IndicatorFrame(pd.DataFrame({"c": [1.0] * length}), "c")
+
+    frame.runs = {"10_20": run_10_20, "20_60_120": run_20_60_120}
+
+    return frame
+
+
+def test_each_span_is_computed_once_per_frame(monkeypatch):
+
+    calls = collections.Counter()
+
+    ema_values = main.get_ema_values
+
+    def counting(df, column, span):
+
+        calls[span] += 1
+
+        return ema_values(df, column, span)
+
+    monkeypatch.setattr(main, "get_ema_values", counting)
+
+    main.get_frame_result(
+        main.IndicatorFrame(random_frame(1), "c"),
+        main.IndicatorFrame(random_frame(2), "c")
+    )
+
+    # 1H / 4H 프레임 각각 기간당 1회
+    assert calls == {span: 2 for span in main.EMA_SPANS}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frame_result_matches_single_functions(seed):
+
+    df1h = random_frame(seed)
+
+    df4h = random_frame(seed + 100)
+
+    result = main.get_frame_result(
+        main.IndicatorFrame(df1h, "c"),
+        main.IndicatorFrame(df4h, "c")
+    )
+
+    assert [main.format_ema_status(*run) for run in result.runs] == [
+        main.check_ema_10_20(df1h, "c"),
+        main.check_ema(df1h, "c"),
+        main.check_ema_10_20(df4h, "c"),
+        main.check_ema(df4h, "c")
+    ]
+
+
+@pytest.mark.parametrize(
+    "one_hour, expected_warning, expected_breakout",
+    [
+        ((Trend.SHORT, 2), (Trend.LONG, 4), main.NO_ALERT),
+        ((Trend.LONG, 2), main.NO_ALERT, (Trend.LONG, 4))
+    ]
+)
+def test_warning_and_breakout_read_shared_frames(
+    one_hour,
+    expected_warning,
+    expected_breakout
+):
+
+    ind1h = frame_with_runs(one_hour, (Trend.LONG, 40))
+
+    ind4h = frame_with_runs((Trend.LONG, 4), (Trend.LONG, 80))
+
+    result = main.get_frame_result(ind1h, ind4h)
+
+    assert result.warning == expected_warning
+
+    assert result.breakout == expected_breakout
+
+    assert result.signal == Trend.LONG
+
+
+def test_long_four_hour_run_is_not_alerted():
+
+    ind1h = frame_with_runs((Trend.SHORT, 2), (Trend.LONG, 40))
+
+    ind4h = frame_with_runs((Trend.LONG, 11), (Trend.LONG, 80))
+
+    result = main.get_frame_result(ind1h, ind4h)
+
+    assert result.warning == main.NO_ALERT
+
+    assert result.signal == Trend.NONE
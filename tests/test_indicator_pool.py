@@ -0,0 +1,95 @@
+# 지표 계산 프로세스 풀 : 결과는 현재 프로세스 계산과 같고, 오류 시 현재 프로세스로 대체
+
+import numpy as np
+import pytest
+
+
+def closes(count):
+
+    rng = np.random.default_rng(11)
+
+    return [
+        100 + np.cumsum(rng.normal(size=int(rng.integers(1, 300))))
+        for _ in range(count)
+    ]
+
+
+def test_disabled_pool_computes_locally(app):
+
+    values = closes(100)
+
+    result = app.compute_seed_values(values)
+
+    assert result == app.get_seed_values(values)
+
+    stats = app.get_indicator_pool_stats()
+
+    assert (stats["running"], stats["local"], stats["remote"]) == (False, 100, 0)
+
+
+def test_small_batches_skip_the_pool(app, monkeypatch):
+
+    monkeypatch.setattr(app, "INDICATOR_PROCESS_WORKERS", 2)
+
+    app.compute_seed_values(closes(app.INDICATOR_PROCESS_MIN_SYMBOLS - 1))
+
+    assert not app.get_indicator_pool_stats()["running"]
+
+
+def test_worker_processes_match_local_results(app, monkeypatch):
+
+    monkeypatch.setattr(app, "INDICATOR_PROCESS_WORKERS", 2)
+
+    values = closes(150)
+
+    try:
+
+        result = app.compute_seed_values(values)
+
+        stats = app.get_indicator_pool_stats()
+
+    finally:
+
+        app.reset_indicator_pool()
+
+    expected = app.get_seed_values(values)
+
+    assert len(result) == len(expected)
+
+    for (length, emas, runs), (expected_length, expected_emas, expected_runs) in zip(
+        result,
+        expected
+    ):
+
+        assert length == expected_length
+
+        assert emas == pytest.approx(expected_emas, rel=1e-12)
+
+        assert runs == expected_runs
+
+    assert stats["remote"] == 150
+
+    assert stats["chunks"] == 3
+
+
+def test_pool_error_falls_back_to_local(app, monkeypatch):
+
+    class BrokenPool:
+
+        def map(self, function, chunks):
+
+            raise RuntimeError("worker died")
+
+    resets = []
+
+    monkeypatch.setattr(app, "get_indicator_pool", lambda: BrokenPool())
+
+    monkeypatch.setattr(app, "reset_indicator_pool", lambda: resets.append(1))
+
+    values = closes(app.INDICATOR_PROCESS_MIN_SYMBOLS)
+
+    assert app.compute_seed_values(values) == app.get_seed_values(values)
+
+    stats = app.get_indicator_pool_stats()
+
+    assert (stats["errors"], stats["local"], len(resets)) == (1, len(values), 1)
@@ -0,0 +1,61 @@
+
+def test_top30_computed_in_batches(app, monkeypatch):
+
+    sizes = []
+
+    get_ema_results = app.get_ema_results
+
+    def recording(exchange, symbols, *args, **kwargs):
+
+        sizes.append(len(symbols))
+
+        return get_ema_results(exchange, symbols, *args, **kwargs)
+
+    monkeypatch.setattr(app, "get_ema_results", recording)
+
+    app.update_okx(("1H", "4H"))
+
+    assert sum(sizes) == 30
+    assert max(sizes) == app.EMA_PUBLISH_CHUNK
+    assert len(sizes) == 3
+
+
+def test_rows_published_per_chunk(app):
+
+    app.update_upbit((60, 240))
+
+    first = app.snapshot_versions["upbit"]
+
+    rows = app.latest_upbit_data
+
+    # 주기 시작 게시 1회 + 묶음 3개
+    assert first == 1 + 3
+    assert [row.rank for row in rows] == list(range(1, 31))
+    assert all(row.cycle == app.snapshot_cycles["upbit"] for row in rows)
+
+    app.update_upbit((60, 240))
+
+    assert app.snapshot_versions["upbit"] == first + 4
+    assert len(app.latest_upbit_data) == 30
+
+
+def test_cycle_start_keeps_previous_rows(app, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    seen = []
+
+    publish_rows = app.publish_rows
+
+    def recording(exchange, rows, order=None):
+
+        seen.append(len(app.latest_okx_data))
+
+        return publish_rows(exchange, rows, order)
+
+    monkeypatch.setattr(app, "publish_rows", recording)
+
+    app.update_okx(())
+
+    # 새 주기 중에도 목록은 항상 30행
+    assert seen and all(count == 30 for count in seen)
@@ -0,0 +1,120 @@
+# 행은 원본 숫자 / 열거형만 보관하고 표시 문자열은 렌더링 때 생성
+
+import pickle
+
+import main
+
+
+def test_rows_hold_raw_values(app):
+
+    app.update_okx(("1H", "4H"))
+
+    for row in app.get_snapshot_rows("okx"):
+
+        assert isinstance(row, app.DashboardRow)
+
+        assert not hasattr(row, "__dict__")
+
+        assert type(row.volume) is float
+
+        assert row.changes is None or all(type(x) is float for x in row.changes)
+
+        assert isinstance(row.ema, app.EmaResult)
+
+        assert isinstance(row.ema.signal, app.Trend)
+
+        for state, count in row.ema.runs:
+
+            assert isinstance(state, app.Trend) and type(count) is int
+
+        for value in pickle.loads(pickle.dumps(row)).__getstate__():
+
+            assert not (isinstance(value, str) and "<" in value)
+
+
+def test_copy_and_pickle_keep_every_slot(app):
+
+    ema = app.EmaResult(
+        [(1, 3), (-1, 7), (0, 0), (1, 40)],
+        (app.Trend.LONG, 3),
+        app.NO_ALERT,
+        app.Trend.LONG
+    )
+
+    row = app.DashboardRow(
+        1, "C000-USDT-SWAP", "C000", 12.5, [1.5, -2.0], ema,
+        on_upbit=True, updated_at=10.0, cycle=4
+    )
+
+    for other in (row.copy(), pickle.loads(pickle.dumps(row))):
+
+        assert other.__getstate__()[:6] == row.__getstate__()[:6]
+
+        assert other.ema.__getstate__() == ema.__getstate__()
+
+        assert (other.on_upbit, other.updated_at, other.cycle) == (True, 10.0, 4)
+
+    assert row.changes == (1.5, -2.0)
+
+    assert ema.runs[1] == (app.Trend.SHORT, 7)
+
+
+def test_formatting_happens_at_render_time(app):
+
+    app.update_upbit((60, 240))
+
+    html = app.render_dashboard()
+
+    for row in app.get_snapshot_rows("upbit"):
+
+        assert app.format_volume(row.volume) in html
+
+    assert "+1.23%" in main.format_change((1.234,))
+
+    assert main.format_change(None) == "N/A"
+
+
+def test_warm_cache_round_trip(app):
+
+    app.update_okx(("1H", "4H"))
+
+    rows = [row.__getstate__()[:6] for row in app.get_snapshot_rows("okx")]
+
+    app.save_warm_cache()
+
+    app.publish_snapshot("okx", [])
+
+    assert app.load_warm_cache()
+
+    assert [row.__getstate__()[:6] for row in app.get_snapshot_rows("okx")] == rows
+
+
+def test_old_row_format_restores_candles_only(app):
+
+    app.update_okx(("1H", "4H"))
+
+    app.save_warm_cache()
+
+    with open(app.WARM_CACHE_PATH, "rb") as f:
+
+        payload = pickle.load(f)
+
+    payload["row_format"] = app.ROW_FORMAT - 1
+
+    with open(app.WARM_CACHE_PATH, "wb") as f:
+
+        pickle.dump(payload, f)
+
+    app.publish_snapshot("okx", [])
+
+    version = app.snapshot_versions["okx"]
+
+    candles = app.load_warm_cache()
+
+    assert [candle[:3] for candle in candles] == [
+        candle[:3] for candle in payload["candles"]
+    ]
+
+    assert app.snapshot_versions["okx"] == version
+
+    assert app.get_snapshot_rows("okx") == []
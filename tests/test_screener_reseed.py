@@ -0,0 +1,109 @@
+# 스크리너 (SCREENER_CANDLE_DEPTH) 로 먼저 시드된 심볼이 TOP30 에 들어오면 EMA_SEED_DEPTH 로 다시 시드
+
+from test_ema_state import assert_same, full_frame
+
+
+def state_for(app, symbol):
+
+    return app.ema_state_store.states[("okx", symbol, "1H")]
+
+
+def test_screener_symbol_is_reseeded_at_top30_depth(app):
+
+    # TOP30 수집 전 스크리너 → 전체 심볼 얕은 깊이로 시드
+    app.update_screener("okx")
+
+    symbols = app.get_all_okx_swap_symbols()
+
+    shallow = {symbol: state_for(app, symbol).length for symbol in symbols}
+
+    assert max(shallow.values()) <= app.SCREENER_CANDLE_DEPTH
+
+    app.update_okx(("1H", "4H"))
+
+    for symbol in app.get_tracked_symbols(app.get_snapshot_rows("okx")):
+
+        state = state_for(app, symbol)
+
+        rows, _, _ = app.candle_store.read_since("okx", symbol, "1H", None)
+
+        assert state.length == len(rows) > shallow[symbol]
+
+        assert state.length >= app.EMA_SEED_DEPTH
+
+        assert_same(
+            state,
+            [app.get_candle_close("okx", row) for row in rows]
+        )
+
+
+def full_result(app, symbol):
+
+    frames = [
+        full_frame([
+            app.get_candle_close("okx", row)
+            for row in app.candle_store.read_since("okx", symbol, timeframe, None)[0]
+        ])
+        for timeframe in ("1H", "4H")
+    ]
+
+    return app.get_frame_result(*frames)
+
+
+def test_published_rows_use_the_deeper_seed(app):
+
+    app.update_screener("okx")
+
+    screener = dict(app.latest_screener_data["okx"])
+
+    hits = app.ema_result_memo.stats()["hits"]
+
+    app.update_okx(("1H", "4H"))
+
+    # 재시드한 심볼은 스크리너 결과를 재사용하지 않음
+    assert app.ema_result_memo.stats()["hits"] == hits
+
+    changed = 0
+
+    for row in app.get_snapshot_rows("okx"):
+
+        expected = full_result(app, row.symbol)
+
+        assert row.ema.runs == expected.runs
+
+        assert row.ema.warning == expected.warning
+
+        assert row.ema.breakout == expected.breakout
+
+        changed += row.ema.runs != screener[row.symbol].runs
+
+    assert changed
+
+
+def test_same_depth_sync_keeps_incremental_state(app):
+
+    app.update_okx(("1H", "4H"))
+
+    seeds = app.ema_state_store.seeds
+
+    app.update_okx(("1H", "4H"))
+
+    assert app.ema_state_store.seeds == seeds
+
+
+def test_restore_reseeds_state(app):
+
+    app.update_okx(("1H",))
+
+    symbol = app.get_tracked_symbols(app.get_snapshot_rows("okx"))[0]
+
+    rows, _, _ = app.candle_store.read_since("okx", symbol, "1H", None)
+
+    app.candle_store.restore("okx", symbol, "1H", rows[:-5])
+
+    app.ema_state_store.frames("okx", "1H", [symbol])
+
+    assert_same(
+        state_for(app, symbol),
+        [app.get_candle_close("okx", row) for row in rows[:-5]]
+    )
@@ -0,0 +1,130 @@
+import json
+
+
+def fail_okx_candles(exchange):
+
+    exchange.state["fail_paths"] |= {
+        "/api/v5/market/candles",
+        "/api/v5/market/history-candles"
+    }
+
+
+def test_fresh_time_tracks_computed_rows(app):
+
+    app.update_okx(("1H", "4H"))
+
+    fresh_at = app.snapshot_fresh_at["okx"]
+
+    assert fresh_at == max(row.updated_at for row in app.latest_okx_data)
+    assert app.get_readiness()["exchanges"]["okx"]["age_seconds"] is not None
+
+
+def test_reused_rows_do_not_advance_fresh_time(app, exchange):
+
+    app.update_okx(("1H", "4H"))
+
+    fresh_at = app.snapshot_fresh_at["okx"]
+
+    published_at = app.snapshot_published_at["okx"]
+
+    fail_okx_candles(exchange)
+
+    app.update_okx(("1H", "4H"))
+
+    assert all(row.stale for row in app.latest_okx_data)
+    assert app.snapshot_published_at["okx"] > published_at
+    assert app.snapshot_fresh_at["okx"] == fresh_at
+
+
+def test_delay_banner_uses_fresh_time(app, exchange, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    fail_okx_candles(exchange)
+
+    monkeypatch.setattr(app, "SNAPSHOT_STALE_AFTER", 0)
+
+    app.update_okx(("1H", "4H"))
+
+    assert app.is_snapshot_delayed("okx")
+    assert "갱신 지연" in app.snapshot_status_html("okx")
+
+
+def test_api_reports_fresh_time(app):
+
+    app.update_upbit((60, 240))
+
+    body = app.api_snapshots["upbit"].get(app.API_FIELDS)
+
+    data = json.loads(body)
+
+    assert data["updated_at"] == app.snapshot_fresh_at["upbit"]
+    assert data["published_at"] == app.snapshot_published_at["upbit"]
+
+
+def drop_first_row(app, exchange_name):
+
+    rows = app.get_snapshot_rows(exchange_name)
+
+    app.publish_snapshot(exchange_name, rows[1:])
+
+    return rows[0].symbol
+
+
+def test_new_symbol_that_fails_to_sync_is_stale(app, exchange, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    fresh_at = app.snapshot_fresh_at["okx"]
+
+    # 이전 행이 없는 심볼 = 이번 주기에 TOP30 에 새로 들어온 심볼
+    new_symbol = drop_first_row(app, "okx")
+
+    fail_okx_candles(exchange)
+
+    changes = []
+
+    monkeypatch.setattr(app, "get_okx_change", lambda symbol: changes.append(symbol))
+
+    app.update_okx(("1H", "4H"))
+
+    rows = {row.symbol: row for row in app.get_snapshot_rows("okx")}
+
+    assert len(rows) == 30
+
+    row = rows[new_symbol]
+
+    assert row.stale and row.changes is None and row.updated_at is None
+
+    assert all(row.stale for row in rows.values())
+
+    assert changes == []
+
+    assert app.snapshot_fresh_at["okx"] == fresh_at
+
+
+def test_expired_deadline_skips_change_requests(app, monkeypatch):
+
+    app.update_upbit((60, 240))
+
+    fresh_at = app.snapshot_fresh_at["upbit"]
+
+    new_market = drop_first_row(app, "upbit")
+
+    changes = []
+
+    monkeypatch.setattr(app, "get_upbit_change", lambda market: changes.append(market))
+
+    monkeypatch.setattr(app, "is_deadline_expired", lambda: True)
+
+    app.update_upbit((60, 240))
+
+    rows = {row.symbol: row for row in app.get_snapshot_rows("upbit")}
+
+    assert rows[new_market].stale and rows[new_market].changes is None
+
+    assert all(row.stale for row in rows.values())
+
+    assert changes == []
+
+    assert app.snapshot_fresh_at["upbit"] == fresh_at
@@ -0,0 +1,121 @@
+# 웹소켓 캔들 반영 : confirm 누락 시 빈 구간 방지 / 마감 반영은 루프 밖 스레드에서 실행
+
+import asyncio
+import json
+import threading
+
+import main
+
+HOUR_MS = 3_600_000
+
+
+def okx_row(ts, close, confirm):
+
+    return [
+        str(ts), str(close), str(close), str(close), str(close),
+        "1", "1", str(close), confirm
+    ]
+
+
+def seeded_symbol(app):
+
+    app.update_okx(("1H", "4H"))
+
+    return app.get_tracked_symbols(app.get_snapshot_rows("okx"))[0]
+
+
+def test_missed_confirm_closes_previous_live_bar(app):
+
+    symbol = seeded_symbol(app)
+
+    rows, _, _ = app.candle_store.read_since("okx", symbol, "1H", None)
+
+    last_ts = app.get_candle_ts("okx", rows[-1])
+
+    # 진행 중 캔들만 받고 confirm=1 메시지 없이 다음 캔들 시작
+    app.candle_store.apply_stream(
+        "okx", symbol, "1H", okx_row(last_ts + HOUR_MS, 123.0, "0")
+    )
+
+    closed = app.candle_store.apply_stream(
+        "okx", symbol, "1H", okx_row(last_ts + 2 * HOUR_MS, 124.0, "0")
+    )
+
+    assert closed
+
+    added, connected, live = app.candle_store.read_since(
+        "okx", symbol, "1H", last_ts
+    )
+
+    assert connected
+
+    assert [app.get_candle_ts("okx", row) for row in added] == [
+        last_ts + HOUR_MS
+    ]
+
+    assert added[0][8] == "1"
+
+    assert app.get_candle_ts("okx", live) == last_ts + 2 * HOUR_MS
+
+    # 확정 표시가 있어야 parse_okx_ohlcv 에서 빠지지 않음 (REST 와 같은 최신순)
+    df = app.parse_okx_ohlcv(symbol, [list(row) for row in (rows + added)[::-1]])
+
+    assert df["c"].iloc[-1] == 123.0
+
+
+def test_refresh_runs_off_the_stream_loop(app, monkeypatch):
+
+    symbol = seeded_symbol(app)
+
+    rows, _, _ = app.candle_store.read_since("okx", symbol, "1H", None)
+
+    last_ts = app.get_candle_ts("okx", rows[-1])
+
+    done = threading.Event()
+
+    seen = {}
+
+    def refresh(name):
+
+        seen["symbol"] = name
+
+        seen["thread"] = threading.get_ident()
+
+        done.set()
+
+    monkeypatch.setattr(app, "refresh_okx_row", refresh)
+
+    message = json.dumps({
+        "arg": {"channel": "candle1H", "instId": symbol},
+        "data": [okx_row(last_ts + HOUR_MS, 123.0, "1")]
+    })
+
+    async def run():
+
+        seen["loop"] = threading.get_ident()
+
+        app.handle_okx_stream_message(message)
+
+        # 루프는 막히지 않고 다른 스레드에서 반영 완료
+        assert not done.is_set() or seen["thread"] != seen["loop"]
+
+        await asyncio.get_running_loop().run_in_executor(None, done.wait, 5)
+
+    asyncio.run(run())
+
+    assert seen["symbol"] == symbol
+
+    assert seen["thread"] != seen["loop"]
+
+
+def test_refresh_errors_are_logged(app, caplog):
+
+    future = main.concurrent.futures.Future()
+
+    future.set_exception(RuntimeError("boom"))
+
+    with caplog.at_level("ERROR"):
+
+        app.log_stream_refresh_error(future)
+
+    assert "boom" in caplog.text
@@ -0,0 +1,74 @@
+# OKX 작업은 업비트 환율 / 마켓 목록을 직접 조회하지 않고 업비트 수집 결과를 사용
+
+import pytest
+
+
+def upbit_calls(exchange):
+
+    return exchange.calls("/v1/market/all"), exchange.calls("/v1/ticker")
+
+
+def test_okx_reads_reference_cached_by_upbit(app, exchange):
+
+    app.update_upbit(())
+
+    markets, tickers = upbit_calls(exchange)
+
+    for _ in range(3):
+
+        app.update_okx(())
+
+    # 가짜 업비트에는 KRW-USDT 마켓이 없어 환율만 한 번 직접 조회
+    assert upbit_calls(exchange) == (markets, tickers + 1)
+
+    # 업비트 마켓은 C000 ~ C039
+    for row in app.get_snapshot_rows("okx"):
+
+        assert row.on_upbit == (int(row.name[1:]) < exchange.state["upbit"])
+
+
+def test_okx_bootstraps_reference_once(app, exchange):
+
+    for _ in range(3):
+
+        app.update_okx(())
+
+    assert upbit_calls(exchange) == (1, 1)
+
+    assert app.upbit_reference["usdt_krw"] == 1400.0
+
+
+def test_reference_is_refreshed_from_upbit_tickers(app):
+
+    app.update_upbit_reference(["KRW-BTC"], 1500.0)
+
+    usdt_krw, coins, stale = app.get_upbit_reference()
+
+    assert (usdt_krw, coins, stale) == (1500.0, {"BTC"}, False)
+
+    # 환율이 빠진 응답은 마지막 환율 유지
+    app.update_upbit_reference(["KRW-BTC", "KRW-ETH"], None)
+
+    assert app.get_upbit_reference() == (1500.0, {"BTC", "ETH"}, False)
+
+
+def test_old_reference_is_flagged_stale(app, exchange, monkeypatch):
+
+    app.update_upbit(())
+
+    app.update_okx(())
+
+    assert not app.get_readiness()["exchanges"]["okx"]["upbit_reference_stale"]
+
+    # 업비트 수집이 멈춘 채로 시간 경과
+    exchange.state["fail_paths"].update({"/v1/market/all", "/v1/ticker"})
+
+    exchange.advance(monkeypatch, app.UPBIT_REFERENCE_STALE_AFTER + 60)
+
+    app.update_okx(())
+
+    assert app.get_readiness()["exchanges"]["okx"]["upbit_reference_stale"]
+
+    _, coins, stale = app.get_upbit_reference()
+
+    assert stale and "C000" in coins
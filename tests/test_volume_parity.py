@@ -0,0 +1,71 @@
+# OKX 거래대금 방식 비교 : 실제 사용한 방식 표시 / 결과 재사용 / 동시 요청 1회 수집
+
+import threading
+
+
+def test_reports_sources_and_reuses_result(app, exchange):
+
+    first = app.get_okx_volume_parity()
+
+    assert first["sources"] == {"candle": "candle", "ticker": "ticker"}
+
+    assert first["overlap"] > 0
+
+    instruments = exchange.calls("/api/v5/public/instruments")
+
+    tickers = exchange.calls("/api/v5/market/tickers")
+
+    second = app.get_okx_volume_parity(10)
+
+    assert second["top_n"] == 10
+
+    assert second["collected_at"] == first["collected_at"]
+
+    assert exchange.calls("/api/v5/public/instruments") == instruments
+
+    assert exchange.calls("/api/v5/market/tickers") == tickers
+
+
+def test_ticker_failure_is_reported(app, exchange):
+
+    exchange.state["fail_paths"].add("/api/v5/market/tickers")
+
+    result = app.get_okx_volume_parity()
+
+    assert result["sources"]["ticker"] == "candle"
+
+    # 같은 캔들 합산끼리 비교
+    assert result["only_candle"] == []
+
+    assert result["max_rank_diff"] == 0
+
+
+def test_concurrent_requests_collect_once(app, exchange):
+
+    exchange.state["latency"] = 0.01
+
+    threads = [
+        threading.Thread(target=app.get_okx_volume_parity)
+        for _ in range(4)
+    ]
+
+    for thread in threads:
+
+        thread.start()
+
+    for thread in threads:
+
+        thread.join()
+
+    assert exchange.calls("/api/v5/market/tickers") == 1
+
+
+def test_result_expires_after_ttl(app, exchange, monkeypatch):
+
+    app.get_okx_volume_parity()
+
+    exchange.advance(monkeypatch, app.OKX_VOLUME_PARITY_TTL + 1)
+
+    app.get_okx_volume_parity()
+
+    assert exchange.calls("/api/v5/market/tickers") == 2
@@ -0,0 +1,127 @@
+# 디스크 캐시 : 캔들 압축 저장 / 복원 왕복 / 손상되거나 형식이 다른 파일은 무시
+
+import pickle
+
+import pytest
+
+
+def buffers(app):
+
+    return {
+        (exchange, symbol, timeframe): (
+            [app.get_candle_ts(exchange, row) for row in rows],
+            [app.get_candle_close(exchange, row) for row in rows],
+            depth,
+            generation
+        )
+        for exchange, symbol, timeframe, rows, depth, generation
+        in app.candle_store.export()
+    }
+
+
+@pytest.fixture
+def saved(app, monkeypatch):
+
+    app.update_okx(("1H", "4H"))
+
+    app.update_upbit((60, 240))
+
+    app.save_warm_cache()
+
+    before = buffers(app)
+
+    # 새 프로세스처럼 빈 저장소 / 빈 스냅샷
+    monkeypatch.setattr(app, "candle_store", app.CandleStore())
+
+    app.publish_snapshot("okx", [])
+
+    app.publish_snapshot("upbit", [])
+
+    return before
+
+
+def test_round_trip_restores_buffers(app, saved):
+
+    candles = app.load_warm_cache()
+
+    assert len(app.get_snapshot_rows("okx")) == 30
+
+    app.restore_warm_candles(candles)
+
+    assert buffers(app) == saved
+
+    # 같은 깊이 요청은 다시 전체 수집하지 않음
+    symbol = app.get_tracked_symbols(app.get_snapshot_rows("okx"))[0]
+
+    app.candle_store.sync("okx", symbol, "1H", app.EMA_SEED_DEPTH + 1)
+
+    assert app.candle_store.stats()["refills"] == 0
+
+
+def test_packed_rows_unpack_to_the_same_candles(app, saved):
+
+    for exchange, symbol, timeframe, ints, floats, _, _ in app.load_warm_cache():
+
+        rows = app.unpack_candle_rows(exchange, symbol, timeframe, ints, floats)
+
+        repacked = app.pack_candle_rows(exchange, rows)
+
+        assert (repacked[0] == ints).all() and (repacked[1] == floats).all()
+
+        assert all(
+            app.is_candle_confirmed(exchange, row, app.CANDLE_INTERVALS[(exchange, timeframe)])
+            for row in rows
+        )
+
+
+def test_restore_in_process_bumps_generation(app, saved):
+
+    candles = app.load_warm_cache()
+
+    app.restore_warm_candles(candles)
+
+    app.restore_warm_candles(candles)
+
+    for key, (_, _, _, generation) in buffers(app).items():
+
+        assert generation == saved[key][3] + 1
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage"])
+def test_corrupt_file_is_ignored(app, saved, damage):
+
+    with open(app.WARM_CACHE_PATH, "rb") as f:
+
+        data = f.read()
+
+    with open(app.WARM_CACHE_PATH, "wb") as f:
+
+        f.write(data[:len(data) // 2] if damage == "truncate" else b"not a pickle")
+
+    assert app.load_warm_cache() is None
+
+    assert app.get_snapshot_rows("okx") == []
+
+
+def test_old_candle_format_is_ignored(app, saved):
+
+    with open(app.WARM_CACHE_PATH, "rb") as f:
+
+        payload = pickle.load(f)
+
+    payload["candle_format"] = app.CANDLE_FORMAT - 1
+
+    with open(app.WARM_CACHE_PATH, "wb") as f:
+
+        pickle.dump(payload, f)
+
+    assert app.load_warm_cache() is None
+
+    assert app.get_snapshot_rows("okx") == []
+
+
+def test_missing_file_is_ignored(app, tmp_path, monkeypatch):
+
+    monkeypatch.setattr(app, "WARM_CACHE_PATH", str(tmp_path / "none.bin"))
+
+    assert app.load_warm_cache() is None